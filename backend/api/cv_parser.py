@@ -4,22 +4,105 @@ CV Parser API Module
 This module provides a FastAPI endpoint for CV parsing using LangGraph and Gemini API.
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
 from typing import Dict, Any, List, Optional
 import os
 import traceback
 
-from backend.core.file_processing import extract_text_from_file
-from backend.core.cache_utils import get_cache_key, get_from_cache, save_to_cache
-from backend.workflows.langgraph_workflow import run_workflow_with_cv
+from backend.core.file_processing import extract_text_from_file, spool_upload, UploadTooLarge
+from backend.core.cache_utils import (get_cache_key, get_from_cache, save_to_cache,
+                                      get_workflow_from_cache, save_workflow_to_cache, WORKFLOW_CACHE_VERSION)
+from backend.core.file_cache import get_upload_key, get_file_entry, save_file_text, save_file_result
+from backend.core.extraction_service import extraction_service, ExtractionQueueFull, ExtractionTimeout
+from backend.core.sse import sse_response
+from backend.core.job_queue import JobQueue, JobQueueFull
+from backend.core.llm_admission import current_llm_user, set_llm_user
+from backend.workflows.langgraph_workflow import (run_workflow_with_cv, resolve_fan_out, stream_workflow_with_cv,
+                                                  apply_workflow_update, replay_workflow_state)
 
 router = APIRouter()
 
+def insufficient_text_result(extracted_text):
+    """Build the partial response for a document with too little text for AI parsing."""
+    from backend.core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
+                         extract_education, extract_experience, extract_projects, extract_interests)
+    from backend.core.cv_document import CVDocument
+    cv_doc = CVDocument(extracted_text)
+    fallback_data = {
+        "name": extract_name(cv_doc),
+        "email": extract_email(cv_doc),
+        "phone": extract_phone(cv_doc),
+        "skills": extract_skills(cv_doc) if extracted_text else ["Insufficient document text"],
+        "education": extract_education(cv_doc) if extracted_text else "Could not extract education information",
+        "work_experience": extract_experience(cv_doc) if extracted_text else "Could not extract work experience",
+        "projects": extract_projects(cv_doc) if extracted_text else [],
+        "interests": extract_interests(cv_doc) if extracted_text else []
+    }
+    return {
+        "status": "partial",
+        "data": fallback_data,
+        "message": "Limited text extracted from document. Results may be incomplete."
+    }
+
+def fix_contact_details(parsed_cv, extracted_text):
+    """Replace a missing or heading-like name and a missing email with the rule-based extraction."""
+    # If the name is missing or looks like a heading, use our extraction method
+    if not parsed_cv.get("name") or parsed_cv.get("name") in ["About Me", "Profile", "Personal Information"]:
+        from backend.core.ai_helpers import extract_name
+        better_name = extract_name(extracted_text)
+        if better_name and better_name != "Name not detected":
+            parsed_cv["name"] = better_name
+            print(f"Fixed name extraction: {better_name}")
+    
+    # Same for email if missing
+    if not parsed_cv.get("email") or parsed_cv.get("email") == "Not provided":
+        from backend.core.ai_helpers import extract_email
+        better_email = extract_email(extracted_text)
+        if better_email and better_email != "Email not detected":
+            parsed_cv["email"] = better_email
+            print(f"Fixed email extraction: {better_email}")
+
+def update_user_profile(email, parsed_cv):
+    """Save parsed CV data to the profile of the user with this email. Returns whether a profile was updated."""
+    from backend.main import supabase
+    user_result = supabase.table("profiles").select("*").eq("email", email).execute()
+    
+    if not user_result.data or len(user_result.data) == 0:
+        return False
+    
+    user = user_result.data[0]
+    # Update user profile with CV data
+    profile_data = {
+        "name": parsed_cv.get("name", user.get("name", "")),
+        "email": parsed_cv.get("email", email),
+        "education": parsed_cv.get("education", ""),
+        "experience": parsed_cv.get("work_experience", ""),
+        "projects": parsed_cv.get("projects", ""),
+        "skills": parsed_cv.get("skills", []),
+        "cv_data": parsed_cv,
+        "updated_at": "now()"
+    }
+    
+    supabase.table("profiles").update({"profile_data": profile_data}).eq("id", user["id"]).execute()
+    return True
+
+async def read_cv_text(file):
+    """Return the cache key and text of an uploaded CV, extracting the text unless the file is cached."""
+    file_key = await get_upload_key(file)
+    file_entry = get_file_entry(file_key)
+    if file_entry:
+        print("Using cached text for identical file")
+        return file_key, file_entry["text"]
+    extracted_text = await extract_text_from_file(file)
+    save_file_text(file_key, extracted_text)
+    return file_key, extracted_text
+
 @router.post("/api/cv/parse")
 async def parse_cv(
     file: UploadFile = File(...), 
     email: Optional[str] = Query(None, description="User email for persistence"),
-    use_langgraph: bool = Query(True, description="Whether to use LangGraph workflow for enhanced processing")
+    use_langgraph: bool = Query(True, description="Whether to use LangGraph workflow for enhanced processing"),
+    fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
 ):
     """
     Parse a CV file and return structured information.
@@ -31,6 +114,7 @@ async def parse_cv(
     - file: The CV file (PDF or DOCX) to parse
     - email: Optional user email for saving results to profile
     - use_langgraph: Whether to use LangGraph workflow (recommended for best results)
+    - fan_out: Whether to run the fan-out workflow, which skips one Gemini round-trip (defaults to WORKFLOW_FAN_OUT)
     
     Returns:
     - Structured CV data with skills, education, experience, etc.
@@ -43,48 +127,57 @@ async def parse_cv(
         raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
     
     try:
-        # Extract text from file
-        extracted_text = await extract_text_from_file(file)
+        # Skip extraction entirely if this exact file has been processed before
+        file_key = await get_upload_key(file)
+        file_entry = get_file_entry(file_key)
+        if file_entry and file_entry["result"] and not use_langgraph:
+            print("Using cached result for identical file")
+            return {
+                "status": "success",
+                "data": file_entry["result"],
+                "source": "cache"
+            }
+        
+        if file_entry:
+            print("Using cached text for identical file")
+            extracted_text = file_entry["text"]
+        else:
+            # Extract text from file
+            extracted_text = await extract_text_from_file(file)
+            save_file_text(file_key, extracted_text)
         
         if not extracted_text or len(extracted_text) < 50:  # Basic validation
             print("Insufficient text extracted")
             # Still attempt fallback extraction even with limited text
-            from core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
-                                 extract_education, extract_experience, extract_projects, extract_interests)
-            fallback_data = {
-                "name": extract_name(extracted_text),
-                "email": extract_email(extracted_text),
-                "phone": extract_phone(extracted_text),
-                "skills": extract_skills(extracted_text) if extracted_text else ["Insufficient document text"],
-                "education": extract_education(extracted_text) if extracted_text else "Could not extract education information",
-                "work_experience": extract_experience(extracted_text) if extracted_text else "Could not extract work experience",
-                "projects": extract_projects(extracted_text) if extracted_text else [],
-                "interests": extract_interests(extracted_text) if extracted_text else []
-            }
-            return {
-                "status": "partial",
-                "data": fallback_data,
-                "message": "Limited text extracted from document. Results may be incomplete."
-            }
+            return insufficient_text_result(extracted_text)
         
-        # Check cache first to avoid redundant processing
         cache_key = get_cache_key(extracted_text)
-        cached_result = get_from_cache(cache_key)
-        
-        if cached_result:
-            print("Using cached CV parsing result")
-            return {
-                "status": "success",
-                "data": cached_result,
-                "source": "cache"
-            }
         
         if use_langgraph:
+            # A cached workflow run is answered in the same shape as a fresh one
+            fan_out = resolve_fan_out(fan_out)
+            workflow_mode = "fan_out" if fan_out else "sequential"
+            cached_workflow = get_workflow_from_cache(extracted_text, fan_out)
+            if cached_workflow:
+                print("Using cached LangGraph workflow result")
+                return {
+                    "status": "success",
+                    "data": cached_workflow.get("parsed_profile", {}),
+                    "workflow_result": {
+                        "skills_analysis": cached_workflow.get("skills_analysis"),
+                        "career_recommendations": cached_workflow.get("career_recommendations"),
+                        "roadmap": cached_workflow.get("roadmap")
+                    },
+                    "source": "cache",
+                    "cache_schema_version": WORKFLOW_CACHE_VERSION,
+                    "workflow_mode": workflow_mode
+                }
+            
             try:
                 # Process with LangGraph workflow - this does CV parsing, skills analysis,
                 # career recommendations, and roadmap generation in one workflow
                 print(f"Processing CV with LangGraph workflow for email: {email}")
-                workflow_result = await run_workflow_with_cv(extracted_text)
+                workflow_result = await run_workflow_with_cv(extracted_text, fan_out)
                 
                 if "error" in workflow_result and workflow_result["error"]:
                     print(f"Error in LangGraph workflow: {workflow_result['error']}")
@@ -92,22 +185,7 @@ async def parse_cv(
                 
                 # Extract the parsed profile from the workflow result
                 parsed_cv = workflow_result.get("parsed_profile", {})
-                
-                # If the name is missing or looks like a heading, use our extraction method
-                if not parsed_cv.get("name") or parsed_cv.get("name") in ["About Me", "Profile", "Personal Information"]:
-                    from core.ai_helpers import extract_name
-                    better_name = extract_name(extracted_text)
-                    if better_name and better_name != "Name not detected":
-                        parsed_cv["name"] = better_name
-                        print(f"Fixed name extraction: {better_name}")
-                
-                # Same for email if missing
-                if not parsed_cv.get("email") or parsed_cv.get("email") == "Not provided":
-                    from core.ai_helpers import extract_email
-                    better_email = extract_email(extracted_text)
-                    if better_email and better_email != "Email not detected":
-                        parsed_cv["email"] = better_email
-                        print(f"Fixed email extraction: {better_email}")
+                fix_contact_details(parsed_cv, extracted_text)
                 
                 # Add workflow results to the parsed CV data
                 result = {
@@ -118,33 +196,18 @@ async def parse_cv(
                         "career_recommendations": workflow_result.get("career_recommendations"),
                         "roadmap": workflow_result.get("roadmap")
                     },
-                    "source": "langgraph"
+                    "source": "langgraph",
+                    "workflow_mode": workflow_mode
                 }
                 
-                # Save parsed CV to cache
+                # Save parsed CV and the full workflow run to cache
                 save_to_cache(cache_key, parsed_cv)
+                save_file_result(file_key, extracted_text, parsed_cv)
+                save_workflow_to_cache(extracted_text, workflow_result, fan_out)
                 
                 # Save to user profile if email provided
-                if email:
-                    from main import supabase
-                    user_result = supabase.table("profiles").select("*").eq("email", email).execute()
-                    
-                    if user_result.data and len(user_result.data) > 0:
-                        user = user_result.data[0]
-                        # Update user profile with CV data
-                        profile_data = {
-                            "name": parsed_cv.get("name", user.get("name", "")),
-                            "email": parsed_cv.get("email", email),
-                            "education": parsed_cv.get("education", ""),
-                            "experience": parsed_cv.get("work_experience", ""),
-                            "projects": parsed_cv.get("projects", ""),
-                            "skills": parsed_cv.get("skills", []),
-                            "cv_data": parsed_cv,
-                            "updated_at": "now()"
-                        }
-                        
-                        supabase.table("profiles").update({"profile_data": profile_data}).eq("id", user["id"]).execute()
-                        result["profile_updated"] = True
+                if email and update_user_profile(email, parsed_cv):
+                    result["profile_updated"] = True
                 
                 return result
                 
@@ -154,8 +217,19 @@ async def parse_cv(
                 # Fall back to basic parsing
                 print("Falling back to basic parsing...")
         
-        # If LangGraph is disabled or fails, use basic parsing
-        from core.ai_helpers import parse_cv_text
+        # If LangGraph is disabled or fails, use a cached parse or basic parsing
+        cached_result = get_from_cache(cache_key)
+        
+        if cached_result:
+            print("Using cached CV parsing result")
+            save_file_result(file_key, extracted_text, cached_result)
+            return {
+                "status": "success",
+                "data": cached_result,
+                "source": "cache"
+            }
+        
+        from backend.core.ai_helpers import parse_cv_text
         parsed_cv = await parse_cv_text(extracted_text)
         
         # Handle different response formats
@@ -163,6 +237,7 @@ async def parse_cv(
             print(f"Using fallback data due to API error: {parsed_cv['api_error']}")
             result_data = parsed_cv.get("parsed_data", {})
             save_to_cache(cache_key, result_data)
+            save_file_result(file_key, extracted_text, result_data)
             return {
                 "status": "success",
                 "data": result_data,
@@ -171,18 +246,7 @@ async def parse_cv(
             }
         elif "error" in parsed_cv:
             # Use fallback methods
-            from core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
-                              extract_education, extract_experience, extract_projects, extract_interests)
-            fallback_data = {
-                "name": extract_name(extracted_text),
-                "email": extract_email(extracted_text),
-                "phone": extract_phone(extracted_text),
-                "skills": extract_skills(extracted_text),
-                "education": extract_education(extracted_text),
-                "work_experience": extract_experience(extracted_text),
-                "projects": extract_projects(extracted_text),
-                "interests": extract_interests(extracted_text)
-            }
+            fallback_data = await extraction_service.extract_profile(extracted_text)
             return {
                 "status": "partial",
                 "data": fallback_data,
@@ -191,64 +255,47 @@ async def parse_cv(
         else:
             # Successful parsing
             save_to_cache(cache_key, parsed_cv)
+            save_file_result(file_key, extracted_text, parsed_cv)
             
             # Save to user profile if email provided
-            if email:
-                from main import supabase
-                user_result = supabase.table("profiles").select("*").eq("email", email).execute()
-                
-                if user_result.data and len(user_result.data) > 0:
-                    user = user_result.data[0]
-                    # Update user profile with CV data
-                    profile_data = {
-                        "name": parsed_cv.get("name", user.get("name", "")),
-                        "email": parsed_cv.get("email", email),
-                        "education": parsed_cv.get("education", ""),
-                        "experience": parsed_cv.get("work_experience", ""),
-                        "projects": parsed_cv.get("projects", ""),
-                        "skills": parsed_cv.get("skills", []),
-                        "cv_data": parsed_cv,
-                        "updated_at": "now()"
-                    }
-                    
-                    supabase.table("profiles").update({"profile_data": profile_data}).eq("id", user["id"]).execute()
-                    return {
-                        "status": "success",
-                        "data": parsed_cv,
-                        "source": "basic_ai",
-                        "profile_updated": True
-                    }
+            if email and update_user_profile(email, parsed_cv):
+                return {
+                    "status": "success",
+                    "data": parsed_cv,
+                    "source": "basic_ai",
+                    "profile_updated": True
+                }
             
             return {
                 "status": "success",
                 "data": parsed_cv,
                 "source": "basic_ai"
             }
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.detail)
+    except ExtractionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Error processing CV: {e}")
         traceback.print_exc()
         # Instead of failing, return a fallback response
         try:
             # Still try to extract basic info
-            from core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
-                              extract_education, extract_experience, extract_projects, extract_interests)
-            
-            fallback_data = {
-                "name": extract_name(extracted_text if 'extracted_text' in locals() else ""),
-                "email": extract_email(extracted_text if 'extracted_text' in locals() else ""),
-                "phone": extract_phone(extracted_text if 'extracted_text' in locals() else ""),
-                "skills": extract_skills(extracted_text if 'extracted_text' in locals() else ""),
-                "education": extract_education(extracted_text if 'extracted_text' in locals() else ""),
-                "work_experience": extract_experience(extracted_text if 'extracted_text' in locals() else ""),
-                "projects": extract_projects(extracted_text if 'extracted_text' in locals() else ""),
-                "interests": extract_interests(extracted_text if 'extracted_text' in locals() else "")
-            }
+            fallback_data = await extraction_service.extract_profile(
+                extracted_text if 'extracted_text' in locals() else ""
+            )
             
             return {
                 "status": "error_with_fallback",
                 "data": fallback_data,
                 "error": str(e)
             }
+        except ExtractionQueueFull as fallback_error:
+            raise HTTPException(status_code=503, detail=str(fallback_error), headers={"Retry-After": "5"})
+        except ExtractionTimeout as fallback_error:
+            raise HTTPException(status_code=504, detail=str(fallback_error))
         except Exception as fallback_error:
             # If even fallback fails, return the error
             raise HTTPException(
@@ -256,6 +303,168 @@ async def parse_cv(
                 detail=f"Failed to process CV: {str(e)}. Fallback extraction also failed: {str(fallback_error)}"
             )
 
+@router.post("/api/cv/parse/stream")
+async def parse_cv_stream(
+    file: UploadFile = File(...),
+    email: Optional[str] = Query(None, description="User email for persistence"),
+    fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
+):
+    """
+    Parse a CV with the LangGraph workflow, streaming progress as server-sent events.
+    
+    Each node's WorkflowState delta is sent as soon as the node completes, as an event
+    named after the node: parse_cv (parsed_profile), analyze_skills (skills_analysis),
+    recommend_careers (career_recommendations) and roadmap_generation (roadmap). The
+    stream ends with a "done" event holding status, source and workflow_mode, or an
+    "error" event. Cached runs are replayed as the same events.
+    
+    Parameters:
+    - file: The CV file (PDF or DOCX) to parse
+    - email: Optional user email for saving results to profile
+    - fan_out: Whether to run the fan-out workflow (defaults to WORKFLOW_FAN_OUT)
+    """
+    # Validate file type
+    if not file.filename.lower().endswith(('.pdf', '.docx')):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+    
+    # Text extraction happens before the stream starts, so its errors keep their status codes
+    try:
+        file_key, extracted_text = await read_cv_text(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.detail)
+    except ExtractionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    
+    fan_out = resolve_fan_out(fan_out)
+    workflow_mode = "fan_out" if fan_out else "sequential"
+    
+    async def events():
+        if not extracted_text or len(extracted_text) < 50:
+            print("Insufficient text extracted")
+            yield "done", insufficient_text_result(extracted_text)
+            return
+        
+        cached_workflow = get_workflow_from_cache(extracted_text, fan_out)
+        if cached_workflow:
+            print("Replaying cached LangGraph workflow result")
+            for node, delta in replay_workflow_state(cached_workflow):
+                yield node, delta
+            yield "done", {
+                "status": "success",
+                "source": "cache",
+                "cache_schema_version": WORKFLOW_CACHE_VERSION,
+                "workflow_mode": workflow_mode
+            }
+            return
+        
+        print(f"Streaming LangGraph workflow for email: {email}")
+        workflow_result = {}
+        try:
+            async for node, delta in stream_workflow_with_cv(extracted_text, fan_out):
+                if delta.get("parsed_profile"):
+                    fix_contact_details(delta["parsed_profile"], extracted_text)
+                workflow_result = apply_workflow_update(workflow_result, delta)
+                yield node, delta
+        except Exception as workflow_error:
+            print(f"LangGraph workflow error: {workflow_error}")
+            traceback.print_exc()
+            yield "error", {"status": "error", "error": str(workflow_error)}
+            return
+        
+        if workflow_result.get("error"):
+            print(f"Error in LangGraph workflow: {workflow_result['error']}")
+            yield "error", {"status": "error", "error": workflow_result["error"]}
+            return
+        
+        # Save parsed CV and the full workflow run to cache
+        parsed_cv = workflow_result.get("parsed_profile", {})
+        save_to_cache(get_cache_key(extracted_text), parsed_cv)
+        save_file_result(file_key, extracted_text, parsed_cv)
+        save_workflow_to_cache(extracted_text, {**workflow_result, "raw_cv": extracted_text}, fan_out)
+        
+        done = {"status": "success", "source": "langgraph", "workflow_mode": workflow_mode}
+        if email and update_user_profile(email, parsed_cv):
+            done["profile_updated"] = True
+        yield "done", done
+    
+    return sse_response(events())
+
+async def run_cv_job(payload):
+    """Parse the spooled upload of a queued CV job exactly like /api/cv/parse."""
+    # Queue the job's Gemini calls under the user who submitted it
+    set_llm_user(payload.get("user"))
+    with open(payload["path"], "rb") as f:
+        upload = UploadFile(file=f, filename=payload["filename"])
+        try:
+            return await parse_cv(upload, email=payload["email"], use_langgraph=payload["use_langgraph"],
+                                  fan_out=payload["fan_out"])
+        except HTTPException as e:
+            raise Exception(e.detail) from e
+
+def remove_cv_job_upload(payload):
+    """Remove the spooled upload of a finished CV job."""
+    if os.path.exists(payload["path"]):
+        os.unlink(payload["path"])
+
+# CV parses run by background workers; started and stopped by the app lifespan
+cv_jobs = JobQueue("cv", run_cv_job, cleanup=remove_cv_job_upload)
+
+@router.post("/api/cv/jobs", status_code=202)
+async def submit_cv_job(
+    response: Response,
+    file: UploadFile = File(...),
+    email: Optional[str] = Query(None, description="User email for persistence"),
+    use_langgraph: bool = Query(True, description="Whether to use LangGraph workflow for enhanced processing"),
+    fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
+):
+    """
+    Queue a CV for parsing and return immediately with a job id.
+    
+    The upload is stored and parsed by a background worker exactly like /api/cv/parse.
+    Poll GET /api/cv/jobs/{job_id} (also given in the Location header) for the result.
+    Returns 503 with Retry-After when too many jobs are already waiting.
+    """
+    # Validate file type
+    if not file.filename.lower().endswith(('.pdf', '.docx')):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+    
+    try:
+        path = await spool_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.detail)
+    
+    try:
+        job = cv_jobs.submit({
+            "path": path,
+            "filename": file.filename,
+            "email": email,
+            "use_langgraph": use_langgraph,
+            "fan_out": fan_out,
+            "user": current_llm_user.get()
+        })
+    except JobQueueFull as e:
+        os.unlink(path)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    
+    status_url = f"/api/cv/jobs/{job['id']}"
+    response.headers["Location"] = status_url
+    return {"job_id": job["id"], "status": job["status"], "status_url": status_url}
+
+@router.get("/api/cv/jobs/{job_id}")
+async def get_cv_job(job_id: str):
+    """
+    Return the status of a CV job: queued, running, succeeded or failed.
+    
+    Succeeded jobs include the /api/cv/parse response as result; failed jobs include error.
+    Finished jobs are kept for JOB_RETENTION seconds.
+    """
+    job = cv_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 def add_cv_routes(app):
     """Add CV parsing routes to the main FastAPI app."""
     app.include_router(router)
\ No newline at end of file
@@ -4,7 +4,7 @@ Recommendation API routes for Career Path Finder
 This module handles all job and career recommendation endpoints.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
@@ -13,8 +13,11 @@ from backend.core.job_recommendation import get_job_recommendations
 from backend.core.career_path_progression import get_career_path_recommendations
 from backend.core.skills_gap_analysis import analyze_skills_gap
 
+from backend.core.sse import sse_response
+
 # Import LangGraph workflow
-from backend.workflows.langgraph_workflow import run_workflow_with_cv, run_workflow_with_profile
+from backend.workflows.langgraph_workflow import (run_workflow_with_cv, run_workflow_with_profile,
+                                                  stream_workflow_with_profile, apply_workflow_update, resolve_fan_out)
 
 # Define the recommendation router
 recommendation_router = APIRouter()
@@ -25,20 +28,44 @@ class RecommendationRequest(BaseModel):
     limit: Optional[int] = 10
     filters: Optional[Dict[str, Any]] = {}
 
+def store_roadmap(user_id, roadmap_data):
+    """Insert or update the stored roadmap of a user."""
+    from backend.main import supabase
+    
+    # Check if user already has a roadmap
+    existing_roadmap = supabase.table("roadmaps").select("*").eq("user_id", user_id).execute()
+    
+    if existing_roadmap.data and len(existing_roadmap.data) > 0:
+        # Update existing roadmap
+        supabase.table("roadmaps").update({
+            "roadmap_data": roadmap_data,
+            "updated_at": "now()"
+        }).eq("user_id", user_id).execute()
+    else:
+        # Insert new roadmap
+        supabase.table("roadmaps").insert({
+            "user_id": user_id,
+            "roadmap_data": roadmap_data
+        }).execute()
+
 # Add routes to FastAPI app
 def add_recommendation_routes(app):
     """Add recommendation routes to the main FastAPI app"""
     
     @app.post("/api/roadmap/generate")
-    async def generate_roadmap(profile_data: Dict[str, Any]):
+    async def generate_roadmap(
+        profile_data: Dict[str, Any],
+        fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
+    ):
         """
         Generate a comprehensive career roadmap using LangGraph workflow.
         Takes profile data and returns a detailed roadmap with skills analysis,
-        career recommendations, and learning plan.
+        career recommendations, and learning plan. fan_out selects the workflow mode,
+        so both can be compared on the same profiles.
         """
         try:
             # Run the LangGraph workflow with profile data
-            result = await run_workflow_with_profile(profile_data)
+            result = await run_workflow_with_profile(profile_data, fan_out)
             
             if "error" in result and result["error"]:
                 return {"status": "error", "message": result["error"]}
@@ -46,24 +73,7 @@ def add_recommendation_routes(app):
             # Store results in database if user_id is provided
             user_id = profile_data.get("user_id")
             if user_id:
-                from main import supabase
-                roadmap_data = result.get("roadmap", {})
-                
-                # Check if user already has a roadmap
-                existing_roadmap = supabase.table("roadmaps").select("*").eq("user_id", user_id).execute()
-                
-                if existing_roadmap.data and len(existing_roadmap.data) > 0:
-                    # Update existing roadmap
-                    supabase.table("roadmaps").update({
-                        "roadmap_data": roadmap_data,
-                        "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
-                else:
-                    # Insert new roadmap
-                    supabase.table("roadmaps").insert({
-                        "user_id": user_id,
-                        "roadmap_data": roadmap_data
-                    }).execute()
+                store_roadmap(user_id, result.get("roadmap", {}))
             
             return {
                 "status": "success",
@@ -76,12 +86,47 @@ def add_recommendation_routes(app):
             print(f"Error generating roadmap: {e}")
             return {"status": "error", "message": str(e)}
     
+    @app.post("/api/roadmap/generate/stream")
+    async def generate_roadmap_stream(
+        profile_data: Dict[str, Any],
+        fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
+    ):
+        """
+        Generate a career roadmap like /api/roadmap/generate, streaming progress as server-sent events.
+        Each node's WorkflowState delta is sent as an event named after the node as soon as it
+        completes, followed by a "done" event, or an "error" event with the message.
+        """
+        workflow_mode = "fan_out" if resolve_fan_out(fan_out) else "sequential"
+        
+        async def events():
+            result = {}
+            try:
+                async for node, delta in stream_workflow_with_profile(profile_data, fan_out):
+                    result = apply_workflow_update(result, delta)
+                    yield node, delta
+                
+                if result.get("error"):
+                    yield "error", {"status": "error", "message": result["error"]}
+                    return
+                
+                # Store results in database if user_id is provided
+                user_id = profile_data.get("user_id")
+                if user_id:
+                    store_roadmap(user_id, result.get("roadmap", {}))
+                
+                yield "done", {"status": "success", "workflow_mode": workflow_mode}
+            except Exception as e:
+                print(f"Error generating roadmap: {e}")
+                yield "error", {"status": "error", "message": str(e)}
+        
+        return sse_response(events())
+    
     @app.get("/api/recommendations/jobs")
     async def get_jobs(email: str, limit: int = 10):
         """Get job recommendations for a user"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
@@ -101,7 +146,7 @@ def add_recommendation_routes(app):
         """Get career path recommendations for a user"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
@@ -121,7 +166,7 @@ def add_recommendation_routes(app):
         """Get skills gap analysis for a user and optional job"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
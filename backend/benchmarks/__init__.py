@@ -0,0 +1,7 @@
+"""
+Benchmark package for Career Path Finder application.
+
+This package contains micro-benchmarks and a synthetic CV corpus used to measure
+the performance of the CV processing pipeline. Run modules from the repository
+root, e.g. ``python -m backend.benchmarks.extract_name_benchmark``.
+"""
@@ -0,0 +1,91 @@
+"""
+Benchmark for the on-disk CV cache format.
+
+Writes and reads a set of realistic cache entries (extracted CV text plus the
+fallback parse result) in the legacy flat JSON layout and in the sharded
+zstd/orjson layout of cache_utils, and reports throughput and bytes on disk.
+The in-memory tier is disabled so every read hits the filesystem.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.cache_benchmark [--entries N]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import backend.core.cache_utils as cache_utils
+from backend.core.extraction_service import extract_fallback_profile
+from backend.benchmarks.corpus import generate_cv
+
+
+def make_entries(count: int):
+    """Build count cache entries shaped like the file cache entries."""
+    entries = {}
+    for i in range(count):
+        cv_text = generate_cv(size=1 + i % 16, seed=i)
+        entries[f"{i:032x}"] = {"text": cv_text, "result": extract_fallback_profile(cv_text)}
+    return entries
+
+
+def legacy_write(key, data):
+    with open(os.path.join(cache_utils.CACHE_DIR, f"{key}.json"), 'w') as f:
+        json.dump(data, f)
+
+
+def legacy_read(key):
+    with open(os.path.join(cache_utils.CACHE_DIR, f"{key}.json"), 'r') as f:
+        return json.load(f)
+
+
+def disk_usage(path):
+    """Return (apparent bytes, allocated bytes) of all files under path."""
+    apparent = allocated = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            stat = os.stat(os.path.join(root, name))
+            apparent += stat.st_size
+            allocated += stat.st_blocks * 512
+    return apparent, allocated
+
+
+def measure(name, write, read, entries):
+    """Time writing and reading every entry into a fresh cache directory."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_utils.CACHE_DIR = cache_dir
+        cache_utils.ready_shards.clear()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        start = time.perf_counter()
+        for key, data in entries.items():
+            write(key, data)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key, data in entries.items():
+            assert read(key) == data
+        read_seconds = time.perf_counter() - start
+
+        apparent, allocated = disk_usage(cache_dir)
+    count = len(entries)
+    print(f"{name:<8} {count / write_seconds:>10.0f} {count / read_seconds:>10.0f} "
+          f"{apparent / 1024:>12.1f} {allocated / 1024:>13.1f}")
+
+
+def run(count: int = 2000):
+    """Compare the legacy and sharded cache formats."""
+    entries = make_entries(count)
+    cache_utils.MEMORY_CACHE_MAX_ENTRIES = 0
+    raw = sum(len(json.dumps(data)) for data in entries.values())
+    print(f"{count} entries, {raw / 1024:.1f} KB of JSON")
+    print(f"{'format':<8} {'writes/s':>10} {'reads/s':>10} {'KB on disk':>12} {'KB allocated':>13}")
+    measure("legacy", legacy_write, legacy_read, entries)
+    measure("sharded", cache_utils.save_to_cache, cache_utils.get_from_cache, entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000, help="Number of cache entries")
+    run(parser.parse_args().entries)
@@ -0,0 +1,134 @@
+"""
+Synthetic CV corpus for benchmarks.
+
+Generates deterministic plain-text CVs of varying size with the section layout
+the fallback extractors expect (name/contact header, experience, education,
+skills, projects, interests), and can render them as simple PDF and DOCX files.
+"""
+
+import io
+import random
+from typing import List
+
+import docx
+
+FIRST_NAMES = ["Jane", "John", "Aisha", "Carlos", "Mei", "Olu", "Priya", "Lukas", "Sara", "Tom"]
+LAST_NAMES = ["Doe", "Smith", "Khan", "Garcia", "Chen", "Adeyemi", "Patel", "Muller", "Rossi", "Brown"]
+ROLES = ["Software Engineer", "Senior Developer", "Data Analyst", "Product Manager", "DevOps Engineer",
+         "Frontend Developer", "Machine Learning Engineer", "QA Specialist"]
+COMPANIES = ["Acme Corp", "Globex Inc.", "Initech LLC", "Umbrella Ltd", "Hooli", "Stark Industries"]
+SKILLS = ["Python", "JavaScript", "TypeScript", "React", "Node.js", "Django", "Flask", "FastAPI", "SQL",
+          "PostgreSQL", "MongoDB", "Docker", "Kubernetes", "AWS", "Azure", "Git", "CI/CD", "Terraform",
+          "Machine Learning", "Pandas", "NumPy", "TensorFlow", "Agile", "Scrum", "Communication",
+          "Leadership", "Problem Solving", "Java", "C++", "Go", "REST APIs", "GraphQL"]
+UNIVERSITIES = ["University of Leeds", "Imperial College London", "MIT", "Stanford University",
+                "National Institute of Technology"]
+DEGREES = ["BSc in Computer Science", "MSc in Data Science", "Bachelor of Engineering in Software",
+           "Master of Business Administration", "PhD in Machine Learning"]
+INTERESTS = ["reading", "hiking", "photography", "chess", "music", "travel", "cooking", "open source"]
+DUTIES = [
+    "Built microservices with {a} and {b} serving millions of requests per day.",
+    "Led a team of {n} engineers delivering features in an agile environment.",
+    "Designed and implemented a data pipeline using {a} and {b}.",
+    "Migrated legacy systems to {a} on {b}, reducing costs by {n}0%.",
+    "Developed a web application using {a} and {b} for internal reporting.",
+]
+
+
+def generate_cv(size: int = 1, seed: int = 0) -> str:
+    """
+    Generate a synthetic CV.
+
+    Args:
+        size: Scale factor; roughly the number of jobs and projects in the CV
+        seed: Random seed so that the same arguments always give the same CV
+
+    Returns:
+        The CV as plain text
+    """
+    rng = random.Random(seed * 1000 + size)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "Summary:",
+        f"{rng.choice(ROLES)} with {size + 2} years of experience building software products.",
+        "",
+        "Experience:",
+    ]
+    for job in range(max(size, 1)):
+        start = 2024 - 2 * (job + 1)
+        lines.append(f"{start} - {start + 2} {rng.choice(ROLES)} at {rng.choice(COMPANIES)}")
+        for _ in range(rng.randint(2, 4)):
+            lines.append("• " + rng.choice(DUTIES).format(a=rng.choice(SKILLS), b=rng.choice(SKILLS), n=rng.randint(2, 9)))
+    lines += ["", "Education:"]
+    for _ in range(rng.randint(1, 2)):
+        lines.append(f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)}, {rng.randint(2000, 2020)}")
+    lines += ["", "Skills:", ", ".join(rng.sample(SKILLS, min(len(SKILLS), 8 + size))), "", "Projects:"]
+    for project in range(max(size // 2, 1)):
+        lines.append(f"• Project {project + 1} Dashboard Platform")
+        lines.append(f"Developed a web application using {rng.choice(SKILLS)} and React. Technologies: {rng.choice(SKILLS)}, Flask")
+    lines += ["", "Interests:", ", ".join(rng.sample(INTERESTS, 3)), ""]
+    return "\n".join(lines)
+
+
+def generate_pdf(text: str, lines_per_page: int = 50) -> bytes:
+    """
+    Render plain text as a minimal PDF (Helvetica, one text line per line of input).
+
+    Args:
+        text: The text to render, e.g. from generate_cv
+        lines_per_page: Number of lines placed on each page
+
+    Returns:
+        The PDF file contents
+    """
+    lines = text.encode("latin-1", "replace").decode("latin-1").split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+    ]
+    for i, page_lines in enumerate(pages):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines)
+        stream = "BT /F1 10 Tf 50 770 Td 14 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(pdf)
+
+
+def generate_docx(text: str) -> bytes:
+    """
+    Render plain text as a DOCX document with one paragraph per line of input.
+
+    Args:
+        text: The text to render, e.g. from generate_cv
+
+    Returns:
+        The DOCX file contents
+    """
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_corpus(sizes: List[int] = (1, 4, 16, 64), per_size: int = 5) -> List[str]:
+    """Generate a corpus of synthetic CVs with per_size CVs for each size."""
+    return [generate_cv(size, seed) for size in sizes for seed in range(per_size)]
@@ -0,0 +1,38 @@
+"""
+Micro-benchmark for extract_name.
+
+Reports the per-call time of extract_name over a corpus of synthetic CVs.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.extract_name_benchmark [--repeat N]
+"""
+
+import argparse
+import statistics
+import time
+
+from backend.core.ai_helpers import extract_name
+from backend.benchmarks.corpus import generate_corpus
+
+
+def run(repeat: int = 200):
+    """Time extract_name over the corpus and print per-call statistics."""
+    corpus = generate_corpus()
+    timings = []
+    for _ in range(repeat):
+        for cv_text in corpus:
+            start = time.perf_counter()
+            extract_name(cv_text)
+            timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"extract_name over {len(corpus)} CVs x {repeat} repeats")
+    print(f"  mean:   {statistics.mean(timings) * 1e6:8.1f} us/call")
+    print(f"  median: {statistics.median(timings) * 1e6:8.1f} us/call")
+    print(f"  p95:    {timings[int(len(timings) * 0.95)] * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Number of passes over the corpus")
+    run(parser.parse_args().repeat)
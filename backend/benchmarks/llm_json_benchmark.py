@@ -0,0 +1,152 @@
+"""
+Fuzz test and benchmark for llm_json.extract_json.
+
+Fuzzing: random JSON objects and arrays (with braces, brackets, quotes and
+escapes inside strings) are wrapped the way Gemini wraps them: code fences with
+and without a language tag, unclosed fences, and prose before and after that
+itself contains brackets, quotes and apostrophes. extract_json must return the
+original value for every case. The regex clean-up it replaced is run on the
+same cases for comparison.
+
+Benchmark: per-call time of both on typical responses, and on responses with a
+long string value, where the regex clean-up takes quadratic time.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.llm_json_benchmark [--cases N] [--seed S]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from backend.core.llm_json import extract_json, LLMJSONError
+
+STRING_PIECES = ["Python", "data", " ", "{", "}", "[", "]", '"', "\\", "\n", "é", "```", "don't", ":", ","]
+PROSE = [
+    "Here is the JSON you asked for:",
+    "Sure! Below is the analysis [based on the CV].",
+    "I've included the fields {name, skills} as requested.",
+    'Note: "years" are approximate.',
+    "Let me know if you'd like any changes :)",
+    "The closing } is intentional.",
+    "Result (see [note):",
+    "The list [of skills is",
+    'Text "quoted [" then',
+    "",
+]
+
+
+def random_string(rng):
+    return "".join(rng.choice(STRING_PIECES) for _ in range(rng.randint(0, 8)))
+
+
+def random_value(rng, depth=0):
+    kind = rng.randint(0, 9) if depth < 4 else rng.randint(0, 4)
+    if kind == 0:
+        return rng.randint(-10 ** 6, 10 ** 6)
+    if kind == 1:
+        return round(rng.uniform(-100, 100), 3)
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind <= 4:
+        return random_string(rng)
+    if kind <= 7:
+        return {random_string(rng): random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+
+
+def wrap(rng, value):
+    """Embed the JSON of value in a response the way an LLM might."""
+    body = json.dumps(value, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+    before, after = rng.choice(PROSE), rng.choice(PROSE)
+    style = rng.randint(0, 4)
+    if style == 0:
+        return body
+    if style == 1:
+        return f"```json\n{body}\n```"
+    if style == 2:
+        return f"{before}\n```\n{body}\n```\n{after}"
+    if style == 3:
+        return f"{before}\n```json\n{body}"
+    return f"{before} {body} {after}"
+
+
+def legacy_extract(text):
+    """The clean-up previously copied into every call site."""
+    json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
+    json_str = json_match.group(1) if json_match else text
+    json_str = re.sub(r'^[^{]*', '', json_str)
+    json_str = re.sub(r'[^}]*$', '', json_str)
+    return json.loads(json_str)
+
+
+def fuzz(cases, seed):
+    """Check extract_json on random responses; return the number of failures."""
+    rng = random.Random(seed)
+    failures = legacy_ok = 0
+    for case in range(cases):
+        value = random_value(rng)
+        while not isinstance(value, (dict, list)):
+            value = random_value(rng)
+        text = wrap(rng, value)
+        try:
+            result = extract_json(text)
+        except LLMJSONError as e:
+            result = e
+        if result != value:
+            failures += 1
+            if failures <= 5:
+                print(f"  case {case}: expected {value!r}\n    got {result!r}\n    from {text!r}")
+        try:
+            legacy_ok += legacy_extract(text) == value
+        except ValueError:
+            pass
+    print(f"fuzz: {cases} cases, extract_json failed {failures}, regex clean-up recovered {legacy_ok}")
+    return failures
+
+
+def time_call(function, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            function(text)
+        except ValueError:
+            pass
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(seed):
+    rng = random.Random(seed)
+    profile = {
+        "name": "Jane Doe",
+        "skills": ["Python", "SQL", "Docker"] * 10,
+        "work_experience": [{"company": f"Company {i}", "description": random_string(rng) * 20} for i in range(10)],
+    }
+    cases = [
+        ("typical fenced", f"Here you go:\n```json\n{json.dumps(profile, indent=2)}\n```\n", 2000),
+        ("typical prose", f"Sure! {json.dumps(profile)} Hope this helps.", 2000),
+    ]
+    for size in (1000, 10000, 30000):
+        cases.append((f"{size // 1000}k-char string", json.dumps({"summary": "a" * size}), 1))
+    print(f"{'response':<18} {'chars':>7} {'extract_json':>14} {'regex clean-up':>15}")
+    for name, text, repeat in cases:
+        new = time_call(extract_json, text, repeat)
+        old = time_call(legacy_extract, text, repeat)
+        print(f"{name:<18} {len(text):>7} {new * 1e6:>11.1f} us {old * 1e6:>12.1f} us")
+
+
+def run(cases=20000, seed=0):
+    failures = fuzz(cases, seed)
+    benchmark(seed)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=20000, help="Number of fuzz cases")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    sys.exit(1 if run(args.cases, args.seed) else 0)
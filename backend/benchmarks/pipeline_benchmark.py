@@ -0,0 +1,280 @@
+"""
+End-to-end benchmark of the CV pipeline.
+
+Drives a corpus of generated PDF and DOCX CVs of several sizes through each
+stage of the chain an upload goes through:
+
+    extract_text      extract_text_from_file on the uploaded file
+    cache_key         get_cache_key of the extracted text
+    fallback_extract  extract_fallback_profile (the rule-based extract_* parsers)
+    parse_cv_text     ai_helpers.parse_cv_text
+    workflow          run_workflow_with_cv
+
+and reports p50/p95/p99 latency, throughput and peak memory per stage. LLM
+calls are answered by the fake provider (LLM_PROVIDER=fake, see
+core.fake_llm), whose latency and error rate follow FAKE_LLM_LATENCY and
+FAKE_LLM_ERROR_RATE; the admission rate limit is off. Each pass starts with an
+empty cache in a temporary directory.
+
+Latency is measured in one pass and peak memory (Python heap of this process,
+via tracemalloc) in a second, as tracing slows everything down. PDF text is
+extracted in worker processes, whose heap is not traced; their peak RSS is
+reported separately.
+
+With --baseline, the results are compared with an earlier --output file and
+the exit status is 1 if any stage's p50, p95 or peak memory grew by more than
+--threshold.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.pipeline_benchmark [--sizes 1 4 16] [--per-size N] [--formats pdf docx]
+        [--concurrency N] [--output results.json] [--baseline results.json --threshold 0.25]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+import orjson
+
+# Settings read when the core modules are imported
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "fixed:0.05")
+os.environ.setdefault("LLM_RATE_LIMIT", "0")
+
+from starlette.datastructures import UploadFile  # noqa: E402
+
+# Keep the start-up messages of the core modules out of --output - JSON
+with contextlib.redirect_stdout(sys.stderr):
+    import backend.core.cache_utils as cache_utils  # noqa: E402
+    from backend.core.ai_helpers import parse_cv_text  # noqa: E402
+    from backend.core.cache_utils import get_cache_key  # noqa: E402
+    from backend.core.extraction_service import extract_fallback_profile, extraction_service  # noqa: E402
+    from backend.core.file_processing import extract_text_from_file  # noqa: E402
+    from backend.workflows.langgraph_workflow import run_workflow_with_cv  # noqa: E402
+    from backend.benchmarks.corpus import generate_cv, generate_docx, generate_pdf  # noqa: E402
+
+# Metrics compared in --baseline mode
+REGRESSION_METRICS = ("p50_ms", "p95_ms", "peak_memory_kb")
+
+
+def make_upload(content: bytes, filename: str) -> UploadFile:
+    """Wrap content the way Starlette hands a multipart file to a handler."""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spool.write(content)
+    spool.seek(0)
+    return UploadFile(spool, filename=filename, size=len(content))
+
+
+def make_documents(sizes: List[int], per_size: int, formats: List[str]) -> List[Dict[str, Any]]:
+    """Generate per_size distinct CVs for every size and format."""
+    render = {"pdf": generate_pdf, "docx": generate_docx}
+    documents = []
+    for size in sizes:
+        for seed in range(per_size):
+            for file_format in formats:
+                # Distinct seeds per format, so no two documents share a cache entry
+                cv_text = generate_cv(size, seed * len(formats) + formats.index(file_format))
+                documents.append({"name": f"cv-{size}-{seed}.{file_format}", "content": render[file_format](cv_text)})
+    return documents
+
+
+async def stage_extract_text(document):
+    document["text"] = await extract_text_from_file(make_upload(document["content"], document["name"]))
+
+
+async def stage_cache_key(document):
+    get_cache_key(document["text"])
+
+
+async def stage_fallback_extract(document):
+    extract_fallback_profile(document["text"])
+
+
+async def stage_parse_cv_text(document):
+    await parse_cv_text(document["text"])
+
+
+async def stage_workflow(document):
+    await run_workflow_with_cv(document["text"])
+
+
+# Stages in pipeline order; each one uses the text extracted by the first
+STAGES: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    "extract_text": stage_extract_text,
+    "cache_key": stage_cache_key,
+    "fallback_extract": stage_fallback_extract,
+    "parse_cv_text": stage_parse_cv_text,
+    "workflow": stage_workflow,
+}
+
+
+def reset_cache(cache_dir: str):
+    """Point the file cache at an empty directory and clear its memory tier."""
+    cache_utils.CACHE_DIR = cache_dir
+    cache_utils.ready_shards.clear()
+    with cache_utils.memory_cache_lock:
+        cache_utils.memory_cache.clear()
+        cache_utils.memory_cache_bytes = 0
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(max(math.ceil(fraction * len(sorted_values)) - 1, 0), len(sorted_values) - 1)]
+
+
+async def run_stage(stage, documents, concurrency: int) -> Dict[str, Any]:
+    """Run stage over every document, concurrency at a time; return per-call latencies and the wall time."""
+    latencies = []
+
+    async def timed(document):
+        start = time.perf_counter()
+        await stage(document)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(documents), concurrency):
+        await asyncio.gather(*(timed(document) for document in documents[i:i + concurrency]))
+    return {"latencies": latencies, "seconds": time.perf_counter() - start}
+
+
+async def timing_pass(documents, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        reset_cache(cache_dir)
+        for name, stage in STAGES.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = await run_stage(stage, documents, concurrency)
+            latencies = sorted(run["latencies"])
+            results[name] = {
+                "count": len(latencies),
+                "p50_ms": percentile(latencies, 0.50) * 1e3,
+                "p95_ms": percentile(latencies, 0.95) * 1e3,
+                "p99_ms": percentile(latencies, 0.99) * 1e3,
+                "mean_ms": sum(latencies) / len(latencies) * 1e3 if latencies else 0.0,
+                "throughput_per_s": len(latencies) / run["seconds"] if run["seconds"] else 0.0,
+            }
+    return results
+
+
+async def memory_pass(documents, concurrency: int) -> Dict[str, float]:
+    """Return the peak traced heap (KB) of every stage, run on a fresh cache."""
+    peaks = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        reset_cache(cache_dir)
+        for name, stage in STAGES.items():
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                await run_stage(stage, documents, concurrency)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks[name] = peak / 1024
+    return peaks
+
+
+async def benchmark(sizes, per_size, formats, concurrency) -> Dict[str, Any]:
+    documents = make_documents(sizes, per_size, formats)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await extraction_service.warm_up()
+    try:
+        stages = await timing_pass(documents, concurrency)
+        for name, peak in (await memory_pass(documents, concurrency)).items():
+            stages[name]["peak_memory_kb"] = peak
+    finally:
+        extraction_service.shutdown(wait=True)
+    return {
+        "config": {
+            "sizes": sizes,
+            "per_size": per_size,
+            "formats": formats,
+            "documents": len(documents),
+            "corpus_kb": sum(len(document["content"]) for document in documents) / 1024,
+            "concurrency": concurrency,
+            "llm_provider": os.environ["LLM_PROVIDER"],
+            "fake_llm_latency": os.environ.get("FAKE_LLM_LATENCY"),
+            "python": platform.python_version(),
+        },
+        "stages": stages,
+        "peak_rss_mb": {
+            "server": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        },
+    }
+
+
+def find_regressions(results, baseline, threshold: float, slack_ms: float) -> List[str]:
+    """Return a description of every metric that is more than threshold worse than in baseline."""
+    regressions = []
+    for name, stage in results["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before:
+            continue
+        for metric in REGRESSION_METRICS:
+            if metric not in stage or metric not in before:
+                continue
+            # Latencies of fast stages are noisy, so they also get an absolute allowance
+            allowed = before[metric] * (1 + threshold) + (slack_ms if metric.endswith("_ms") else 0)
+            if stage[metric] > allowed:
+                regressions.append(f"{name} {metric}: {before[metric]:.2f} -> {stage[metric]:.2f} "
+                                   f"(+{(stage[metric] / before[metric] - 1) * 100 if before[metric] else math.inf:.0f}%)")
+    return regressions
+
+
+def print_report(results):
+    config = results["config"]
+    print(f"{config['documents']} documents ({', '.join(config['formats'])}; sizes {config['sizes']}), "
+          f"{config['corpus_kb']:.0f} KB, concurrency {config['concurrency']}, "
+          f"LLM {config['llm_provider']} ({config['fake_llm_latency']})")
+    print(f"{'stage':<17} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'peak KB':>10}")
+    for name, stage in results["stages"].items():
+        print(f"{name:<17} {stage['p50_ms']:>9.2f} {stage['p95_ms']:>9.2f} {stage['p99_ms']:>9.2f} "
+              f"{stage['throughput_per_s']:>9.1f} {stage.get('peak_memory_kb', 0):>10.1f}")
+    rss = results["peak_rss_mb"]
+    print(f"peak RSS: server {rss['server']:.1f} MB, largest worker {rss['workers']:.1f} MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16], help="CV sizes passed to generate_cv")
+    parser.add_argument("--per-size", type=int, default=10, help="Documents per size and format")
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "docx"], default=["pdf", "docx"], help="File formats")
+    parser.add_argument("--concurrency", type=int, default=1, help="Documents processed at once in each stage")
+    parser.add_argument("--output", help="Write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative growth of each metric")
+    parser.add_argument("--slack-ms", type=float, default=1.0, help="Allowed absolute growth of each latency")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.sizes, args.per_size, args.formats, max(args.concurrency, 1)))
+    if args.output == "-":
+        sys.stdout.buffer.write(orjson.dumps(results, option=orjson.OPT_INDENT_2) + b"\n")
+    else:
+        print_report(results)
+        if args.output:
+            with open(args.output, "wb") as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+    if args.baseline:
+        with open(args.baseline, "rb") as f:
+            regressions = find_regressions(results, orjson.loads(f.read()), args.threshold, args.slack_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
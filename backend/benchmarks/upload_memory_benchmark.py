@@ -0,0 +1,72 @@
+"""
+Memory benchmark for CV upload ingestion.
+
+Feeds synthetic PDF uploads of increasing size through extract_text_from_file,
+one at a time and concurrently, and reports the peak Python heap of the request
+path (tracemalloc) next to the upload size, plus the peak RSS of the server and
+worker processes.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.upload_memory_benchmark [--sizes 4 32 128] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from starlette.datastructures import UploadFile
+
+from backend.core.file_processing import extract_text_from_file
+from backend.core.extraction_service import extraction_service
+from backend.benchmarks.corpus import generate_cv, generate_pdf
+
+
+def make_upload(content: bytes, filename: str) -> UploadFile:
+    """Wrap content the way Starlette hands a multipart file to a handler."""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spool.write(content)
+    spool.seek(0)
+    return UploadFile(spool, filename=filename, size=len(content))
+
+
+async def measure(content: bytes, concurrency: int):
+    """Return (seconds, peak traced bytes) for concurrency simultaneous uploads of content."""
+    uploads = [make_upload(content, "cv.pdf") for _ in range(concurrency)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*[extract_text_from_file(upload) for upload in uploads])
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def run(sizes=(4, 32, 128), concurrency: int = 4):
+    """Measure peak memory per upload for each CV size and print a table."""
+    await extraction_service.warm_up()
+    print(f"{'size':>6} {'pdf KB':>8} {'conc':>5} {'time ms':>9} {'peak KB':>9} {'peak KB/upload':>15}")
+    for size in sizes:
+        content = generate_pdf(generate_cv(size))
+        for conc in sorted({1, concurrency}):
+            elapsed, peak = await measure(content, conc)
+            print(f"{size:>6} {len(content) / 1024:>8.1f} {conc:>5} {elapsed * 1e3:>9.1f} "
+                  f"{peak / 1024:>9.1f} {peak / 1024 / conc:>15.1f}")
+    extraction_service.shutdown(wait=True)
+
+    server_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    worker_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"peak RSS: server {server_rss / 1024:.1f} MB, largest worker {worker_rss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 32, 128], help="CV sizes passed to generate_cv")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of simultaneous uploads")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.concurrency))
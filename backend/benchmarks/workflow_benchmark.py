@@ -0,0 +1,105 @@
+"""
+Orchestration benchmark for the LangGraph workflow.
+
+Replaces Gemini with an instant stub and times one workflow run per request,
+once building and compiling the graph for every request (the old behaviour) and
+once with the shared compiled graph, so the difference is the per-request
+orchestration overhead. It then compares the sequential and fan-out workflows
+with a simulated Gemini latency. Node memoization is disabled so every node runs.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.workflow_benchmark [--requests N] [--llm-latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import backend.workflows.langgraph_workflow as workflow_module
+from backend.core.llm_admission import llm_admission
+from backend.benchmarks.corpus import generate_cv
+
+STUB_RESPONSES = {
+    "Extract structured": {"name": "Jane Doe", "email": "jane.doe@example.com", "skills": ["Python", "SQL", "Docker"]},
+    "Analyze the skills": {"current_skill_level": "Mid-level", "strengths": ["Python"], "gaps": ["Kubernetes"],
+                           "recommendations": ["Build a cluster"], "relevant_industries": ["Technology"]},
+    "career paths": [{"title": "Backend Engineer", "description": "Builds APIs", "required_skills": ["Python"]}],
+    "career development roadmap": {"roadmap_summary": "Grow into backend engineering",
+                                   "milestones": [{"title": "Learn Kubernetes", "timeline": "4 weeks"}]},
+}
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel and answers every node instantly."""
+
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, prompt, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for marker, response in STUB_RESPONSES.items():
+            if marker in prompt:
+                return StubResponse(json.dumps(response))
+        return StubResponse("{}")
+
+
+def initial_state(cv_text):
+    return workflow_module.WorkflowState(
+        raw_cv=cv_text, user_input=None, parsed_profile=None, skills_analysis=None,
+        career_recommendations=None, roadmap=None, error=None, current_step="parse_cv"
+    )
+
+
+async def time_requests(label, get_workflow, cv_texts):
+    """Run one workflow per CV text and print per-request statistics."""
+    timings = []
+    for cv_text in cv_texts:
+        start = time.perf_counter()
+        result = await get_workflow().ainvoke(initial_state(cv_text))
+        timings.append(time.perf_counter() - start)
+        assert result.get("roadmap") and not result.get("error"), result.get("error")
+    timings.sort()
+    print(f"{label:<22} mean {statistics.mean(timings) * 1e3:7.2f} ms   "
+          f"median {statistics.median(timings) * 1e3:7.2f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1e3:7.2f} ms")
+    return statistics.mean(timings)
+
+
+async def run(requests: int = 200, llm_latency: float = 0.05):
+    """Compare per-request graph compilation with the shared compiled graph."""
+    workflow_module.genai.GenerativeModel = StubModel
+    workflow_module.get_node_result = lambda node, inputs: None
+    workflow_module.save_node_result = lambda node, inputs, value: False
+    # The stub has no quota to protect, so only orchestration is measured
+    llm_admission.rate = 0
+
+    cv_texts = [generate_cv(size=4, seed=i) for i in range(requests)]
+    print(f"{requests} workflow runs with a stubbed LLM")
+    rebuilt = await time_requests("compile per request", workflow_module.create_career_path_workflow, cv_texts)
+    shared = await time_requests("shared compiled graph", workflow_module.get_career_path_workflow, cv_texts)
+    print(f"orchestration overhead saved: {(rebuilt - shared) * 1e3:.2f} ms per request")
+
+    StubModel.latency = llm_latency
+    mode_texts = cv_texts[:max(requests // 10, 1)]
+    print(f"\n{len(mode_texts)} workflow runs with {llm_latency * 1e3:.0f} ms of simulated LLM latency per call")
+    sequential = await time_requests("sequential", lambda: workflow_module.get_career_path_workflow(False), mode_texts)
+    fan_out = await time_requests("fan-out", lambda: workflow_module.get_career_path_workflow(True), mode_texts)
+    print(f"fan-out saves {(sequential - fan_out) * 1e3:.0f} ms per request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Number of workflow runs per variant")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Simulated seconds per LLM call in the mode comparison")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.llm_latency))
@@ -7,4 +7,5 @@ This package contains core business logic and helper functions.
 # Import key functions to make them available when importing from this package
 from .ai_helpers import parse_cv_text
 from .cache_utils import get_cache_key, get_from_cache, save_to_cache
-from .file_processing import extract_text_from_file
\ No newline at end of file
+from .file_processing import extract_text_from_file
+from .cv_document import CVDocument
@@ -1,4 +1,5 @@
 import os
+import re
 import google.generativeai as genai
 try:
     from dotenv import load_dotenv
@@ -6,7 +7,13 @@ except ImportError:
     # Fallback function if python-dotenv is not available
     def load_dotenv():
         print("Warning: python-dotenv not available, using default environment variables")
-import json
+
+from .cv_document import CVDocument
+from .cache_utils import get_cache_key
+from .single_flight import single_flight
+from .llm_clients import get_model_with_fallback, generate_content, describe_llm_error, llm_available
+from .cv_prompt import compact_cv_text
+from .llm_json import extract_json, LLMJSONError
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,30 +27,20 @@ else:
     genai.configure(api_key=api_key)
 
 def get_gemini_model():
-    """Get the Gemini model for text generation."""
-    if not os.getenv("GOOGLE_API_KEY"):
+    """Get the shared Gemini model for text generation, trying the models in GEMINI_MODEL_FALLBACKS in order."""
+    if not llm_available(os.getenv("GOOGLE_API_KEY")):
         print("ERROR: Cannot initialize Gemini model - GOOGLE_API_KEY not set")
         return None
         
-    # Try using a model with higher quota limits
-    try:
-        return genai.GenerativeModel('gemini-pro')
-    except Exception as e:
-        print(f"Error with gemini-pro model: {e}")
-        try:
-            return genai.GenerativeModel('gemini-1.0-pro')
-        except Exception as e:
-            print(f"Error with gemini-1.0-pro model: {e}")
-            try:
-                return genai.GenerativeModel('gemini-1.5-flash')
-            except Exception as e:
-                print(f"Error with all Gemini models: {e}")
-                return None
+    return get_model_with_fallback()
 
+@single_flight("parse_cv_text", key=lambda cv_text: get_cache_key(cv_text or ""))
 async def parse_cv_text(cv_text):
     """
     Use Gemini to extract structured information from CV text.
     
+    Concurrent calls for the same text share a single parse.
+    
     Args:
         cv_text (str): The text content of a CV/resume
         
@@ -55,19 +52,13 @@ async def parse_cv_text(cv_text):
     # Check if model is None (API key not set)
     if model is None:
         print("Cannot parse CV with AI: Gemini model not available (GOOGLE_API_KEY not set)")
-        # Use fallback extraction immediately
+        # Use fallback extraction immediately, off the event loop
+        from .extraction_service import extraction_service
         return {
             "api_error": "Gemini API not configured - GOOGLE_API_KEY not set",
             "message": "AI parsing unavailable. Using basic extraction with limited accuracy.",
             "parsed_data": {
-                "name": extract_name(cv_text),
-                "email": extract_email(cv_text),
-                "phone": extract_phone(cv_text),
-                "skills": extract_skills(cv_text),
-                "education": extract_education(cv_text),
-                "work_experience": extract_experience(cv_text),
-                "projects": extract_projects(cv_text),
-                "interests": extract_interests(cv_text),
+                **await extraction_service.extract_profile(cv_text),
                 "note": "This is a simplified extraction. For better results, configure the AI service."
             }
         }
@@ -86,104 +77,119 @@ async def parse_cv_text(cv_text):
     - interests: List of personal interests or hobbies
     
     CV Text:
-    {cv_text}
+    {compact_cv_text(cv_text, 'parse_cv_text')}
     
     Return ONLY the JSON output, no additional text. Make sure the JSON is valid and properly formatted.
     """
     
     try:
         print("Sending request to Gemini API...")
-        # Use a simple timer to avoid hanging indefinitely
-        import threading
-        import time
-        
-        response = None
-        api_error = None
-        
-        def call_api():
-            nonlocal response, api_error
-            try:
-                response = model.generate_content(prompt)
-                print("Received response from Gemini API")
-            except Exception as e:
-                api_error = e
-                print(f"Error in Gemini API thread: {e}")
-        
-        # Run the API call in a separate thread
-        api_thread = threading.Thread(target=call_api)
-        api_thread.daemon = True  # Allow the thread to be terminated when the main thread exits
-        api_thread.start()
-        
-        # Wait for up to 20 seconds
-        timeout = 20
-        start_time = time.time()
-        while api_thread.is_alive() and time.time() - start_time < timeout:
-            # Wait for small intervals and check if the thread completed
-            await asyncio.sleep(0.5)
-            
-        # Check if we timed out or got a response
-        if api_thread.is_alive():
-            print(f"Gemini API request timed out after {timeout} seconds")
-            raise Exception(f"API timeout: Gemini request took longer than {timeout} seconds to respond")
-        
-        if api_error:
-            raise api_error
+        # Times out (and cancels the request) after LLM_TIMEOUT seconds
+        response = await generate_content(model, prompt)
+        print("Received response from Gemini API")
             
         if not response:
             raise Exception("No response received from Gemini API")
         
         # Try to parse the response as JSON
         try:
-            # First, check if the response contains markdown code blocks
+            # The JSON object may be inside a markdown code block or surrounded by text
             text = response.text
             print(f"Response text length: {len(text)}")
-            if "```json" in text:
-                # Extract the JSON portion from the markdown code block
-                json_text = text.split("```json")[1].split("```")[0].strip()
-                print("Extracted JSON from code block")
-            elif "```" in text:
-                # Extract from a generic code block
-                json_text = text.split("```")[1].split("```")[0].strip()
-                print("Extracted text from generic code block")
-            else:
-                json_text = text.strip()
-                print("Using raw text as JSON")
-                
-            # Parse the JSON
-            parsed_data = json.loads(json_text)
+            parsed_data = extract_json(text, dict)
             return parsed_data
-        except json.JSONDecodeError as e:
+        except LLMJSONError as e:
             print(f"Error parsing JSON from Gemini response: {e}")
             print(f"Raw response: {response.text}")
             return {"error": "Failed to parse CV data", "raw_response": response.text}
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
         
-        # Provide a fallback response when the API fails due to rate limits
+        # Provide a fallback response when the API call fails
         print("Using fallback method for CV parsing...")
         
-        # Basic extraction using simple rules
+        # Basic extraction using simple rules, off the event loop
+        from .extraction_service import extraction_service
         fallback_data = {
-            "name": extract_name(cv_text),
-            "email": extract_email(cv_text),
-            "phone": extract_phone(cv_text),
-            "skills": extract_skills(cv_text),
-            "education": extract_education(cv_text),
-            "work_experience": extract_experience(cv_text),
-            "projects": extract_projects(cv_text),
-            "interests": extract_interests(cv_text),
+            **await extraction_service.extract_profile(cv_text),
             "note": "This is a simplified extraction due to API limits. For full details, please review the CV manually."
         }
         
         return {
             "api_error": str(e),
             "parsed_data": fallback_data,
-            "message": "API rate limit exceeded. Using basic extraction. Please try again later for better results."
+            "message": describe_llm_error(e)
         }
 
+def fold_case(text):
+    """Lowercase text the way re.IGNORECASE compares it to ASCII letters"""
+    if not text.isascii():
+        # Characters that re.IGNORECASE treats as ASCII letters but str.lower() leaves alone
+        text = text.replace("İ", "i").replace("ı", "i").replace("ſ", "s")
+    return text.lower()
+
+def contains_any(text, words):
+    """Check whether text contains any of the lowercase words, ignoring case like re.IGNORECASE"""
+    folded = fold_case(text)
+    return any(word in folded for word in words)
+
+# Name extraction patterns, compiled once at import.
+# Comprehensive exclusion list for false positives, merged into a single alternation
+NAME_EXCLUDE_PATTERNS = [
+    r'^(RESUME|CURRICULUM\s+VITAE|CV)$',  # Document headers
+    r'^(ABOUT\s+ME|ABOUT|PROFILE|BIO|BIOGRAPHY|SUMMARY|PERSONAL\s+PROFILE)$',  # Section headers
+    r'^(PERSONAL\s+INFORMATION|CONTACT|CONTACT\s+INFORMATION|OBJECTIVE|CAREER\s+OBJECTIVE)$',  # More section headers
+    r'^(PROFESSIONAL\s+SUMMARY|CAREER\s+SUMMARY|EXPERIENCE\s+SUMMARY)$',  # Summary headers
+    r'@',  # Emails
+    r'^\+?\d',  # Phone numbers
+    r'^http',  # URLs
+    r'^www\.',  # URLs
+    r'^[A-Z\s]{7,}$',  # All uppercase text (likely headers)
+    r'\b(docx|pdf|doc)\b',  # File extensions
+    r'\b(Page|Home|Contact|Resume|CV)\b',  # Web page links/navigation
+    r'\b(LinkedIn|GitHub|Twitter|Facebook|Instagram)\b',  # Social media references
+    r'^[^a-zA-Z]*$',  # Strings without any letters
+]
+NAME_EXCLUDE_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in NAME_EXCLUDE_PATTERNS), re.IGNORECASE)
+
+# Additional exclusion list - exact matches for common false positives
+EXCLUDED_EXACT_NAMES = frozenset({
+    "about me", "profile", "personal profile", "curriculum vitae", "resume", 
+    "professional profile", "personal information", "contact information",
+    "personal details", "professional summary", "career summary", "career objective",
+    "professional experience", "education", "skills", "experience",
+    "summary", "objective", "professional objective", "contact details",
+    "personal statement", "professional background", "career profile",
+    "about", "bio", "biography", "qualification profile"
+})
+
+# Explicit "Name:" patterns which are most reliable
+NAME_LABEL_PATTERNS = [
+    re.compile(r'(?:name|full name)[:\s-]+([^,\n]{2,40})', re.IGNORECASE),
+    re.compile(r'(?:candidate|applicant)[:\s-]+([^,\n]{2,40})', re.IGNORECASE),
+]
+
+PERSONAL_SECTION_REGEX = re.compile(r'personal\s+information|contact\s+information|personal\s+details', re.IGNORECASE)
+
+# Characters not typically found in names
+NON_NAME_CHARS_REGEX = re.compile(r'[^a-zA-Z\s.\'-]')
+
+# NLP-style name recognition heuristics for common name patterns
+NAME_PATTERNS = [
+    # Common first + last name pattern with correct capitalization
+    re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})\b'),
+    
+    # Patterns with middle initials
+    re.compile(r'\b([A-Z][a-z]+\s+[A-Z]\.\s+[A-Z][a-z]+)\b'),
+    
+    # Pattern with titles
+    re.compile(r'\b((?:Mr\.|Ms\.|Mrs\.|Dr\.|Prof\.)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3})\b'),
+]
+
 def extract_name(text):
     """Extract a potential name from the CV text with robust accuracy and safeguards against common false positives"""
-    import re
+    if isinstance(text, CVDocument):
+        text = text.text
     
     if not text:
         return "Name not detected"
@@ -194,49 +200,18 @@ def extract_name(text):
     if not lines:
         return "Name not detected"
     
-    # Comprehensive exclusion list for false positives
-    exclude_patterns = [
-        r'^(RESUME|CURRICULUM\s+VITAE|CV)$',  # Document headers
-        r'^(ABOUT\s+ME|ABOUT|PROFILE|BIO|BIOGRAPHY|SUMMARY|PERSONAL\s+PROFILE)$',  # Section headers
-        r'^(PERSONAL\s+INFORMATION|CONTACT|CONTACT\s+INFORMATION|OBJECTIVE|CAREER\s+OBJECTIVE)$',  # More section headers
-        r'^(PROFESSIONAL\s+SUMMARY|CAREER\s+SUMMARY|EXPERIENCE\s+SUMMARY)$',  # Summary headers
-        r'@',  # Emails
-        r'^\+?\d',  # Phone numbers
-        r'^http',  # URLs
-        r'^www\.',  # URLs
-        r'^[A-Z\s]{7,}$',  # All uppercase text (likely headers)
-        r'\b(docx|pdf|doc)\b',  # File extensions
-        r'\b(Page|Home|Contact|Resume|CV)\b',  # Web page links/navigation
-        r'\b(LinkedIn|GitHub|Twitter|Facebook|Instagram)\b',  # Social media references
-        r'^[^a-zA-Z]*$',  # Strings without any letters
-    ]
-    
-    # Additional exclusion list - exact matches for common false positives
-    excluded_exact_names = {
-        "about me", "profile", "personal profile", "curriculum vitae", "resume", 
-        "professional profile", "personal information", "contact information",
-        "personal details", "professional summary", "career summary", "career objective",
-        "professional experience", "education", "skills", "experience",
-        "summary", "objective", "professional objective", "contact details",
-        "personal statement", "professional background", "career profile",
-        "about", "bio", "biography", "qualification profile"
-    }
-    
     # FIRST TIER: Look for explicit "Name:" pattern which is most reliable
-    name_label_patterns = [
-        r'(?:name|full name)[:\s-]+([^,\n]{2,40})',
-        r'(?:candidate|applicant)[:\s-]+([^,\n]{2,40})',
-    ]
-    
     # Check the entire document for explicit name patterns
-    for pattern in name_label_patterns:
+    # (every label pattern needs one of these words, so most CVs skip the tier with one check)
+    label_patterns = NAME_LABEL_PATTERNS if contains_any('\n'.join(lines[:30]), ("name", "candidate", "applicant")) else []
+    for pattern in label_patterns:
         for line in lines[:30]:  # Check first 30 lines
-            match = re.search(pattern, line, re.IGNORECASE)
+            match = pattern.search(line)
             if match and len(match.group(1).strip()) > 3:  # Ensure name is reasonable length
                 potential_name = match.group(1).strip()
                 # Check against exclusion patterns
-                if (all(not re.search(exclude, potential_name, re.IGNORECASE) for exclude in exclude_patterns) and 
-                    potential_name.lower() not in excluded_exact_names):
+                if (not NAME_EXCLUDE_REGEX.search(potential_name) and 
+                    potential_name.lower() not in EXCLUDED_EXACT_NAMES):
                     # Verify it looks like a name (capital letters for first letters in words)
                     words = potential_name.split()
                     if (len(words) >= 1 and len(words) <= 5 and
@@ -248,11 +223,11 @@ def extract_name(text):
     for i, line in enumerate(lines[:7]):  # Expanded to first 7 lines
         line = line.strip()
         # Skip empty lines or those matching exclusion patterns
-        if not line or any(re.search(pattern, line, re.IGNORECASE) for pattern in exclude_patterns):
+        if not line or NAME_EXCLUDE_REGEX.search(line):
             continue
         
         # Skip common false positive strings
-        if line.lower() in excluded_exact_names:
+        if line.lower() in EXCLUDED_EXACT_NAMES:
             continue
             
         # A real name typically has 2-4 words, with proper capitalization
@@ -283,7 +258,7 @@ def extract_name(text):
             name_quality_score -= 2  # Too long for a typical name
             
         # Check for strange characters that wouldn't be in a name
-        if re.search(r'[^a-zA-Z\s.\'-]', line):
+        if NON_NAME_CHARS_REGEX.search(line):
             name_quality_score -= 3  # Contains characters not typically in names
             
         # Bias in favor of early lines (names are usually at the very top)
@@ -294,15 +269,17 @@ def extract_name(text):
             return line
     
     # THIRD TIER: Look for a personal information section which may contain name
-    for i, line in enumerate(lines):
-        if re.search(r'personal\s+information|contact\s+information|personal\s+details', line, re.IGNORECASE):
+    # (a single substring check over the whole text rules the tier out for most CVs)
+    section_lines = lines if contains_any(text, ("personal", "contact")) else []
+    for i, line in enumerate(section_lines):
+        if PERSONAL_SECTION_REGEX.search(line):
             # Check the next few lines for a name pattern
             for j in range(i+1, min(i+8, len(lines))):
                 if j < len(lines):  # Ensure we're in bounds
-                    name_match = re.search(r'(?:name|full name)[:\s-]+([^,\n]{2,40})', lines[j], re.IGNORECASE)
+                    name_match = NAME_LABEL_PATTERNS[0].search(lines[j])
                     if name_match:
                         potential_name = name_match.group(1).strip()
-                        if potential_name.lower() not in excluded_exact_names:
+                        if potential_name.lower() not in EXCLUDED_EXACT_NAMES:
                             return potential_name
                         
                     # Also check for lines that just have a properly formatted name without a label
@@ -311,38 +288,27 @@ def extract_name(text):
                     if (2 <= len(words) <= 4 and
                         all(word[0].isupper() for word in words if len(word) > 1) and
                         len(potential_name_line) <= 40 and
-                        potential_name_line.lower() not in excluded_exact_names):
+                        potential_name_line.lower() not in EXCLUDED_EXACT_NAMES):
                         return potential_name_line
     
     # FOURTH TIER: Use NLP-style name recognition heuristics for common name patterns
-    name_patterns = [
-        # Common first + last name pattern with correct capitalization
-        r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})\b',
-        
-        # Patterns with middle initials
-        r'\b([A-Z][a-z]+\s+[A-Z]\.\s+[A-Z][a-z]+)\b',
-        
-        # Pattern with titles
-        r'\b((?:Mr\.|Ms\.|Mrs\.|Dr\.|Prof\.)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3})\b',
-    ]
-    
     # Search for these patterns in the first 15 lines
-    for pattern in name_patterns:
+    for pattern in NAME_PATTERNS:
         for i, line in enumerate(lines[:15]):
             if i == 0:  # Give more weight to the very first line
-                matches = re.findall(pattern, line)
+                matches = pattern.findall(line)
                 if matches:
                     for match in matches:
                         potential_name = match.strip()
                         if (len(potential_name) > 4 and len(potential_name) <= 40 and
-                            potential_name.lower() not in excluded_exact_names):
+                            potential_name.lower() not in EXCLUDED_EXACT_NAMES):
                             return potential_name
             else:
-                match = re.search(pattern, line)
+                match = pattern.search(line)
                 if match:
                     potential_name = match.group(1).strip()
                     if (len(potential_name) > 4 and len(potential_name) <= 40 and
-                        potential_name.lower() not in excluded_exact_names):
+                        potential_name.lower() not in EXCLUDED_EXACT_NAMES):
                         return potential_name
     
     # If we still haven't found a name, check first non-empty line with careful filtering
@@ -352,8 +318,8 @@ def extract_name(text):
             4 <= len(line_clean) <= 40 and
             not line_clean.isupper() and  # Not all uppercase (likely a header)
             " " in line_clean and  # Contains at least one space (first + last name)
-            all(not re.search(exclude, line_clean, re.IGNORECASE) for exclude in exclude_patterns) and
-            line_clean.lower() not in excluded_exact_names):
+            not NAME_EXCLUDE_REGEX.search(line_clean) and
+            line_clean.lower() not in EXCLUDED_EXACT_NAMES):
             
             # Final check: at least one word should be capitalized
             words = line_clean.split()
@@ -366,6 +332,9 @@ def extract_name(text):
 def extract_email(text):
     """Extract email address using simple pattern matching"""
     import re
+    
+    if isinstance(text, CVDocument):
+        text = text.text
     email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
     matches = re.findall(email_pattern, text)
     return matches[0] if matches else "Email not detected"
@@ -373,6 +342,9 @@ def extract_email(text):
 def extract_phone(text):
     """Extract phone number using simple pattern matching"""
     import re
+    
+    if isinstance(text, CVDocument):
+        text = text.text
     # More comprehensive phone pattern
     phone_patterns = [
         r'(\+\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}',  # Standard format
@@ -392,173 +364,259 @@ def extract_phone(text):
                 
     return "Phone not detected"
 
-def extract_skills(text):
-    """Extract potential skills from the CV"""
-    import re
+# Comprehensive list of common technical skills
+TECHNICAL_SKILLS = {
+    # Programming Languages
+    "python": "Python",
+    "javascript": "JavaScript",
+    "typescript": "TypeScript",
+    "java": "Java",
+    "c\\+\\+": "C++",
+    "c#": "C#",
+    "php": "PHP",
+    "ruby": "Ruby",
+    "swift": "Swift",
+    "kotlin": "Kotlin",
+    "go(lang)?\\b": "Go",
+    "rust": "Rust",
+    "scala": "Scala",
+    "perl": "Perl",
+    "r\\b": "R",
+    "objective(-)?c": "Objective-C",
+    "assembly": "Assembly",
+    "shell scripting": "Shell Scripting",
+    "bash": "Bash",
+    "powershell": "PowerShell",
+    "dart": "Dart",
+    "haskell": "Haskell",
+    "lua": "Lua",
+    
+    # Frontend
+    "html": "HTML",
+    "css": "CSS",
+    "sass": "Sass",
+    "less": "Less",
+    "bootstrap": "Bootstrap",
+    "tailwind": "Tailwind CSS",
+    "material(-)?ui": "Material UI",
+    "react": "React",
+    "vue(\\.js)?": "Vue.js",
+    "angular": "Angular",
+    "jquery": "jQuery",
+    "redux": "Redux",
+    "svelte": "Svelte",
+    "webpack": "Webpack",
+    "responsive design": "Responsive Design",
+    "webassembly": "WebAssembly",
+    
+    # Backend
+    "node(\\.js)?": "Node.js", 
+    "express(\\.js)?": "Express.js",
+    "django": "Django",
+    "flask": "Flask",
+    "fastapi": "FastAPI",
+    "spring": "Spring",
+    "spring boot": "Spring Boot",
+    "laravel": "Laravel",
+    "asp\\.net": "ASP.NET",
+    "ruby on rails": "Ruby on Rails",
+    "graphql": "GraphQL",
+    "rest": "REST APIs",
+    "api": "API Development",
+    
+    # Databases
+    "sql": "SQL",
+    "mysql": "MySQL",
+    "postgresql": "PostgreSQL",
+    "mongodb": "MongoDB",
+    "firebase": "Firebase",
+    "redis": "Redis",
+    "nosql": "NoSQL",
+    "oracle": "Oracle",
+    "sqlite": "SQLite",
+    "cassandra": "Cassandra",
+    "elasticsearch": "Elasticsearch",
+    
+    # DevOps & Cloud
+    "aws": "AWS",
+    "azure": "Azure",
+    "google cloud": "Google Cloud",
+    "docker": "Docker",
+    "kubernetes": "Kubernetes",
+    "jenkins": "Jenkins",
+    "ci/cd": "CI/CD",
+    "terraform": "Terraform",
+    "ansible": "Ansible",
+    "vagrant": "Vagrant",
+    "serverless": "Serverless",
+    
+    # Version Control
+    "git": "Git",
+    "github": "GitHub",
+    "gitlab": "GitLab",
+    "bitbucket": "Bitbucket",
+    
+    # Testing
+    "unit testing": "Unit Testing",
+    "integration testing": "Integration Testing",
+    "jest": "Jest",
+    "mocha": "Mocha",
+    "selenium": "Selenium",
+    "cypress": "Cypress",
+    "junit": "JUnit",
+    "pytest": "PyTest",
+    
+    # Mobile
+    "android": "Android",
+    "ios": "iOS",
+    "react native": "React Native",
+    "flutter": "Flutter",
+    "swift": "Swift",
+    "xamarin": "Xamarin",
+    "ionic": "Ionic",
+    "cordova": "Cordova",
+    
+    # Data Science & AI
+    "machine learning": "Machine Learning",
+    "deep learning": "Deep Learning",
+    "nlp": "Natural Language Processing",
+    "computer vision": "Computer Vision",
+    "data analysis": "Data Analysis",
+    "tensorflow": "TensorFlow",
+    "pytorch": "PyTorch",
+    "scikit(-)?learn": "scikit-learn",
+    "pandas": "Pandas",
+    "numpy": "NumPy",
+    "tableau": "Tableau",
+    "power bi": "Power BI",
+    
+    # Project Management & Methodologies
+    "agile": "Agile",
+    "scrum": "Scrum",
+    "kanban": "Kanban",
+    "waterfall": "Waterfall",
+    "jira": "Jira",
+    "trello": "Trello",
+    "asana": "Asana",
+}
+
+# Soft skills
+SOFT_SKILLS = {
+    "communication": "Communication",
+    "teamwork": "Teamwork",
+    "leadership": "Leadership",
+    "problem solving": "Problem Solving",
+    "critical thinking": "Critical Thinking",
+    "time management": "Time Management",
+    "adaptability": "Adaptability",
+    "creativity": "Creativity",
+    "conflict resolution": "Conflict Resolution",
+    "emotional intelligence": "Emotional Intelligence",
+}
+
+# Combine all skills for searching
+ALL_SKILLS = {**TECHNICAL_SKILLS, **SOFT_SKILLS}
+
+# Headers that introduce a dedicated skills section
+SKILLS_SECTION_PATTERNS = [
+    re.compile(r'(?i)(?:^|\n)(?:\s*\b' + header + r'\b\s*:?|\b' + header + r'\b\s*:?)(.+?)(?=\n\s*\b\w+\b\s*:|$)')
+    for header in ["skills", "technical skills", "competencies", "expertise", "proficiencies"]
+]
+
+# Common separators in skills lists
+SKILL_ITEM_SEPARATORS = re.compile(r'[,•\n|]')
+
+# Additional skills commonly found in tech CVs but that might have variations
+ADDITIONAL_SKILL_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), skill_name)
+    for pattern, skill_name in [
+        (r'\bui/ux\b|\buser\s+interface\b|\buser\s+experience\b', "UI/UX Design"),
+        (r'\bresponsive\s+design\b|\bmobile\s+first\b', "Responsive Design"),
+        (r'\bcloud\s+computing\b|\bcloud\s+architecture\b', "Cloud Computing"),
+        (r'\brestful\s+api|\brest\s+api\b|\bapi\s+development\b', "RESTful APIs"),
+        (r'\bmicro[-\s]?services\b', "Microservices"),
+        (r'\bagile\s+development\b|\bagile\s+methodology\b', "Agile Development"),
+        (r'\bdevops\b', "DevOps"),
+        (r'\bci/cd\b|\bcontinuous\s+integration\b|\bcontinuous\s+deployment\b', "CI/CD"),
+        (r'\btdd\b|\btest[-\s]driven\s+development\b', "Test-Driven Development"),
+        (r'\bsecurity\b|\bcyber[-\s]?security\b|\bapplication\s+security\b', "Security"),
+        (r'\bdatabase\s+design\b|\bdatabase\s+management\b', "Database Design"),
+        (r'\bdata\s+modeling\b|\bentity\s+relationship\b', "Data Modeling"),
+        (r'\bbig\s+data\b', "Big Data"),
+        (r'\bdata\s+warehousing\b|\bdata\s+lake\b', "Data Warehousing"),
+        (r'\bsoftware\s+architecture\b|\bsystem\s+design\b', "Software Architecture"),
+        (r'\bobject[-\s]?oriented\s+programming\b|\boop\b', "Object-Oriented Programming"),
+        (r'\bfunctional\s+programming\b', "Functional Programming"),
+        (r'\bsystem\s+administration\b|\bsysadmin\b', "System Administration"),
+        (r'\bnetworking\b|\bnetwork\s+security\b', "Networking"),
+    ]
+]
+
+def _leading_words(pattern):
+    """Return every word a catalog pattern can start with, expanding optional groups like (lang)?"""
+    forms = [pattern]
+    words = set()
+    while forms:
+        form = forms.pop()
+        optional = re.search(r'\(([^()]*)\)\?', form)
+        if optional:
+            forms.append(form[:optional.start()] + form[optional.end():])
+            forms.append(form[:optional.start()] + optional.group(1) + form[optional.end():])
+        else:
+            words.add(re.match(r'\w+', form).group())
+    return words
+
+def build_skill_matcher(skills):
+    """
+    Compile a skill catalog into a single-pass matcher.
     
-    # Comprehensive list of common technical skills
-    technical_skills = {
-        # Programming Languages
-        "python": "Python",
-        "javascript": "JavaScript",
-        "typescript": "TypeScript",
-        "java": "Java",
-        "c\\+\\+": "C++",
-        "c#": "C#",
-        "php": "PHP",
-        "ruby": "Ruby",
-        "swift": "Swift",
-        "kotlin": "Kotlin",
-        "go(lang)?\\b": "Go",
-        "rust": "Rust",
-        "scala": "Scala",
-        "perl": "Perl",
-        "r\\b": "R",
-        "objective(-)?c": "Objective-C",
-        "assembly": "Assembly",
-        "shell scripting": "Shell Scripting",
-        "bash": "Bash",
-        "powershell": "PowerShell",
-        "dart": "Dart",
-        "haskell": "Haskell",
-        "lua": "Lua",
-        
-        # Frontend
-        "html": "HTML",
-        "css": "CSS",
-        "sass": "Sass",
-        "less": "Less",
-        "bootstrap": "Bootstrap",
-        "tailwind": "Tailwind CSS",
-        "material(-)?ui": "Material UI",
-        "react": "React",
-        "vue(\\.js)?": "Vue.js",
-        "angular": "Angular",
-        "jquery": "jQuery",
-        "redux": "Redux",
-        "svelte": "Svelte",
-        "webpack": "Webpack",
-        "responsive design": "Responsive Design",
-        "webassembly": "WebAssembly",
-        
-        # Backend
-        "node(\\.js)?": "Node.js", 
-        "express(\\.js)?": "Express.js",
-        "django": "Django",
-        "flask": "Flask",
-        "fastapi": "FastAPI",
-        "spring": "Spring",
-        "spring boot": "Spring Boot",
-        "laravel": "Laravel",
-        "asp\\.net": "ASP.NET",
-        "ruby on rails": "Ruby on Rails",
-        "graphql": "GraphQL",
-        "rest": "REST APIs",
-        "api": "API Development",
-        
-        # Databases
-        "sql": "SQL",
-        "mysql": "MySQL",
-        "postgresql": "PostgreSQL",
-        "mongodb": "MongoDB",
-        "firebase": "Firebase",
-        "redis": "Redis",
-        "nosql": "NoSQL",
-        "oracle": "Oracle",
-        "sqlite": "SQLite",
-        "cassandra": "Cassandra",
-        "elasticsearch": "Elasticsearch",
-        
-        # DevOps & Cloud
-        "aws": "AWS",
-        "azure": "Azure",
-        "google cloud": "Google Cloud",
-        "docker": "Docker",
-        "kubernetes": "Kubernetes",
-        "jenkins": "Jenkins",
-        "ci/cd": "CI/CD",
-        "terraform": "Terraform",
-        "ansible": "Ansible",
-        "vagrant": "Vagrant",
-        "serverless": "Serverless",
-        
-        # Version Control
-        "git": "Git",
-        "github": "GitHub",
-        "gitlab": "GitLab",
-        "bitbucket": "Bitbucket",
-        
-        # Testing
-        "unit testing": "Unit Testing",
-        "integration testing": "Integration Testing",
-        "jest": "Jest",
-        "mocha": "Mocha",
-        "selenium": "Selenium",
-        "cypress": "Cypress",
-        "junit": "JUnit",
-        "pytest": "PyTest",
-        
-        # Mobile
-        "android": "Android",
-        "ios": "iOS",
-        "react native": "React Native",
-        "flutter": "Flutter",
-        "swift": "Swift",
-        "xamarin": "Xamarin",
-        "ionic": "Ionic",
-        "cordova": "Cordova",
-        
-        # Data Science & AI
-        "machine learning": "Machine Learning",
-        "deep learning": "Deep Learning",
-        "nlp": "Natural Language Processing",
-        "computer vision": "Computer Vision",
-        "data analysis": "Data Analysis",
-        "tensorflow": "TensorFlow",
-        "pytorch": "PyTorch",
-        "scikit(-)?learn": "scikit-learn",
-        "pandas": "Pandas",
-        "numpy": "NumPy",
-        "tableau": "Tableau",
-        "power bi": "Power BI",
+    Every catalog pattern starts on a word boundary, so a single scan over the words of
+    the text finds all candidate positions with a dictionary lookup. Each candidate is then
+    confirmed with the original pattern anchored at that position, which keeps the matching
+    semantics of searching for each pattern separately (including overlapping hits such as
+    "spring" and "spring boot").
+    
+    Args:
+        skills (dict): Mapping of regex fragment to canonical skill name
         
-        # Project Management & Methodologies
-        "agile": "Agile",
-        "scrum": "Scrum",
-        "kanban": "Kanban",
-        "waterfall": "Waterfall",
-        "jira": "Jira",
-        "trello": "Trello",
-        "asana": "Asana",
-    }
-    
-    # Soft skills
-    soft_skills = {
-        "communication": "Communication",
-        "teamwork": "Teamwork",
-        "leadership": "Leadership",
-        "problem solving": "Problem Solving",
-        "critical thinking": "Critical Thinking",
-        "time management": "Time Management",
-        "adaptability": "Adaptability",
-        "creativity": "Creativity",
-        "conflict resolution": "Conflict Resolution",
-        "emotional intelligence": "Emotional Intelligence",
-    }
-    
-    # Combine all skills for searching
-    all_skills = {**technical_skills, **soft_skills}
+    Returns:
+        dict: Leading word -> list of (catalog index, compiled pattern, skill name)
+    """
+    candidates = {}
+    for index, (pattern, skill_name) in enumerate(skills.items()):
+        compiled = re.compile(pattern + r'\b', re.IGNORECASE)
+        for word in _leading_words(pattern):
+            candidates.setdefault(word, []).append((index, compiled, skill_name))
+    return candidates
+
+# Built once at import so that extract_skills never compiles patterns per request
+SKILL_CANDIDATES = build_skill_matcher(ALL_SKILLS)
+
+WORD_REGEX = re.compile(r'\w+')
+
+def find_catalog_skills(text):
+    """Return the canonical names of all catalog skills found in text, in catalog order"""
+    hits = {}
+    for match in WORD_REGEX.finditer(text):
+        candidates = SKILL_CANDIDATES.get(fold_case(match.group()))
+        if candidates:
+            for index, compiled, skill_name in candidates:
+                if index not in hits and compiled.match(text, match.start()):
+                    hits[index] = skill_name
+    return [hits[index] for index in sorted(hits)]
+
+def extract_skills(text):
+    """Extract potential skills from the CV"""
+    doc = CVDocument.from_text(text)
     
     # Container for found skills
     found_skills = []
     
     # Try to identify a "Skills" section first
     skills_section = ""
-    skills_headers = ["skills", "technical skills", "competencies", "expertise", "proficiencies"]
     
-    for header in skills_headers:
-        pattern = r'(?i)(?:^|\n)(?:\s*\b' + header + r'\b\s*:?|\b' + header + r'\b\s*:?)(.+?)(?=\n\s*\b\w+\b\s*:|$)'
-        match = re.search(pattern, text)
+    for pattern in SKILLS_SECTION_PATTERNS:
+        match = pattern.search(doc.text)
         if match:
             skills_section = match.group(1).strip()
             break
@@ -566,7 +624,7 @@ def extract_skills(text):
     # If we found a skills section, prioritize extraction from there
     if skills_section:
         # Split by common separators in skills lists
-        items = re.split(r'[,•\n|]', skills_section)
+        items = SKILL_ITEM_SEPARATORS.split(skills_section)
         
         # Process each item that might be a skill
         for item in items:
@@ -575,101 +633,51 @@ def extract_skills(text):
                 continue
                 
             # Check if this item matches any of our known skills
-            for pattern, skill_name in all_skills.items():
-                if re.search(r'\b' + pattern + r'\b', item, re.IGNORECASE):
-                    if skill_name not in found_skills:
-                        found_skills.append(skill_name)
+            for skill_name in find_catalog_skills(item):
+                if skill_name not in found_skills:
+                    found_skills.append(skill_name)
     
     # Search the entire text for additional skills that might not be in the skills section
-    text_lower = text.lower()
-    for pattern, skill_name in all_skills.items():
-        if re.search(r'\b' + pattern + r'\b', text_lower, re.IGNORECASE):
-            if skill_name not in found_skills:
-                found_skills.append(skill_name)
+    text_lower = doc.lower
+    for skill_name in find_catalog_skills(text_lower):
+        if skill_name not in found_skills:
+            found_skills.append(skill_name)
     
     # Also check for additional skills commonly found in tech CVs but that might have variations
-    additional_patterns = [
-        (r'\bui/ux\b|\buser\s+interface\b|\buser\s+experience\b', "UI/UX Design"),
-        (r'\bresponsive\s+design\b|\bmobile\s+first\b', "Responsive Design"),
-        (r'\bcloud\s+computing\b|\bcloud\s+architecture\b', "Cloud Computing"),
-        (r'\brestful\s+api|\brest\s+api\b|\bapi\s+development\b', "RESTful APIs"),
-        (r'\bmicro[-\s]?services\b', "Microservices"),
-        (r'\bagile\s+development\b|\bagile\s+methodology\b', "Agile Development"),
-        (r'\bdevops\b', "DevOps"),
-        (r'\bci/cd\b|\bcontinuous\s+integration\b|\bcontinuous\s+deployment\b', "CI/CD"),
-        (r'\btdd\b|\btest[-\s]driven\s+development\b', "Test-Driven Development"),
-        (r'\bsecurity\b|\bcyber[-\s]?security\b|\bapplication\s+security\b', "Security"),
-        (r'\bdatabase\s+design\b|\bdatabase\s+management\b', "Database Design"),
-        (r'\bdata\s+modeling\b|\bentity\s+relationship\b', "Data Modeling"),
-        (r'\bbig\s+data\b', "Big Data"),
-        (r'\bdata\s+warehousing\b|\bdata\s+lake\b', "Data Warehousing"),
-        (r'\bsoftware\s+architecture\b|\bsystem\s+design\b', "Software Architecture"),
-        (r'\bobject[-\s]?oriented\s+programming\b|\boop\b', "Object-Oriented Programming"),
-        (r'\bfunctional\s+programming\b', "Functional Programming"),
-        (r'\bsystem\s+administration\b|\bsysadmin\b', "System Administration"),
-        (r'\bnetworking\b|\bnetwork\s+security\b', "Networking"),
-    ]
-    
-    for pattern, skill_name in additional_patterns:
-        if re.search(pattern, text_lower, re.IGNORECASE):
+    for pattern, skill_name in ADDITIONAL_SKILL_PATTERNS:
+        if pattern.search(text_lower):
             if skill_name not in found_skills:
                 found_skills.append(skill_name)
     
     # If we didn't find any skills, return a generic placeholder
     return found_skills if found_skills else ["Skills extraction requires full API"]
 
+# Section headers (in priority order) and the headers that end each section
+EDUCATION_HEADERS = ["education", "academic background", "academic qualifications",
+                     "qualifications", "educational history"]
+EDUCATION_END_HEADERS = ["experience", "employment history", "work history", "skills", "projects",
+                         "achievements", "interests", "certifications", "publications"]
+
+EXPERIENCE_HEADERS = [("experience", "work experience"), "employment history", "work history",
+                      "professional experience", "career history"]
+EXPERIENCE_END_HEADERS = ["education", "skills", "projects", "achievements", "interests",
+                          "hobbies", "certifications", "references"]
+
+PROJECT_HEADERS = ["projects", "personal projects", "portfolio", "project experience",
+                   "key projects", "recent projects", "selected projects"]
+PROJECT_END_HEADERS = ["skills", "education", "experience", "work experience", "interests",
+                       "hobbies", "certifications", "references", "publications"]
+
 def extract_education(text):
     """Extract education information from the CV"""
     import re
     
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
-    education_section = ""
+    # Reuse the shared segmentation instead of rescanning the text for headers
+    doc = CVDocument.from_text(text)
+    text, text_lower = doc.text, doc.lower
     
     # Look for common education section headers with better boundary detection
-    section_patterns = [
-        r'(?:^|\n)\s*education\s*(?::|$)',
-        r'(?:^|\n)\s*academic background\s*(?::|$)',
-        r'(?:^|\n)\s*academic qualifications\s*(?::|$)',
-        r'(?:^|\n)\s*qualifications\s*(?::|$)',
-        r'(?:^|\n)\s*educational history\s*(?::|$)'
-    ]
-    
-    # Try to identify an education section with more accurate boundaries
-    for pattern in section_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
-        if match:
-            # Get the start position of the section
-            start_pos = match.end()
-            
-            # Find the next section header to determine the end of the education section
-            end_patterns = [
-                r'(?:^|\n)\s*experience\s*(?::|$)',
-                r'(?:^|\n)\s*employment history\s*(?::|$)',
-                r'(?:^|\n)\s*work history\s*(?::|$)',
-                r'(?:^|\n)\s*skills\s*(?::|$)',
-                r'(?:^|\n)\s*projects\s*(?::|$)',
-                r'(?:^|\n)\s*achievements\s*(?::|$)',
-                r'(?:^|\n)\s*interests\s*(?::|$)',
-                r'(?:^|\n)\s*certifications\s*(?::|$)',
-                r'(?:^|\n)\s*publications\s*(?::|$)'
-            ]
-            
-            # Find all potential next section headers
-            end_matches = [(p, re.search(p, text_lower[start_pos:], re.IGNORECASE)) for p in end_patterns]
-            valid_end_matches = [(p, m) for p, m in end_matches if m]
-            
-            if valid_end_matches:
-                # Find the closest next section (minimum start position)
-                closest_match = min(valid_end_matches, key=lambda x: x[1].start())
-                end_pos = start_pos + closest_match[1].start()
-                education_section = text[start_pos:end_pos].strip()
-            else:
-                # If no next section, take the rest of the text (with a reasonable limit)
-                end_pos = min(start_pos + 1000, len(text))  # Limit to 1000 chars if no next section
-                education_section = text[start_pos:end_pos].strip()
-            
-            break
+    education_section = doc.section(EDUCATION_HEADERS, EDUCATION_END_HEADERS, 1000)
     
     # If we didn't find a clearly marked section, look for educational keywords in the whole text
     if not education_section:
@@ -788,54 +796,12 @@ def extract_experience(text):
     """Extract work experience information from the CV"""
     import re
     
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
-    experience_section = ""
+    # Reuse the shared segmentation instead of rescanning the text for headers
+    doc = CVDocument.from_text(text)
+    text, text_lower = doc.text, doc.lower
     
     # Look for common experience section headers with better boundary detection
-    section_patterns = [
-        r'(?:^|\n)\s*(?:work\s+)?experience\s*(?::|$)',
-        r'(?:^|\n)\s*employment history\s*(?::|$)',
-        r'(?:^|\n)\s*work history\s*(?::|$)',
-        r'(?:^|\n)\s*professional experience\s*(?::|$)',
-        r'(?:^|\n)\s*work experience\s*(?::|$)',
-        r'(?:^|\n)\s*career history\s*(?::|$)'
-    ]
-    
-    # Try to identify an experience section
-    for pattern in section_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            # Get the start position of the section
-            start_pos = match.end()
-            
-            # Find the next section header to determine the end
-            end_patterns = [
-                r'(?:^|\n)\s*education\s*(?::|$)',
-                r'(?:^|\n)\s*skills\s*(?::|$)',
-                r'(?:^|\n)\s*projects\s*(?::|$)',
-                r'(?:^|\n)\s*achievements\s*(?::|$)',
-                r'(?:^|\n)\s*interests\s*(?::|$)',
-                r'(?:^|\n)\s*hobbies\s*(?::|$)',
-                r'(?:^|\n)\s*certifications\s*(?::|$)',
-                r'(?:^|\n)\s*references\s*(?::|$)'
-            ]
-            
-            # Find all potential next section headers
-            end_matches = [(p, re.search(p, text_lower[start_pos:], re.IGNORECASE)) for p in end_patterns]
-            valid_end_matches = [(p, m) for p, m in end_matches if m]
-            
-            if valid_end_matches:
-                # Find the closest next section (minimum start position)
-                closest_match = min(valid_end_matches, key=lambda x: x[1].start())
-                end_pos = start_pos + closest_match[1].start()
-                experience_section = text[start_pos:end_pos].strip()
-            else:
-                # If no next section, take the rest of the text (with a reasonable limit)
-                end_pos = min(start_pos + 2000, len(text))  # Limit to 2000 chars if no next section
-                experience_section = text[start_pos:end_pos].strip()
-            
-            break
+    experience_section = doc.section(EXPERIENCE_HEADERS, EXPERIENCE_END_HEADERS, 2000)
     
     # If no clear section was found but we have a whole document, try to find experience by keywords
     if not experience_section and len(text) > 100:
@@ -1000,56 +966,12 @@ def extract_projects(text):
     """Extract project information from the CV"""
     import re
     
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
-    project_section = ""
+    # Reuse the shared segmentation instead of rescanning the text for headers
+    doc = CVDocument.from_text(text)
+    text, text_lower = doc.text, doc.lower
     
     # Look for common project section headers with better boundary detection
-    section_patterns = [
-        r'(?:^|\n)\s*projects\s*(?::|$)', 
-        r'(?:^|\n)\s*personal projects\s*(?::|$)', 
-        r'(?:^|\n)\s*portfolio\s*(?::|$)', 
-        r'(?:^|\n)\s*project experience\s*(?::|$)',
-        r'(?:^|\n)\s*key projects\s*(?::|$)',
-        r'(?:^|\n)\s*recent projects\s*(?::|$)',
-        r'(?:^|\n)\s*selected projects\s*(?::|$)'
-    ]
-    
-    # Try to identify a projects section with more accurate boundaries
-    for pattern in section_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            # Get the start position of the section
-            start_pos = match.end()
-            
-            # Find the next section header to determine the end
-            end_patterns = [
-                r'(?:^|\n)\s*skills\s*(?::|$)',
-                r'(?:^|\n)\s*education\s*(?::|$)',
-                r'(?:^|\n)\s*experience\s*(?::|$)',
-                r'(?:^|\n)\s*work\s+experience\s*(?::|$)',
-                r'(?:^|\n)\s*interests\s*(?::|$)',
-                r'(?:^|\n)\s*hobbies\s*(?::|$)',
-                r'(?:^|\n)\s*certifications\s*(?::|$)',
-                r'(?:^|\n)\s*references\s*(?::|$)',
-                r'(?:^|\n)\s*publications\s*(?::|$)'
-            ]
-            
-            # Find all potential next section headers
-            end_matches = [(p, re.search(p, text_lower[start_pos:], re.IGNORECASE)) for p in end_patterns]
-            valid_end_matches = [(p, m) for p, m in end_matches if m]
-            
-            if valid_end_matches:
-                # Find the closest next section (minimum start position)
-                closest_match = min(valid_end_matches, key=lambda x: x[1].start())
-                end_pos = start_pos + closest_match[1].start()
-                project_section = text[start_pos:end_pos].strip()
-            else:
-                # If no next section, take the rest of the text (with a reasonable limit)
-                end_pos = min(start_pos + 1500, len(text))  # Limit to 1500 chars if no next section
-                project_section = text[start_pos:end_pos].strip()
-            
-            break
+    project_section = doc.section(PROJECT_HEADERS, PROJECT_END_HEADERS, 1500)
     
     # If no dedicated project section, look for project indicators throughout the document
     if not project_section:
@@ -1194,28 +1116,29 @@ def extract_interests(text):
     """Extract potential interests or hobbies"""
     import re
     
-    text_lower = text.lower()
+    doc = CVDocument.from_text(text)
+    text_lower = doc.lower
     interests_section = ""
     
     # Look for common section headers for interests
     patterns = ["interests", "hobbies", "activities", "personal interests"]
     for pattern in patterns:
-        if pattern in text_lower:
+        index = text_lower.find(pattern)
+        if index != -1:
             # Get text after the pattern
-            parts = text_lower.split(pattern, 1)
-            if len(parts) > 1:
-                # Find the end of the section (next heading or large gap)
-                section_text = parts[1]
-                # Check for common ending patterns (next section)
-                end_patterns = ["skills", "education", "experience", "projects", "references"]
-                
-                for end_pattern in end_patterns:
-                    if end_pattern in section_text:
-                        # Cut at next section
-                        section_text = section_text.split(end_pattern, 1)[0]
-                        
-                interests_section = section_text.strip()
-                break
+            start = index + len(pattern)
+            end = len(text_lower)
+            # Check for common ending patterns (next section)
+            end_patterns = ["skills", "education", "experience", "projects", "references"]
+            
+            for end_pattern in end_patterns:
+                end_index = text_lower.find(end_pattern, start, end)
+                if end_index != -1:
+                    # Cut at next section
+                    end = end_index
+                    
+            interests_section = text_lower[start:end].strip()
+            break
     
     # If found, extract interests
     if interests_section:
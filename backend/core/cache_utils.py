@@ -1,51 +1,424 @@
 """
 Simple caching mechanism for CV parsing results to avoid redundant API calls.
+
+Entries live in CACHE_DIR as zstd-compressed orjson files, sharded two levels deep
+by a hash of the key (cache/ab/cd/<key>.zst) and written atomically through a
+temporary file and os.replace. Entries in the old flat layout (cache/<key>.json)
+are still read and are migrated on access or by migrate_legacy_cache.
+
+A bounded in-memory LRU sits in front of the directory so repeated lookups of hot
+entries do not touch the filesystem, and a periodic compaction removes expired
+entries and keeps the directory within CACHE_MAX_BYTES / CACHE_MAX_ENTRIES.
 """
+import asyncio
 import os
 import json
 import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
+import orjson
+import zstandard
+
 CACHE_DIR = "cache"
 CACHE_EXPIRY_DAYS = 7
 
-def ensure_cache_dir():
-    """Ensure the cache directory exists."""
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+# Extension of entries in the sharded layout and of the legacy flat layout
+CACHE_SUFFIX = ".zst"
+LEGACY_SUFFIX = ".json"
+TEMP_SUFFIX = ".tmp"
+# zstd compression level of cache entries
+CACHE_COMPRESSION_LEVEL = int(os.getenv("CACHE_COMPRESSION_LEVEL", "3"))
+# Temporary files older than this (seconds) are left over from interrupted writes
+STALE_TEMP_SECONDS = 3600
+
+# Limits of the cache directory, enforced by compact_cache
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+# Seconds between compactions of the cache directory
+CACHE_COMPACT_INTERVAL = int(os.getenv("CACHE_COMPACT_INTERVAL", "3600"))
+
+# Limits of the in-memory tier (entries are sized by their serialized length)
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "256"))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# key -> (orjson payload, time the entry was written); most recently used last
+memory_cache = OrderedDict()
+memory_cache_bytes = 0
+memory_cache_lock = threading.Lock()
+# Shard directories known to exist
+ready_shards = set()
+# zstd contexts are not thread-safe, so each thread keeps its own
+zstd_contexts = threading.local()
+# Set once migrate_legacy_cache has run, after which misses skip the legacy lookup
+legacy_cache_migrated = False
+
+# Hit/miss counters per tier; lookups run on worker threads, so they are updated under a lock
+cache_stats = {
+    "memory": {"hits": 0, "misses": 0},
+    "disk": {"hits": 0, "misses": 0},
+}
+cache_stats_lock = threading.Lock()
+
+# Outcome of the most recent compaction
+last_compaction = {}
+
+# Version of the cached LangGraph workflow results. Bump it whenever WorkflowState or
+# the responses built from it change shape; entries of other versions are ignored.
+WORKFLOW_CACHE_VERSION = 1
+
+def ensure_cache_dir(path=None):
+    """Ensure the cache directory (or one of its shard directories) exists."""
+    path = path or CACHE_DIR
+    if path not in ready_shards:
+        os.makedirs(path, exist_ok=True)
+        ready_shards.add(path)
 
 def get_cache_key(text):
     """Generate a unique cache key for the text content."""
     return hashlib.md5(text.encode()).hexdigest()
 
-def get_from_cache(key):
-    """Retrieve cached data if it exists and is not expired."""
-    ensure_cache_dir()
-    cache_file = os.path.join(CACHE_DIR, f"{key}.json")
-    
-    if not os.path.exists(cache_file):
+def get_shard_dir(key):
+    """Return the two-level shard directory of a cache key."""
+    shard = hashlib.blake2b(key.encode(), digest_size=2).hexdigest()
+    return os.path.join(CACHE_DIR, shard[:2], shard[2:])
+
+def get_cache_path(key):
+    """Return the path of a cache entry in the sharded layout."""
+    return os.path.join(get_shard_dir(key), f"{key}{CACHE_SUFFIX}")
+
+def encode_entry(data):
+    """Serialize data with orjson (raises TypeError if it is not JSON serializable)."""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+def compress(payload):
+    """Compress a payload, reusing this thread's zstd context."""
+    compressor = getattr(zstd_contexts, "compressor", None)
+    if compressor is None:
+        compressor = zstd_contexts.compressor = zstandard.ZstdCompressor(level=CACHE_COMPRESSION_LEVEL)
+    return compressor.compress(payload)
+
+def decompress(blob):
+    """Decompress a payload, reusing this thread's zstd context."""
+    decompressor = getattr(zstd_contexts, "decompressor", None)
+    if decompressor is None:
+        decompressor = zstd_contexts.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(blob)
+
+def is_expired(saved_at):
+    """Check whether an entry written at saved_at (epoch seconds) has expired."""
+    return datetime.now() - datetime.fromtimestamp(saved_at) > timedelta(days=CACHE_EXPIRY_DAYS)
+
+def remember(key, payload, saved_at):
+    """Put a serialized payload into the memory tier, evicting least recently used entries."""
+    global memory_cache_bytes
+    size = len(payload)
+    if size > MEMORY_CACHE_MAX_BYTES:
+        return
+    with memory_cache_lock:
+        old = memory_cache.pop(key, None)
+        if old is not None:
+            memory_cache_bytes -= len(old[0])
+        memory_cache[key] = (payload, saved_at)
+        memory_cache_bytes += size
+        while len(memory_cache) > MEMORY_CACHE_MAX_ENTRIES or memory_cache_bytes > MEMORY_CACHE_MAX_BYTES:
+            _, (evicted, _) = memory_cache.popitem(last=False)
+            memory_cache_bytes -= len(evicted)
+
+def forget(key):
+    """Drop an entry from the memory tier."""
+    global memory_cache_bytes
+    with memory_cache_lock:
+        old = memory_cache.pop(key, None)
+        if old is not None:
+            memory_cache_bytes -= len(old[0])
+
+def count_lookup(tier, outcome):
+    """Add one hit or miss to a tier's counters."""
+    with cache_stats_lock:
+        cache_stats[tier][outcome] += 1
+
+def get_from_memory(key):
+    """Return the serialized payload for key from the memory tier, or None."""
+    with memory_cache_lock:
+        entry = memory_cache.get(key)
+        if entry is not None:
+            memory_cache.move_to_end(key)
+    if entry is None:
+        count_lookup("memory", "misses")
         return None
-        
-    # Check if cache is expired
-    mod_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
-    if datetime.now() - mod_time > timedelta(days=CACHE_EXPIRY_DAYS):
-        # Cache expired
+    payload, saved_at = entry
+    if is_expired(saved_at):
+        forget(key)
+        count_lookup("memory", "misses")
         return None
-        
+    count_lookup("memory", "hits")
+    return payload
+
+def read_entry(path):
+    """
+    Read a cache file in either layout.
+
+    Returns:
+        tuple: (orjson payload, mtime), or None if the file is missing or expired
+
+    Raises:
+        ValueError, zstandard.ZstdError: If the file is corrupt
+    """
     try:
-        with open(cache_file, 'r') as f:
-            return json.load(f)
-    except:
+        with open(path, 'rb') as f:
+            saved_at = os.fstat(f.fileno()).st_mtime
+            # Check if cache is expired
+            if is_expired(saved_at):
+                return None
+            blob = f.read()
+    except OSError:
         return None
+    if path.endswith(LEGACY_SUFFIX):
+        # Re-encode legacy JSON so both layouts share one payload format
+        return encode_entry(json.loads(blob)), saved_at
+    return decompress(blob), saved_at
+
+def write_entry(key, payload, saved_at=None):
+    """Atomically write a serialized payload to its sharded path."""
+    shard_dir = get_shard_dir(key)
+    ensure_cache_dir(shard_dir)
+    fd, temp_path = tempfile.mkstemp(dir=shard_dir, suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(compress(payload))
+        if saved_at is not None:
+            os.utime(temp_path, (time.time(), saved_at))
+        os.replace(temp_path, get_cache_path(key))
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def migrate_entry(key, payload, saved_at, legacy_path):
+    """Move a legacy entry to the sharded layout, keeping its age."""
+    try:
+        write_entry(key, payload, saved_at)
+        os.remove(legacy_path)
+    except OSError as e:
+        print(f"Could not migrate cache entry {key}: {e}")
+
+def get_from_cache(key):
+    """Retrieve cached data if it exists and is not expired."""
+    payload = get_from_memory(key)
+    if payload is not None:
+        return orjson.loads(payload)
+
+    cache_file = get_cache_path(key)
+    legacy_file = os.path.join(CACHE_DIR, f"{key}{LEGACY_SUFFIX}")
+    # The file the entry is being read from, so a corrupt one is the one removed
+    source_file = cache_file
+    try:
+        entry = read_entry(cache_file)
+        if entry is None and not legacy_cache_migrated and os.path.exists(legacy_file):
+            source_file = legacy_file
+            entry = read_entry(legacy_file)
+            if entry is not None:
+                migrate_entry(key, entry[0], entry[1], legacy_file)
+        if entry is None:
+            count_lookup("disk", "misses")
+            return None
+        payload, saved_at = entry
+        data = orjson.loads(payload)
+    except (ValueError, TypeError, zstandard.ZstdError) as e:
+        print(f"Discarding corrupt cache entry {key}: {e}")
+        remove_cache_file(source_file, key)
+        count_lookup("disk", "misses")
+        return None
+
+    # Record the access for compaction (keeping the mtime used for expiry) and
+    # promote the entry so the next lookup is served from memory
+    count_lookup("disk", "hits")
+    try:
+        os.utime(cache_file, (time.time(), saved_at))
+    except OSError:
+        pass
+    remember(key, payload, saved_at)
+    return data
 
 def save_to_cache(key, data):
     """Save data to cache."""
-    ensure_cache_dir()
-    cache_file = os.path.join(CACHE_DIR, f"{key}.json")
-    
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(data, f)
+        payload = encode_entry(data)
+    except TypeError:
+        return False
+
+    try:
+        write_entry(key, payload)
+    except OSError as e:
+        # The directory may have been removed since it was created
+        print(f"Could not write cache entry {key}: {e}")
+        ready_shards.clear()
+        forget(key)
+        return False
+
+    remember(key, payload, time.time())
+    return True
+
+def scan_cache_files():
+    """Yield a DirEntry for every file in the sharded layout, including temporary files."""
+    for level1 in os.scandir(CACHE_DIR):
+        if not level1.is_dir():
+            continue
+        for level2 in os.scandir(level1.path):
+            if not level2.is_dir():
+                continue
+            yield from os.scandir(level2.path)
+
+def migrate_legacy_cache():
+    """
+    Move every entry of the flat legacy layout (cache/<key>.json) to the sharded layout.
+
+    Expired and unreadable legacy files are deleted.
+
+    Returns:
+        int: Number of entries migrated
+    """
+    global legacy_cache_migrated
+    migrated = 0
+    try:
+        legacy_files = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(LEGACY_SUFFIX)]
+    except OSError:
+        return 0
+    for entry in legacy_files:
+        key = entry.name[:-len(LEGACY_SUFFIX)]
+        try:
+            migrated_entry = read_entry(entry.path)
+        except (ValueError, TypeError):
+            migrated_entry = None
+        if migrated_entry is None:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            continue
+        migrate_entry(key, migrated_entry[0], migrated_entry[1], entry.path)
+        migrated += 1
+    legacy_cache_migrated = True
+    return migrated
+
+def get_workflow_cache_key(text, fan_out=False):
+    """Generate the cache key of a workflow run for the CV text, including the schema version and mode."""
+    mode = "fanout-" if fan_out else ""
+    return f"workflow-v{WORKFLOW_CACHE_VERSION}-{mode}{get_cache_key(text)}"
+
+def get_workflow_from_cache(text, fan_out=False):
+    """Retrieve the cached WorkflowState of a run over the CV text in the given mode, if any."""
+    entry = get_from_cache(get_workflow_cache_key(text, fan_out))
+    if not isinstance(entry, dict) or entry.get("version") != WORKFLOW_CACHE_VERSION:
+        return None
+    return {**entry["state"], "raw_cv": text}
+
+def save_workflow_to_cache(text, state, fan_out=False):
+    """Save the final WorkflowState of a run over the CV text (the CV itself is not stored)."""
+    return save_to_cache(get_workflow_cache_key(text, fan_out), {
+        "version": WORKFLOW_CACHE_VERSION,
+        "state": {field: value for field, value in state.items() if field != "raw_cv"},
+    })
+
+def compact_cache(max_bytes=CACHE_MAX_BYTES, max_entries=CACHE_MAX_ENTRIES):
+    """
+    Delete expired cache files, then least recently used ones until the directory fits the limits.
+
+    Files are ranked by last access time; entries held in the memory tier count as
+    the most recently used. Temporary files left behind by interrupted writes are
+    removed as well.
+
+    Returns:
+        dict: Number of files removed and the entries/bytes left in the directory
+    """
+    entries = []
+    removed = 0
+    now = time.time()
+    try:
+        scan = list(scan_cache_files())
+    except OSError:
+        scan = []
+    with memory_cache_lock:
+        hot = set(memory_cache)
+
+    for entry in scan:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        if entry.name.endswith(TEMP_SUFFIX):
+            if now - stat.st_mtime > STALE_TEMP_SECONDS and remove_cache_file(entry.path):
+                removed += 1
+            continue
+        if not entry.name.endswith(CACHE_SUFFIX):
+            continue
+        key = entry.name[:-len(CACHE_SUFFIX)]
+        if is_expired(stat.st_mtime):
+            if remove_cache_file(entry.path, key):
+                removed += 1
+            continue
+        entries.append((key in hot, max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path, key))
+
+    entries.sort()
+    total_bytes = sum(entry[2] for entry in entries)
+    index = 0
+    while (len(entries) - index > max_entries or total_bytes > max_bytes) and index < len(entries):
+        _, _, size, path, key = entries[index]
+        index += 1
+        if remove_cache_file(path, key):
+            removed += 1
+            total_bytes -= size
+
+    result = {"removed": removed, "entries": len(entries) - index, "bytes": total_bytes, "at": time.time()}
+    last_compaction.clear()
+    last_compaction.update(result)
+    return result
+
+def remove_cache_file(path, key=None):
+    """Delete one cache file and its memory tier entry."""
+    if key is not None:
+        forget(key)
+    try:
+        os.remove(path)
         return True
-    except:
-        return False
\ No newline at end of file
+    except OSError:
+        return False
+
+async def run_cache_compaction(interval=CACHE_COMPACT_INTERVAL):
+    """
+    Migrate legacy entries, then compact the cache directory now and every interval seconds.
+
+    Meant to run as a background task for the lifetime of the app; the scans run on
+    a worker thread so they never block request handling.
+    """
+    try:
+        migrated = await asyncio.to_thread(migrate_legacy_cache)
+        if migrated:
+            print(f"Migrated {migrated} legacy cache entries to the sharded layout")
+    except Exception as e:
+        print(f"Cache migration failed: {e}")
+    while True:
+        try:
+            result = await asyncio.to_thread(compact_cache)
+            print(f"Cache compaction removed {result['removed']} entries, "
+                  f"{result['entries']} entries ({result['bytes']} bytes) remain")
+        except Exception as e:
+            print(f"Cache compaction failed: {e}")
+        await asyncio.sleep(interval)
+
+def get_cache_stats():
+    """Return hit/miss counters per tier, the memory tier's current size and the last compaction."""
+    with memory_cache_lock:
+        entries, size = len(memory_cache), memory_cache_bytes
+    with cache_stats_lock:
+        memory, disk = dict(cache_stats["memory"]), dict(cache_stats["disk"])
+    return {
+        "memory": {**memory, "entries": entries, "bytes": size},
+        "disk": {**disk, "last_compaction": dict(last_compaction)},
+    }
@@ -0,0 +1,125 @@
+"""
+CV document segmentation shared by the fallback extractors.
+
+The fallback extractors in ai_helpers all need the lowercased CV text and the
+positions of the usual section headers ("Education:", "Skills:", ...). A
+CVDocument computes both once, in a single scan, so a fallback parse no longer
+rescans the whole document for every extractor.
+"""
+
+import re
+
+# Section headers recognised at the start of a line and followed by a colon
+# (or the end of the text). Keys are header names, values are regex fragments.
+SECTION_HEADERS = {
+    "education": r"education",
+    "academic background": r"academic background",
+    "academic qualifications": r"academic qualifications",
+    "qualifications": r"qualifications",
+    "educational history": r"educational history",
+    "experience": r"experience",
+    "work experience": r"work\s+experience",
+    "professional experience": r"professional experience",
+    "employment history": r"employment history",
+    "work history": r"work history",
+    "career history": r"career history",
+    "skills": r"skills",
+    "projects": r"projects",
+    "personal projects": r"personal projects",
+    "project experience": r"project experience",
+    "key projects": r"key projects",
+    "recent projects": r"recent projects",
+    "selected projects": r"selected projects",
+    "portfolio": r"portfolio",
+    "achievements": r"achievements",
+    "interests": r"interests",
+    "hobbies": r"hobbies",
+    "certifications": r"certifications",
+    "publications": r"publications",
+    "references": r"references",
+}
+
+HEADER_GROUPS = {f"h{i}": header for i, header in enumerate(SECTION_HEADERS)}
+
+HEADER_ALTERNATION = "|".join(
+    f"(?P<{group}>{SECTION_HEADERS[header]})" for group, header in HEADER_GROUPS.items()
+)
+
+# All section headers in one pass over the lowercased text
+SECTION_HEADER_REGEX = re.compile(r"(?:^|\n)\s*(?:" + HEADER_ALTERNATION + r")\s*(?::|$)")
+
+# A header directly at a given offset (used at the start of a section body)
+HEADER_AT_REGEX = re.compile(r"\s*(?:" + HEADER_ALTERNATION + r")\s*(?::|$)")
+
+
+class CVDocument:
+    """
+    A CV's text, normalised and segmented once for all fallback extractors.
+
+    Attributes:
+        text (str): The original CV text
+        lower (str): The lowercased text used for case-insensitive searches
+        sections (dict): Header name -> list of (start, end) spans of that header, in order
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+        self.lower = self.text.lower()
+
+        self.sections = {}
+        for match in SECTION_HEADER_REGEX.finditer(self.lower):
+            header = HEADER_GROUPS[match.lastgroup]
+            self.sections.setdefault(header, []).append((match.start(), match.end()))
+
+    @classmethod
+    def from_text(cls, text):
+        """Return text unchanged if it is already a CVDocument, otherwise segment it."""
+        return text if isinstance(text, cls) else cls(text)
+
+    def find_header(self, headers, start=0):
+        """Return the first (start, end) span of any of the given headers at or after start."""
+        spans = [
+            span
+            for header in headers
+            for span in self.sections.get(header, [])
+            if span[0] >= start
+        ]
+        return min(spans) if spans else None
+
+    def section(self, start_headers, end_headers, limit):
+        """
+        Return the body of the first matching section, or "" if there is none.
+
+        Args:
+            start_headers (list): Header names in priority order; a tuple groups
+                headers that are equally preferred
+            end_headers (list): Header names that close the section
+            limit (int): Maximum body length when no closing header follows
+
+        Returns:
+            str: The stripped section body from the original text
+        """
+        for headers in start_headers:
+            if isinstance(headers, str):
+                headers = (headers,)
+            span = self.find_header(headers)
+            if not span:
+                continue
+
+            start_pos = span[1]
+
+            # A closing header may directly follow the opening one on the same line
+            match = HEADER_AT_REGEX.match(self.lower, start_pos)
+            if match and HEADER_GROUPS[match.lastgroup] in end_headers:
+                end_pos = start_pos
+            else:
+                end_span = self.find_header(end_headers, start_pos)
+                if end_span:
+                    end_pos = end_span[0]
+                else:
+                    # If no next section, take the rest of the text (with a reasonable limit)
+                    end_pos = min(start_pos + limit, len(self.text))
+
+            return self.text[start_pos:end_pos].strip()
+
+        return ""
@@ -0,0 +1,267 @@
+"""
+Compaction of CV text before it is pasted into a Gemini prompt.
+
+Text extracted from PDFs and DOCX files is full of noise: runs of spaces and
+blank lines, page numbers, and page headers and footers repeated on every page.
+All of it is sent to Gemini and billed as input tokens, and it slows the call
+down. compact_cv_text normalises the whitespace. Only if the CV is longer than
+CV_PROMPT_TOKEN_BUDGET tokens does it remove the page furniture, found at the
+page breaks (form feeds) of the extracted text, and if that is not enough, cut
+the least important sections first (references and hobbies before experience
+and skills). The contact details at the top of the CV are never cut.
+
+Every compaction is logged with its input and output size, and the totals are
+reported by get_prompt_compaction_stats.
+"""
+
+import collections
+import os
+import re
+from typing import Any, Deque, Dict, List, Tuple
+
+from .cv_document import CVDocument
+
+# Estimated tokens of CV text sent per prompt; longer CVs lose their least important sections (0 disables the cut)
+CV_PROMPT_TOKEN_BUDGET = int(os.getenv("CV_PROMPT_TOKEN_BUDGET", "6000"))
+# Rough characters per Gemini token for English text, used to estimate token counts
+CHARS_PER_TOKEN = 4
+# Lines at the top or bottom of each page checked for page headers and footers
+PAGE_FURNITURE_MAX_LINES = 3
+# Recent compactions kept for get_prompt_compaction_stats
+RECENT_COMPACTIONS = 20
+
+# Marks the place where a section was cut
+TRUNCATION_MARKER = "[...]"
+
+# Section priority when cutting to the budget; higher numbers are cut first
+SECTION_PRIORITY = {
+    "experience": 1,
+    "work experience": 1,
+    "professional experience": 1,
+    "employment history": 1,
+    "work history": 1,
+    "career history": 1,
+    "skills": 1,
+    "education": 2,
+    "academic background": 2,
+    "academic qualifications": 2,
+    "qualifications": 2,
+    "educational history": 2,
+    "projects": 3,
+    "personal projects": 3,
+    "project experience": 3,
+    "key projects": 3,
+    "recent projects": 3,
+    "selected projects": 3,
+    "portfolio": 3,
+    "certifications": 4,
+    "achievements": 4,
+    "publications": 5,
+    "interests": 6,
+    "hobbies": 6,
+    "references": 7,
+}
+# Priority of text under a header this module does not know
+DEFAULT_SECTION_PRIORITY = 4
+
+# Unicode spaces and tabs become plain spaces; zero-width characters are removed
+SPACE_REGEX = re.compile(r"[\t\u00a0\u1680\u2000-\u200a\u202f\u205f\u3000]+")
+ZERO_WIDTH_REGEX = re.compile(r"[\u200b-\u200d\u2060\ufeff]")
+MULTIPLE_SPACES_REGEX = re.compile(r" {2,}")
+DIGITS_REGEX = re.compile(r"\d+")
+# Lines that are only a page number, e.g. "Page 2", "Page 2 of 3", "2/3" or "- 2 -"
+PAGE_ARTEFACT_REGEX = re.compile(
+    r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|[-\u2013\u2014]?\s*\d{1,3}\s*[-\u2013\u2014]?)$",
+    re.IGNORECASE,
+)
+
+compaction_stats = {"requests": 0, "input_chars": 0, "output_chars": 0, "furniture_lines": 0, "truncated": 0}
+recent_compactions: Deque[Dict[str, Any]] = collections.deque(maxlen=RECENT_COMPACTIONS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of Gemini tokens of text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def normalize_cv_text(text: str) -> List[List[str]]:
+    """
+    Normalise whitespace and split text into pages of lines.
+
+    Lines are stripped, runs of spaces collapsed and runs of blank lines reduced
+    to one; pages start at form feeds and have no blank lines at either end. No
+    text is removed.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\v", "\n")
+    text = ZERO_WIDTH_REGEX.sub("", SPACE_REGEX.sub(" ", text))
+
+    pages = []
+    for page in text.split("\f"):
+        lines: List[str] = []
+        for line in page.split("\n"):
+            line = MULTIPLE_SPACES_REGEX.sub(" ", line.strip())
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        if lines and not lines[-1]:
+            lines.pop()
+        if lines:
+            pages.append(lines)
+    return pages
+
+
+def join_pages(pages: List[List[str]]) -> str:
+    """Join pages of lines into text, a line break between pages."""
+    return "\n".join("\n".join(lines) for lines in pages if lines)
+
+
+def furniture_key(line: str) -> str:
+    """Return the key under which a line repeated on every page matches, whatever its page number."""
+    return DIGITS_REGEX.sub("#", line.casefold())
+
+
+def remove_page_furniture(pages: List[List[str]]) -> int:
+    """
+    Remove page numbers and repeated page headers and footers from pages, in place.
+
+    Only the first and last PAGE_FURNITURE_MAX_LINES lines of a page are looked at.
+    A line there is removed if it is only a page number, or if the same line (up to
+    its numbers) is at the same end of every page; the first page may lack it, as
+    it often has the CV's own heading instead. The top of the first page is kept,
+    so a header that repeats the CV's heading leaves that heading in place.
+
+    Returns:
+        int: Number of lines removed
+    """
+    if len(pages) < 2:
+        return 0
+    required = max(2, len(pages) - 1)
+    first_page = list(pages[0])
+    removed = 0
+    for edge in (0, -1):
+        for _ in range(PAGE_FURNITURE_MAX_LINES):
+            keys = [furniture_key(lines[edge]) if lines else None for lines in pages]
+            counts = collections.Counter(key for key in keys if key is not None)
+            repeated = {key for key, count in counts.items() if count >= required}
+            dropped = 0
+            for lines, key in zip(pages, keys):
+                if lines and (key in repeated or PAGE_ARTEFACT_REGEX.match(lines[edge])):
+                    del lines[edge]
+                    # A blank line left at the page's end goes with the line
+                    if lines and not lines[edge]:
+                        del lines[edge]
+                    dropped += 1
+            if not dropped:
+                break
+            removed += dropped
+        if edge == 0:
+            restored = first_page[:len(first_page) - len(pages[0])]
+            pages[0][:0] = restored
+            removed -= len([line for line in restored if line])
+    return removed
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split text at its section headers into (header name, text) pairs; the text before the first header has no name."""
+    document = CVDocument(text)
+    if len(document.lower) != len(text):
+        # Lowercasing changed the length, so header offsets do not map back onto text
+        return [("", text)]
+    spans = sorted((span[0], header) for header, header_spans in document.sections.items() for span in header_spans)
+    sections = []
+    start, name = 0, ""
+    for offset, header in spans:
+        if offset > start:
+            sections.append((name, text[start:offset]))
+        start, name = offset, header
+    sections.append((name, text[start:]))
+    return [(name, body) for name, body in sections if body.strip()]
+
+
+def cut_to_budget(text: str, budget: int) -> str:
+    """Drop or shorten the lowest-priority sections until text fits into budget tokens."""
+    max_chars = budget * CHARS_PER_TOKEN
+    sections = split_sections(text)
+    bodies = [body for _, body in sections]
+    excess = sum(map(len, bodies)) - max_chars
+
+    # Least important first; among equals, longest first. The text before the first header stays.
+    order = sorted((index for index, (name, _) in enumerate(sections) if name),
+                   key=lambda index: (SECTION_PRIORITY.get(sections[index][0], DEFAULT_SECTION_PRIORITY),
+                                      len(bodies[index])),
+                   reverse=True)
+    for index in order:
+        if excess <= 0:
+            break
+        body = bodies[index]
+        if len(body) <= excess + len(TRUNCATION_MARKER) + 1:
+            bodies[index] = ""
+            excess -= len(body)
+            continue
+        # Keep whole lines where possible, followed by a marker
+        keep = len(body) - excess - len(TRUNCATION_MARKER) - 1
+        cut = body.rfind("\n", 0, keep)
+        kept = body[:cut if cut > 0 else keep].rstrip()
+        bodies[index] = f"{kept}\n{TRUNCATION_MARKER}\n"
+        excess -= len(body) - len(bodies[index])
+
+    compacted = "".join(bodies)
+    if len(compacted) > max_chars:
+        # Only the text before the first header is left and it is too long on its own
+        compacted = compacted[:max_chars - len(TRUNCATION_MARKER) - 1].rstrip() + "\n" + TRUNCATION_MARKER
+    return compacted.strip()
+
+
+def compact_cv_text(cv_text: str, caller: str = "", budget: int = CV_PROMPT_TOKEN_BUDGET) -> str:
+    """
+    Return cv_text compacted for a Gemini prompt, and record the saving.
+
+    Args:
+        cv_text: The CV text as extracted from the document
+        caller: Name of the prompt the text is for, used in the log and the stats
+        budget: Estimated tokens the result may take, or 0 for no limit
+
+    Returns:
+        str: The normalised text; over budget, without page furniture and cut to the budget by section priority
+    """
+    cv_text = cv_text or ""
+    pages = normalize_cv_text(cv_text)
+    compacted = join_pages(pages)
+    furniture_lines = 0
+    truncated = False
+    if budget and estimate_tokens(compacted) > budget:
+        furniture_lines = remove_page_furniture(pages)
+        compacted = join_pages(pages)
+        truncated = estimate_tokens(compacted) > budget
+        if truncated:
+            compacted = cut_to_budget(compacted, budget)
+
+    report = {
+        "caller": caller,
+        "input_chars": len(cv_text),
+        "output_chars": len(compacted),
+        "input_tokens": estimate_tokens(cv_text),
+        "output_tokens": estimate_tokens(compacted),
+        "furniture_lines": furniture_lines,
+        "truncated": truncated,
+    }
+    compaction_stats["requests"] += 1
+    compaction_stats["input_chars"] += report["input_chars"]
+    compaction_stats["output_chars"] += report["output_chars"]
+    compaction_stats["furniture_lines"] += furniture_lines
+    compaction_stats["truncated"] += truncated
+    recent_compactions.append(report)
+    print(f"Compacted CV text for {caller or 'prompt'}: {report['input_chars']} -> {report['output_chars']} chars "
+          f"(~{report['input_tokens']} -> ~{report['output_tokens']} tokens{', truncated' if truncated else ''})")
+    return compacted
+
+
+def get_prompt_compaction_stats() -> Dict[str, Any]:
+    """Return the total input and output size of all compactions, the share saved and the recent compactions."""
+    input_chars = compaction_stats["input_chars"]
+    return {
+        **compaction_stats,
+        "saved_chars": input_chars - compaction_stats["output_chars"],
+        "saved_ratio": round(1 - compaction_stats["output_chars"] / input_chars, 4) if input_chars else 0.0,
+        "token_budget": CV_PROMPT_TOKEN_BUDGET,
+        "recent": list(recent_compactions),
+    }
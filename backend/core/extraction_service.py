@@ -0,0 +1,148 @@
+"""
+Process-pool service for CPU-bound CV extraction.
+
+The rule-based extract_* functions are pure Python regex work. Running them
+directly inside async request handlers blocks the event loop for every other
+request, so handlers hand the work to this service instead. Jobs run in a
+ProcessPoolExecutor with a bounded number of queued jobs and a per-job timeout.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .ai_helpers import (extract_name, extract_email, extract_phone, extract_skills,
+                         extract_education, extract_experience, extract_projects, extract_interests)
+from .cv_document import CVDocument
+
+# Number of worker processes (0 runs jobs on a thread instead of a process pool)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs allowed to wait for a free worker before new jobs are rejected
+EXTRACTION_QUEUE_SIZE = int(os.getenv("EXTRACTION_QUEUE_SIZE", "16"))
+# Seconds a caller waits for a single job
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "15"))
+
+
+class ExtractionQueueFull(Exception):
+    """Raised when the extraction queue has no room for another job."""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction job does not finish within the timeout."""
+
+
+def extract_fallback_profile(cv_text: str) -> Dict[str, Any]:
+    """
+    Run all rule-based extractors over a CV, segmenting it once.
+
+    Args:
+        cv_text: The text content of a CV/resume
+
+    Returns:
+        Structured CV data with name, email, phone, skills, education, work_experience,
+        projects and interests
+    """
+    cv_doc = CVDocument(cv_text)
+    return {
+        "name": extract_name(cv_doc),
+        "email": extract_email(cv_doc),
+        "phone": extract_phone(cv_doc),
+        "skills": extract_skills(cv_doc),
+        "education": extract_education(cv_doc),
+        "work_experience": extract_experience(cv_doc),
+        "projects": extract_projects(cv_doc),
+        "interests": extract_interests(cv_doc),
+    }
+
+
+def warm_up_worker() -> int:
+    """Touch the extractors in a worker so its first real job is not slowed by imports."""
+    extract_fallback_profile("Jane Doe\nSkills: Python\nEducation:\nBSc in Computer Science, 2020")
+    return os.getpid()
+
+
+class ExtractionService:
+    """
+    Runs CPU-bound extraction jobs off the event loop.
+
+    Args:
+        workers: Number of worker processes (0 runs jobs on a thread)
+        queue_size: Jobs allowed to wait for a free worker
+        timeout: Seconds a caller waits for a single job
+    """
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS, queue_size: int = EXTRACTION_QUEUE_SIZE,
+                 timeout: float = EXTRACTION_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max(workers, 1) + queue_size
+        self.timeout = timeout
+        self.pending = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Create the worker pool if it does not exist yet."""
+        with self.lock:
+            if self.executor is None and self.workers > 0:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    async def warm_up(self):
+        """Start the pool and spawn every worker process ahead of the first request."""
+        executor = self.start()
+        if executor is None:
+            return []
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[loop.run_in_executor(executor, warm_up_worker) for _ in range(self.workers)])
+        print(f"Extraction service ready with {len(set(pids))} worker processes")
+        return pids
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker pool, cancelling jobs that have not started."""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def release(self, _future=None):
+        with self.lock:
+            self.pending -= 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None):
+        """
+        Run func(*args) on a worker and await its result.
+
+        Raises:
+            ExtractionQueueFull: If too many jobs are already pending
+            ExtractionTimeout: If the job takes longer than the timeout
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise ExtractionQueueFull(f"Extraction queue is full ({self.pending} jobs pending)")
+            self.pending += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.start(), func, *args)
+        except Exception:
+            self.release()
+            raise
+        # The slot is freed when the job really finishes, not when the caller stops waiting,
+        # so timed-out jobs still count against the queue while they occupy a worker
+        future.add_done_callback(self.release)
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise ExtractionTimeout(f"Extraction took longer than {timeout} seconds")
+
+    async def extract_profile(self, cv_text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run all rule-based extractors over a CV on a worker."""
+        return await self.run(extract_fallback_profile, cv_text or "", timeout=timeout)
+
+
+# Shared service used by the API handlers
+extraction_service = ExtractionService()
@@ -0,0 +1,269 @@
+"""
+Deterministic local stand-in for Gemini, for load tests and benchmarks.
+
+FakeModel has the interface of genai.GenerativeModel that llm_clients uses
+(generate_content_async returning an object with .text). It recognises the
+prompt of every workflow node and helper and answers with canned JSON in the
+schema that prompt asks for, wrapped in a code fence like Gemini's answers.
+Latency is drawn from a configurable distribution, and a configurable share of
+calls fails with the 429/503 errors Gemini returns under load, so retries, the
+circuit breaker and the fallbacks are exercised too.
+
+Select it with LLM_PROVIDER=fake (see llm_providers); no API key is needed.
+"""
+
+import asyncio
+import os
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from google.api_core import exceptions as google_exceptions
+
+# Latency of each fake call: "0.5", "fixed:0.5", "uniform:low,high", "normal:mean,stddev",
+# "lognormal:median,sigma" or "exponential:mean" (seconds)
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "lognormal:0.8,0.4")
+# Share of fake calls that fail with a 429 or 503 error
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+# Seed of the latency and error draws, so runs can be repeated
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+# Skills the fake CV parser recognises in a CV
+KNOWN_SKILLS = ["Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "SQL", "PostgreSQL", "MongoDB",
+                "Docker", "Kubernetes", "AWS", "Azure", "Git", "Machine Learning", "Data Analysis", "Excel",
+                "Communication", "Leadership", "Project Management"]
+SKILL_REGEXES = [(skill, re.compile(r"(?<!\w)" + re.escape(skill) + r"(?!\w)", re.IGNORECASE)) for skill in KNOWN_SKILLS]
+EMAIL_REGEX = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_REGEX = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+CV_TEXT_REGEX = re.compile(r"(?:CV TEXT|CV Text|CV text):?\s*\n")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Turn a latency spec such as "lognormal:0.8,0.4" into a function drawing a delay in seconds.
+
+    Raises:
+        ValueError: If the distribution is unknown or its parameters are missing
+    """
+    kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    values = [float(value) for value in params.split(",") if value.strip()]
+    distributions = {
+        "fixed": (1, lambda rng, value: value),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        "lognormal": (2, lambda rng, median, sigma: median * rng.lognormvariate(0, sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean) if mean else 0.0),
+    }
+    if kind.strip() not in distributions:
+        raise ValueError(f"Unknown latency distribution {kind!r}, expected one of {', '.join(distributions)}")
+    arity, draw = distributions[kind.strip()]
+    if len(values) != arity:
+        raise ValueError(f"Latency distribution {kind!r} takes {arity} parameters, got {params!r}")
+    return lambda rng: max(draw(rng, *values), 0.0)
+
+
+def cv_section(prompt: str) -> str:
+    match = CV_TEXT_REGEX.search(prompt)
+    return prompt[match.end():] if match else prompt
+
+
+def found_skills(text: str) -> List[str]:
+    return [skill for skill, regex in SKILL_REGEXES if regex.search(text)] or ["Communication", "Excel"]
+
+
+def parsed_cv(prompt: str) -> Dict[str, Any]:
+    cv_text = cv_section(prompt)
+    lines = [line.strip() for line in cv_text.splitlines() if line.strip()]
+    email = EMAIL_REGEX.search(cv_text)
+    phone = PHONE_REGEX.search(cv_text)
+    return {
+        "name": lines[0][:60] if lines else "Jane Doe",
+        "email": email.group() if email else "",
+        "phone": phone.group() if phone else "",
+        "education": [{"institution": "State University", "degree": "BSc Computer Science", "year": "2018"}],
+        "work_experience": [{"company": "Acme Corp", "position": "Software Engineer", "duration": "2019 - 2023",
+                             "description": "Built and maintained web services."}],
+        "skills": found_skills(cv_text),
+        "projects": [{"name": "Portfolio Site", "description": "Personal website built with React."}],
+        "interests": ["Reading", "Hiking"],
+    }
+
+
+def structured_cv(prompt: str) -> Dict[str, Any]:
+    profile = parsed_cv(prompt)
+    return {
+        "personal_info": {"name": profile["name"], "email": profile["email"], "phone": profile["phone"],
+                          "location": "", "linkedin": "", "portfolio": ""},
+        "summary": "Software engineer with experience building web services.",
+        "skills": profile["skills"],
+        "education": [{"degree": "BSc Computer Science", "institution": "State University", "location": "",
+                       "date": "2014 - 2018", "details": []}],
+        "work_experience": [{"position": "Software Engineer", "company": "Acme Corp", "location": "",
+                             "date": "2019 - 2023", "responsibilities": ["Built and maintained web services"]}],
+        "projects": [{"name": "Portfolio Site", "description": "Personal website", "technologies": ["React"],
+                      "link": ""}],
+        "languages": ["English"],
+        "interests": profile["interests"],
+    }
+
+
+def skills_analysis(prompt: str) -> Dict[str, Any]:
+    skills = found_skills(prompt)
+    return {
+        "current_skill_level": "Mid-level",
+        "strengths": skills[:3],
+        "gaps": ["System Design", "Cloud Architecture"],
+        "recommendations": ["Build a project using cloud services", "Study system design fundamentals"],
+        "relevant_industries": ["Technology", "Finance"],
+        "learning_resources": ["Designing Data-Intensive Applications", "AWS Cloud Practitioner course"],
+        "career_paths": ["Senior Software Engineer", "Solutions Architect"],
+        "estimated_timeline": 6,
+    }
+
+
+def career_recommendations(prompt: str) -> List[Dict[str, Any]]:
+    skills = found_skills(prompt)
+    return [
+        {
+            "title": title,
+            "description": f"{title} role building on the current skill set.",
+            "required_skills": skills[:2] + missing,
+            "matching_skills": skills[:2],
+            "missing_skills": missing,
+            "growth_potential": "High",
+            "timeline": timeline,
+            "next_steps": [f"Learn {missing[0]}", "Update portfolio"],
+        }
+        for title, missing, timeline in [
+            ("Senior Software Engineer", ["System Design"], 12),
+            ("Data Engineer", ["Apache Spark", "Airflow"], 9),
+            ("Solutions Architect", ["Cloud Architecture", "AWS"], 18),
+        ]
+    ]
+
+
+def career_roadmap(prompt: str) -> Dict[str, Any]:
+    return {
+        "roadmap_summary": "A six-month plan to close the main skill gaps.",
+        "milestones": [
+            {"title": title, "description": f"Focus on {skill}.", "timeline": weeks, "required_skills": [skill],
+             "resources": [f"{skill} online course"]}
+            for title, skill, weeks in [("Foundations", "System Design", 6), ("Cloud", "AWS", 8),
+                                        ("Portfolio", "Project Delivery", 10)]
+        ],
+        "learning_plan": {"courses": ["System Design Primer"], "projects": ["Deploy a service to the cloud"],
+                          "certifications": ["AWS Certified Developer"]},
+        "progress_tracking": {"key_performance_indicators": ["Courses completed", "Projects shipped"],
+                              "checkpoints": [{"title": "First project deployed", "timeline": "8 weeks"}]},
+        "mentorship": "Join a local engineering meetup and find a senior mentor.",
+    }
+
+
+def target_job(prompt: str) -> str:
+    match = re.search(r"Target job: (.+)|transitioning to a (.+?) role", prompt)
+    return next((group for group in match.groups() if group), "Software Engineer").strip() if match else "Software Engineer"
+
+
+def job_recommendations(prompt: str) -> List[Dict[str, Any]]:
+    skills = found_skills(prompt)
+    return [
+        {"title": title, "company": company, "description": f"Good match for {', '.join(skills[:2])}.",
+         "matching_skills": skills[:2], "skills_to_develop": ["System Design"], "match_score": score}
+        for title, company, score in [("Backend Developer", "SaaS company", 88),
+                                      ("Data Analyst", "Consultancy", 80),
+                                      ("DevOps Engineer", "Cloud provider", 74)]
+    ]
+
+
+def skills_gap(prompt: str) -> Dict[str, Any]:
+    skills = found_skills(prompt)
+    return {
+        "target_job": target_job(prompt),
+        "current_skills": skills,
+        "required_skills": skills[:2] + ["System Design", "AWS"],
+        "skills_gap": ["System Design", "AWS"],
+        "recommended_learning": [{"skill": "System Design", "resources": ["System Design Primer"]},
+                                 {"skill": "AWS", "resources": ["AWS Cloud Practitioner Essentials"]}],
+    }
+
+
+def learning_roadmap(prompt: str) -> Dict[str, Any]:
+    return {
+        "target_job": target_job(prompt),
+        "timeline_months": 6,
+        "current_level": "Intermediate",
+        "milestones": [
+            {"title": "Foundation", "description": "Build fundamental skills", "duration_weeks": 4,
+             "tasks": [{"name": "Complete online course", "status": "pending"}]},
+            {"title": "Specialization", "description": "Develop specialized skills", "duration_weeks": 8,
+             "tasks": [{"name": "Build a portfolio project", "status": "pending"}]},
+        ],
+    }
+
+
+# Prompt marker -> builder of the answer, checked in order
+RESPONDERS: List[Tuple[str, Callable[[str], Any]]] = [
+    ("You are a professional CV/resume parser", structured_cv),
+    ("Extract structured information from the following CV", parsed_cv),
+    ("Analyze the skills of a professional", skills_analysis),
+    ("Perform a detailed skills gap analysis", skills_analysis),
+    ("potential career paths", career_recommendations),
+    ("career development roadmap", career_roadmap),
+    ("suitable job positions", job_recommendations),
+    ("Perform a skills gap analysis for someone", skills_gap),
+    ("Create a detailed learning roadmap", learning_roadmap),
+]
+
+
+def fake_answer(prompt: str) -> str:
+    """Return the canned answer to prompt as Gemini would format it."""
+    for marker, respond in RESPONDERS:
+        if marker in prompt:
+            return f"```json\n{orjson.dumps(respond(prompt), option=orjson.OPT_INDENT_2).decode()}\n```"
+    return "{}"
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Answers like a genai.GenerativeModel, after a random delay and with random failures.
+
+    Attributes:
+        model_name (str): Name of the model it stands in for
+        latency (str): Latency spec, see parse_latency
+        error_rate (float): Share of calls that fail with a 429 or 503 error
+        seed (int): Seed of the latency and error draws
+    """
+
+    def __init__(self, model_name: str, latency: str = FAKE_LLM_LATENCY, error_rate: float = FAKE_LLM_ERROR_RATE,
+                 seed: int = FAKE_LLM_SEED):
+        self.model_name = model_name
+        self.draw_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.counts = {"calls": 0, "errors": 0}
+        self.total_latency = 0.0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.counts["calls"] += 1
+        delay = self.draw_latency(self.rng)
+        error: Optional[Exception] = None
+        if self.rng.random() < self.error_rate:
+            self.counts["errors"] += 1
+            error_type = self.rng.choice([google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable])
+            error = error_type(f"Fake {self.model_name} error")
+        self.total_latency += delay
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return FakeResponse(fake_answer(str(prompt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the model name, call and error counts and the mean drawn latency."""
+        calls = self.counts["calls"]
+        return {"model": self.model_name, **self.counts, "mean_latency": self.total_latency / calls if calls else 0.0}
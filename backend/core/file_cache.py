@@ -0,0 +1,45 @@
+"""
+Content-addressed cache for uploaded CV files.
+
+Entries are keyed on a BLAKE2b hash of the raw uploaded bytes and hold the
+extracted text and, once parsing succeeds, the parse result. A re-upload of the
+same file therefore skips PDF/DOCX extraction, and usually parsing too. Entries
+are stored through cache_utils, next to the text-keyed entries.
+"""
+import hashlib
+
+from fastapi import UploadFile
+
+from .cache_utils import get_from_cache, save_to_cache
+
+# Prefix that keeps file entries apart from the text-keyed cache entries
+FILE_KEY_PREFIX = "file-"
+# Bytes hashed per read when hashing an upload
+HASH_CHUNK_SIZE = 1024 * 1024
+
+async def get_upload_key(file: UploadFile):
+    """Generate a cache key for an upload, reading it in chunks, and rewind it."""
+    digest = hashlib.blake2b(digest_size=20)
+    await file.seek(0)
+    while True:
+        chunk = await file.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await file.seek(0)
+    return FILE_KEY_PREFIX + digest.hexdigest()
+
+def get_file_entry(file_key):
+    """Retrieve the cached {"text": ..., "result": ...} entry for a file, if any."""
+    entry = get_from_cache(file_key)
+    if not isinstance(entry, dict) or "text" not in entry:
+        return None
+    return entry
+
+def save_file_text(file_key, text):
+    """Cache the text extracted from a file."""
+    return save_to_cache(file_key, {"text": text, "result": None})
+
+def save_file_result(file_key, text, result):
+    """Cache the text extracted from a file together with its parse result."""
+    return save_to_cache(file_key, {"text": text, "result": result})
@@ -1,33 +1,319 @@
+import asyncio
 import io
+import json
+import mmap
 import os
+import tempfile
 import docx
 import PyPDF2
-from fastapi import UploadFile
-from typing import Union
+from fastapi import HTTPException, UploadFile
+from typing import List, Tuple, Union
+
+from .extraction_service import extraction_service, ExtractionQueueFull, ExtractionTimeout
+
+# Pages read from a PDF; later pages are ignored
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+# Characters of text kept from a PDF; extraction stops once this is reached
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+# Pages handled by one worker job (PDFs up to this size take a single job)
+PDF_PAGES_PER_JOB = int(os.getenv("PDF_PAGES_PER_JOB", "4"))
+# Largest accepted upload in bytes; larger uploads are rejected while they stream in
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Bytes read from an upload at a time
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Uploads up to this size are handed to the extraction workers in memory, as Starlette keeps them in memory too
+UPLOAD_MEMORY_BYTES = 1024 * 1024
+# Endpoints whose request bodies are limited to MAX_UPLOAD_BYTES
+UPLOAD_PATHS = ("/api/cv/parse", "/api/cv/parse/stream", "/api/cv/jobs", "/api/upload-cv")
+
+
+class UploadTooLarge(HTTPException):
+    """
+    Raised when an upload is larger than MAX_UPLOAD_BYTES.
+
+    It is an HTTPException with status 413, so when it is raised while FastAPI
+    parses a multipart body it is answered as a 413 instead of being turned into
+    a 400 "error parsing the body".
+    """
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=413, detail=detail)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that rejects CV uploads larger than max_bytes with a 413.
+
+    The declared Content-Length is checked first; the body is also counted as it is
+    received, so chunked uploads are cut off as soon as they pass the limit instead
+    of being buffered in full.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES, paths: Tuple[str, ...] = UPLOAD_PATHS):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].endswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            return await self.reject(send)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLarge:
+            if response_started:
+                raise
+            await self.reject(send)
+
+    async def reject(self, send):
+        body = json.dumps({"detail": f"File too large. Maximum upload size is {self.max_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def upload_size(file: UploadFile) -> int:
+    """Return the size of an upload from its spooled file, without reading it."""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(position)
+    return size
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Copy an upload to a named temporary file in fixed-size chunks, e.g. to keep it past the request.
+
+    Args:
+        file: The uploaded file
+        max_bytes: Maximum upload size
+
+    Returns:
+        str: Path of the temporary file; the caller is responsible for removing it
+
+    Raises:
+        UploadTooLarge: If the upload is larger than max_bytes
+    """
+    size = upload_size(file)
+    if size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+    suffix = os.path.splitext(file.filename or "")[1]
+    spool = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with spool:
+            await file.seek(0)
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+    print(f"Spooled {size} bytes to {spool.name}")
+    return spool.name
+
+
+async def upload_source(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[Union[bytes, str], bool]:
+    """
+    Return what the extraction workers read an upload from, copying it only when they cannot read it in place.
+
+    Worker processes cannot share the upload's file object, so they get the path of
+    a file already on disk under a name (e.g. the upload of a queued job), the bytes
+    of a small upload, or else a named copy of the upload.
+
+    Args:
+        file: The uploaded file
+        max_bytes: Maximum upload size
+
+    Returns:
+        tuple: (path or bytes, whether the path is a copy the caller must remove)
+
+    Raises:
+        UploadTooLarge: If the upload is larger than max_bytes
+    """
+    size = upload_size(file)
+    if size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+    name = getattr(file.file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, False
+    if size <= UPLOAD_MEMORY_BYTES:
+        await file.seek(0)
+        return await file.read(), False
+    # Starlette rolls larger uploads over to an unnamed temporary file
+    return await spool_upload(file, max_bytes), True
+
+
+def extract_pdf_pages(source: Union[bytes, str], start: int, stop: int, max_chars: int) -> Tuple[int, List[str]]:
+    """
+    Extract the text of pages [start, stop) of a PDF. Runs on an extraction worker.
+
+    Args:
+        source: Path of the PDF file (read through an mmap) or the raw PDF bytes
+        start: Index of the first page to extract
+        stop: Index after the last page to extract
+        max_chars: Stop early once this many characters have been extracted
+
+    Returns:
+        Tuple of the PDF's total page count and the text of each extracted page
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return read_pdf_pages(mapped, start, stop, max_chars)
+    return read_pdf_pages(io.BytesIO(source), start, stop, max_chars)
+
+
+def read_pdf_pages(stream, start: int, stop: int, max_chars: int) -> Tuple[int, List[str]]:
+    """Extract the text of pages [start, stop) of the PDF in stream (see extract_pdf_pages)."""
+    pdf_reader = PyPDF2.PdfReader(stream)
+    page_count = len(pdf_reader.pages)
+    texts = []
+    total = 0
+    for i in range(start, min(stop, page_count)):
+        page_text = pdf_reader.pages[i].extract_text() or ""
+        print(f"Page {i+1} extracted: {len(page_text)} characters")
+        texts.append(page_text)
+        total += len(page_text)
+        if total >= max_chars:
+            break
+    return page_count, texts
+
+
+def read_docx_text(source: Union[bytes, str]) -> str:
+    """Extract the text of a DOCX file (its path or contents), one line per paragraph. Runs on an extraction worker."""
+    doc = docx.Document(io.BytesIO(source) if isinstance(source, bytes) else source)
+    print(f"DOCX has {len(doc.paragraphs)} paragraphs")
+    return "\n".join(para.text for para in doc.paragraphs)
+
+
+async def extract_pdf_text(source: Union[bytes, str], max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS) -> str:
+    """
+    Extract text from a PDF, spreading its pages over the extraction workers.
+
+    The first job also reports the page count, so a short PDF needs a single job. The
+    remaining pages are split into contiguous chunks run in parallel. At most max_pages
+    pages and max_chars characters are kept, so very large PDFs return a truncated
+    text instead of timing out.
+
+    Args:
+        source: Path of the PDF file or the raw PDF bytes
+        max_pages: Maximum number of pages to read
+        max_chars: Maximum number of characters to return
+
+    Returns:
+        str: Extracted text, one line break after each page and a form feed between pages
+    """
+    first_stop = min(PDF_PAGES_PER_JOB, max_pages)
+    page_count, texts = await extraction_service.run(extract_pdf_pages, source, 0, first_stop, max_chars)
+    print(f"PDF has {page_count} pages")
+
+    pages = min(page_count, max_pages)
+    if pages < page_count:
+        print(f"PDF exceeds the page budget, reading the first {pages} pages")
+
+    if pages > first_stop and sum(len(page_text) for page_text in texts) < max_chars:
+        chunk_size = max(PDF_PAGES_PER_JOB, -(-(pages - first_stop) // max(extraction_service.workers, 1)))
+        results = await asyncio.gather(*[
+            extraction_service.run(extract_pdf_pages, source, start, min(start + chunk_size, pages), max_chars)
+            for start in range(first_stop, pages, chunk_size)
+        ])
+        for _, chunk_texts in results:
+            texts.extend(chunk_texts)
+
+    # The form feeds let cv_prompt find page headers and footers
+    text = "\f".join(page_text + "\n" for page_text in texts)
+    if len(text) > max_chars:
+        print(f"PDF text exceeds the {max_chars} character budget, truncating")
+        text = text[:max_chars]
+    return text
 
 async def extract_text_from_file(file: Union[UploadFile, str]) -> str:
     """
     Extract text content from uploaded CV files (PDF or DOCX).
     
+    Uploads are read where Starlette spooled them when possible (see upload_source);
+    larger ones are streamed to a temporary file rather than read into memory, so
+    memory use does not grow with the upload size.
+    
     Args:
         file (Union[UploadFile, str]): The uploaded file or file path
         
     Returns:
         str: Extracted text content
+        
+    Raises:
+        UploadTooLarge: If an upload is larger than MAX_UPLOAD_BYTES
     """
     # Handle both UploadFile and filepath
     if isinstance(file, str):
         # It's a filepath
         print(f"Processing file from path: {file}")
         filename = os.path.basename(file)
-        with open(file, 'rb') as f:
-            content = f.read()
+        source, temporary = file, False
     else:
         # It's an UploadFile
         print(f"Processing uploaded file: {file.filename}, content type: {file.content_type}")
-        content = await file.read()
         filename = file.filename
+        source, temporary = await upload_source(file)
     
+    try:
+        text = await extract_text(source, filename)
+    finally:
+        if temporary:
+            os.unlink(source)
+        
+    # Reset file cursor for potential future use if it's an UploadFile
+    if not isinstance(file, str):
+        await file.seek(0)
+    
+    print(f"Final extracted text length: {len(text)}")
+    if len(text) > 100:
+        print(f"Text preview: {text[:100]}...")
+    else:
+        print(f"Full text: {text}")
+    
+    return text
+
+async def extract_text(source: Union[bytes, str], filename: str) -> str:
+    """
+    Extract text from a CV file, choosing the parser from filename.
+    
+    Args:
+        source (Union[bytes, str]): Path of the file or its contents
+        filename (str): Original file name, used to detect the file type
+        
+    Returns:
+        str: Extracted text content, or "" if the file could not be parsed
+    """
     text = ""
     
     # Process based on file type
@@ -35,12 +321,9 @@ async def extract_text_from_file(file: Union[UploadFile, str]) -> str:
         # PDF processing
         try:
             print("Processing PDF file...")
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            print(f"PDF has {len(pdf_reader.pages)} pages")
-            for i, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                print(f"Page {i+1} extracted: {len(page_text)} characters")
-                text += page_text + "\n"
+            text = await extract_pdf_text(source)
+        except (ExtractionQueueFull, ExtractionTimeout):
+            raise
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             text = ""
@@ -49,24 +332,14 @@ async def extract_text_from_file(file: Union[UploadFile, str]) -> str:
         # DOCX processing
         try:
             print("Processing DOCX file...")
-            doc = docx.Document(io.BytesIO(content))
-            print(f"DOCX has {len(doc.paragraphs)} paragraphs")
-            text = "\n".join([para.text for para in doc.paragraphs])
+            text = await extraction_service.run(read_docx_text, source)
             print(f"Extracted {len(text)} characters from DOCX")
+        except (ExtractionQueueFull, ExtractionTimeout):
+            raise
         except Exception as e:
             print(f"Error extracting DOCX text: {e}")
             text = ""
     else:
         print(f"Unsupported file type: {filename}")
-        
-    # Reset file cursor for potential future use if it's an UploadFile
-    if not isinstance(file, str):
-        await file.seek(0)
-    
-    print(f"Final extracted text length: {len(text)}")
-    if len(text) > 100:
-        print(f"Text preview: {text[:100]}...")
-    else:
-        print(f"Full text: {text}")
     
     return text
\ No newline at end of file
@@ -6,14 +6,16 @@ specifically for CV parsing and text analysis.
 """
 
 import os
-import re
-import json
 from typing import Dict, Any, Optional, List
 
 # Import Gemini API
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+from .llm_clients import get_model, generate_content, llm_available
+from .cv_prompt import compact_cv_text
+from .llm_json import extract_json
+
 # Configure API
 api_key = os.getenv("GEMINI_API_KEY")
 if api_key:
@@ -37,18 +39,15 @@ async def parse_cv_with_gemini(cv_text: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing parsed CV data
     """
-    if not api_key:
+    if not llm_available(api_key):
         return {
             "api_error": "Gemini API key not configured",
             "message": "Please set the GEMINI_API_KEY environment variable"
         }
     
     try:
-        # Create a Gemini model instance with safety settings
-        model = genai.GenerativeModel(
-            model_name="gemini-pro",
-            safety_settings=safety_settings
-        )
+        # Get the shared Gemini model instance with these safety settings
+        model = get_model(safety_settings=safety_settings)
         
         # Create the prompt
         prompt = f"""
@@ -64,29 +63,15 @@ async def parse_cv_with_gemini(cv_text: str) -> Dict[str, Any]:
         - interests: Array of personal interests/hobbies
 
         CV TEXT:
-        {cv_text}
+        {compact_cv_text(cv_text, 'parse_cv_with_gemini')}
         """
         
         # Generate response
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         # Extract JSON data
         try:
-            text = response.text
-            
-            # Try to find JSON pattern in the response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-            
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
-            
-            # Parse JSON
-            parsed_cv = json.loads(json_str)
+            parsed_cv = extract_json(response.text, dict)
             
             return parsed_cv
             
@@ -0,0 +1,262 @@
+"""
+Background job queue for long-running requests.
+
+Parsing a CV with the LangGraph workflow takes several Gemini calls. Run inside
+the HTTP request, every parse holds a connection open, so the number of
+concurrent parses is only bounded by the number of clients. Jobs are instead
+accepted into a bounded queue and run by a fixed number of worker tasks; clients
+poll for the result. When the queue is full, new jobs are rejected.
+
+Job records live in memory, or in SQLite when JOB_DB is set, in which case jobs
+that were queued or running when the server stopped are resumed on start-up.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+import traceback
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+
+# Worker tasks running jobs concurrently
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs allowed to wait for a worker before new jobs are rejected
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+# Seconds a single job may run before it fails
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "300"))
+# Seconds finished jobs are kept for polling
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "3600"))
+# SQLite database for job records (empty keeps them in memory)
+JOB_DB = os.getenv("JOB_DB", "")
+
+# Fields of a job returned to clients
+PUBLIC_JOB_FIELDS = ("id", "status", "created_at", "started_at", "finished_at", "result", "error")
+
+
+def log_exception(message: str):
+    """Print message and the traceback of the exception being handled to stderr."""
+    print(message, file=sys.stderr)
+    traceback.print_exc()
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class MemoryJobStore:
+    """Keeps job records in a dict."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def save(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        return []
+
+    def purge(self, finished_before: float) -> int:
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["finished_at"] and job["finished_at"] < finished_before]
+        for job_id in expired:
+            del self.jobs[job_id]
+        return len(expired)
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore:
+    """Keeps job records in a SQLite database, so they survive restarts."""
+
+    FIELDS = ("id", "status", "created_at", "started_at", "finished_at", "payload", "result", "error")
+    JSON_FIELDS = ("payload", "result")
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, created_at REAL, "
+            "started_at REAL, finished_at REAL, payload BLOB, result BLOB, error TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+
+    def save(self, job: Dict[str, Any]):
+        row = [orjson.dumps(job[field], option=orjson.OPT_NON_STR_KEYS) if field in self.JSON_FIELDS else job[field]
+               for field in self.FIELDS]
+        self.db.execute(f"INSERT OR REPLACE INTO jobs VALUES ({', '.join('?' * len(self.FIELDS))})", row)
+
+    def load(self, row) -> Dict[str, Any]:
+        job = dict(zip(self.FIELDS, row))
+        for field in self.JSON_FIELDS:
+            job[field] = orjson.loads(job[field])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self.load(row) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        rows = self.db.execute(
+            "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+        return [self.load(row) for row in rows]
+
+    def purge(self, finished_before: float) -> int:
+        return self.db.execute("DELETE FROM jobs WHERE finished_at < ?", (finished_before,)).rowcount
+
+    def close(self):
+        self.db.close()
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a fixed pool of worker tasks.
+
+    Attributes:
+        name (str): Name used in log messages
+        handler (callable): Coroutine function run with each job's payload; its return value is the job's result
+        cleanup (callable): Optional function called with a job's payload once the job has finished, e.g. to
+            remove its input files. It is not called for jobs interrupted by stop(), so they can be resumed.
+        workers (int): Number of jobs run at the same time
+        queue_size (int): Number of jobs allowed to wait for a worker
+        timeout (float): Seconds a job may run before it fails
+        retention (int): Seconds finished jobs are kept
+        db_path (str): SQLite database of the job records, or "" to keep them in memory
+    """
+
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 cleanup: Optional[Callable[[Dict[str, Any]], None]] = None, workers: int = JOB_WORKERS,
+                 queue_size: int = JOB_QUEUE_SIZE, timeout: float = JOB_TIMEOUT, retention: int = JOB_RETENTION,
+                 db_path: str = JOB_DB):
+        self.name = name
+        self.handler = handler
+        self.cleanup = cleanup
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retention = retention
+        self.db_path = db_path
+        self.store = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.counts = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+
+    async def start(self):
+        """Open the job store, resume unfinished jobs and start the workers."""
+        if self.tasks:
+            return
+        self.store = SQLiteJobStore(self.db_path) if self.db_path else MemoryJobStore()
+        self.queue = asyncio.Queue()
+        resumed = self.store.unfinished()
+        for job in resumed:
+            job.update(status="queued", started_at=None)
+            self.store.save(job)
+            self.queue.put_nowait(job["id"])
+        if resumed:
+            print(f"Resumed {len(resumed)} unfinished {self.name} jobs")
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(max(self.workers, 1))]
+        print(f"{self.name} job queue started with {len(self.tasks)} workers")
+
+    async def stop(self):
+        """Stop the workers. Jobs still queued or running stay unfinished and are resumed by a SQLite store."""
+        while self.tasks:
+            for task in self.tasks:
+                task.cancel()
+            # wait_for swallows a cancellation that arrives as the job finishes, leaving the worker
+            # waiting for the next job, so workers still running are cancelled again
+            _, pending = await asyncio.wait(self.tasks, timeout=0.1)
+            self.tasks = list(pending)
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a job for payload and return its record.
+
+        Raises:
+            JobQueueFull: If queue_size jobs are already waiting for a worker
+        """
+        if self.queue is None:
+            raise RuntimeError(f"The {self.name} job queue has not been started")
+        if self.queue.qsize() >= self.queue_size:
+            self.counts["rejected"] += 1
+            raise JobQueueFull(f"{self.queue.qsize()} {self.name} jobs are already waiting, try again shortly")
+
+        self.store.purge(time.time() - self.retention)
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "payload": payload,
+            "result": None,
+            "error": None,
+        }
+        self.store.save(job)
+        self.queue.put_nowait(job["id"])
+        self.counts["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public fields of a job, or None if it does not exist or has expired."""
+        job = self.store.get(job_id) if self.store is not None else None
+        if job is None:
+            return None
+        return {field: job[field] for field in PUBLIC_JOB_FIELDS}
+
+    async def work(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run(job_id)
+            except Exception:
+                # One job's failure, e.g. of the job store, must not take its worker down with it
+                log_exception(f"{self.name} worker failed on job {job_id}")
+            finally:
+                self.queue.task_done()
+
+    async def run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        job.update(status="running", started_at=time.time())
+        self.store.save(job)
+        try:
+            job["result"] = await asyncio.wait_for(self.handler(job["payload"]), self.timeout)
+            job["status"] = "succeeded"
+        except asyncio.TimeoutError:
+            job.update(status="failed", error=f"Job did not finish within {self.timeout} seconds")
+        except Exception as e:
+            log_exception(f"{self.name} job {job_id} failed")
+            job.update(status="failed", error=str(e))
+        job["finished_at"] = time.time()
+        try:
+            self.store.save(job)
+        except Exception:
+            # e.g. a result SQLite cannot store; the job is recorded as failed without it
+            log_exception(f"Could not save the result of {self.name} job {job_id}")
+            job.update(status="failed", result=None, error="The job result could not be saved")
+            self.store.save(job)
+        finally:
+            self.counts[job["status"]] += 1
+            if self.cleanup is not None:
+                try:
+                    self.cleanup(job["payload"])
+                except Exception:
+                    log_exception(f"Could not clean up after {self.name} job {job_id}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return job counts, the number of jobs waiting and the number of workers."""
+        return {**self.counts, "queued": self.queue.qsize() if self.queue else 0, "workers": len(self.tasks)}
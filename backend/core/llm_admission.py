@@ -0,0 +1,261 @@
+"""
+Admission control for Gemini calls.
+
+A burst of users can start far more Gemini calls than the API quota allows;
+past that point every call gets a 429 and falls back to the slow rule-based
+extraction. Every call therefore passes through one shared controller first:
+
+- at most LLM_MAX_CONCURRENCY calls run at once,
+- calls start at no more than LLM_RATE_LIMIT per second (a token bucket that
+  allows bursts of LLM_RATE_BURST),
+- waiting calls are queued per user and served round-robin, so one user's
+  workflow cannot starve everyone else,
+- once LLM_MAX_QUEUE calls are waiting, further calls are rejected at once, and
+  a call that has waited LLM_QUEUE_TIMEOUT seconds gives up, so the caller can
+  fall back instead of waiting.
+
+The user of a call is read from a context variable set per request (see
+LLMUserMiddleware), so call sites do not pass it explicitly. It is the user of
+a verified Supabase access token, else the client address; identifiers the
+client could choose freely (a header, an email parameter) would let one client
+claim any number of round-robin turns.
+"""
+
+import asyncio
+import collections
+import contextvars
+import os
+import time
+from typing import Deque, Dict, Optional
+
+# Gemini calls allowed in flight at once
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Gemini calls started per second on average (0 disables the rate limit)
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "1"))
+# Calls that may start back to back before the rate limit applies
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "5"))
+# Calls allowed to wait for admission before further calls are rejected
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+# Seconds a call may wait for admission before it is rejected (0 waits without limit)
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+# Secret that signs Supabase access tokens; without it calls are attributed to the client address
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+# Recent wait times kept for the wait-time percentiles
+WAIT_SAMPLES = 1000
+
+# User the current request runs for; used as the fair-queuing key
+current_llm_user = contextvars.ContextVar("llm_user", default="anonymous")
+
+
+class LLMQueueFull(Exception):
+    """Raised when LLM_MAX_QUEUE calls are already waiting for admission."""
+
+
+class LLMQueueTimeout(LLMQueueFull):
+    """Raised when a call has waited LLM_QUEUE_TIMEOUT seconds without being admitted."""
+
+
+def set_llm_user(user: Optional[str]):
+    """Attribute the Gemini calls of the current request (or task) to user."""
+    current_llm_user.set(user or "anonymous")
+
+
+class LLMAdmissionController:
+    """
+    Admits Gemini calls under a concurrency cap and a token-bucket rate limit, serving users fairly.
+
+    Attributes:
+        max_concurrency (int): Calls allowed in flight at once
+        rate (float): Calls started per second on average, or 0 for no rate limit
+        burst (int): Size of the token bucket
+        max_queue (int): Calls allowed to wait for admission
+        queue_timeout (float): Seconds a call may wait for admission, or 0 for no limit
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, rate: float = LLM_RATE_LIMIT,
+                 burst: int = LLM_RATE_BURST, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tokens = float(self.burst)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        # User -> futures of their waiting calls; the user at the front is served next
+        self.waiters: "collections.OrderedDict[str, Deque[asyncio.Future]]" = collections.OrderedDict()
+        self.queued = 0
+        self.refill_timer: Optional[asyncio.TimerHandle] = None
+        self.counts = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+        self.wait_times: Deque[float] = collections.deque(maxlen=WAIT_SAMPLES)
+        self.max_wait = 0.0
+
+    def refill(self):
+        if not self.rate:
+            self.tokens = float(self.burst)
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def try_start(self) -> bool:
+        """Take a concurrency slot and a token if both are available."""
+        if self.in_flight >= self.max_concurrency:
+            return False
+        self.refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.in_flight += 1
+        self.counts["admitted"] += 1
+        return True
+
+    async def acquire(self, user: Optional[str] = None):
+        """
+        Wait until a call for user may start. Every successful acquire must be paired with release().
+
+        Raises:
+            LLMQueueFull: If max_queue calls are already waiting
+            LLMQueueTimeout: If the call was not admitted within queue_timeout seconds
+        """
+        user = user or current_llm_user.get()
+        if not self.queued and self.try_start():
+            self.record_wait(0.0)
+            return
+        if self.queued >= self.max_queue:
+            self.counts["rejected"] += 1
+            raise LLMQueueFull(f"{self.queued} Gemini calls are already waiting")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(user, collections.deque()).append(waiter)
+        self.queued += 1
+        self.counts["queued"] += 1
+        queued_at = time.monotonic()
+        self.schedule_refill()
+        try:
+            # wait_for returns normally if the call is admitted just as the timeout expires
+            await asyncio.wait_for(waiter, self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            self.remove_waiter(user, waiter)
+            self.counts["timed_out"] += 1
+            raise LLMQueueTimeout(f"Gemini call was not admitted within {self.queue_timeout} seconds")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the caller gave up: hand the slot on
+                self.release()
+            else:
+                self.remove_waiter(user, waiter)
+            raise
+        self.record_wait(time.monotonic() - queued_at)
+
+    def release(self):
+        """Free the slot of a finished call and admit the next waiting calls."""
+        self.in_flight -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        """Admit waiting calls, one per user in turn, while slots and tokens last."""
+        while self.waiters:
+            user, waiters = next(iter(self.waiters.items()))
+            # A waiter cancelled by its caller's timeout or cancellation is dropped without using a slot
+            if not waiters[0].done() and not self.try_start():
+                break
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self.waiters.move_to_end(user)
+            else:
+                del self.waiters[user]
+            if not waiter.done():
+                waiter.set_result(None)
+        self.schedule_refill()
+
+    def schedule_refill(self):
+        """If calls wait only for tokens, dispatch again once the next token is available."""
+        if not self.waiters or self.in_flight >= self.max_concurrency or self.refill_timer is not None:
+            return
+        delay = max((1 - self.tokens) / self.rate, 0.0) if self.rate else 0.0
+        self.refill_timer = asyncio.get_running_loop().call_later(delay, self.on_refill)
+
+    def on_refill(self):
+        self.refill_timer = None
+        self.dispatch()
+
+    def remove_waiter(self, user: str, waiter: asyncio.Future):
+        waiters = self.waiters.get(user)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self.waiters[user]
+
+    def record_wait(self, seconds: float):
+        self.wait_times.append(seconds)
+        self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self) -> Dict[str, object]:
+        """Return queue depth (total and per user), in-flight calls, tokens, counters and wait times."""
+        waits = sorted(self.wait_times)
+
+        def percentile(fraction):
+            return waits[min(int(len(waits) * fraction), len(waits) - 1)] if waits else 0.0
+
+        self.refill()
+        return {
+            **self.counts,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "queue_depth_by_user": {user: len(waiters) for user, waiters in self.waiters.items()},
+            "tokens": round(self.tokens, 2),
+            "wait_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": self.max_wait,
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+            },
+            "limits": {"max_concurrency": self.max_concurrency, "rate": self.rate,
+                       "burst": self.burst, "max_queue": self.max_queue, "queue_timeout": self.queue_timeout},
+        }
+
+
+# Shared by every Gemini call site through llm_clients.generate_content
+llm_admission = LLMAdmissionController()
+
+
+def authenticated_user(authorization: str, secret: str = SUPABASE_JWT_SECRET) -> Optional[str]:
+    """Return the user id of a valid Supabase access token in an Authorization header value, or None."""
+    scheme, _, token = authorization.partition(" ")
+    if not secret or scheme.lower() != "bearer" or not token:
+        return None
+    import jwt  # PyJWT, installed with supabase; only needed once SUPABASE_JWT_SECRET is set
+
+    try:
+        claims = jwt.decode(token.strip(), secret, algorithms=["HS256"], audience="authenticated")
+    except jwt.PyJWTError:
+        return None
+    return claims.get("sub")
+
+
+class LLMUserMiddleware:
+    """
+    ASGI middleware that attributes each request's Gemini calls to its user.
+
+    The user is the subject of a valid Supabase access token in the Authorization
+    header, else the client address.
+    """
+
+    def __init__(self, app, secret: str = SUPABASE_JWT_SECRET):
+        self.app = app
+        self.secret = secret
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope.get("headers") or [])
+            user = authenticated_user(headers.get(b"authorization", b"").decode("latin-1"), self.secret)
+            if user:
+                user = f"user:{user}"
+            elif scope.get("client"):
+                user = f"client:{scope['client'][0]}"
+            set_llm_user(user)
+        await self.app(scope, receive, send)
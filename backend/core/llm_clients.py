@@ -0,0 +1,241 @@
+"""
+Registry of Gemini model handles, and the single path for calling them.
+
+Building a genai.GenerativeModel for every call repeats the same set-up work on
+each request. Handles are instead created once per (model name, safety settings)
+and shared by every caller: ai_helpers, gemini_helpers, skills_gap_analysis and
+the LangGraph workflow nodes. They are created by the provider selected with
+LLM_PROVIDER (see llm_providers), so a local fake can stand in for Gemini.
+
+Every call goes through generate_content, which waits for admission by
+llm_admission (concurrency cap, rate limit, per-user fairness) and then uses the
+async client with a timeout. Transient errors are retried and persistent ones
+open the circuit breaker of llm_resilience.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import BlockedPromptException, StopCandidateException
+
+from .llm_admission import llm_admission, LLMQueueFull
+from .llm_resilience import gemini_breaker, retrying, CircuitOpen
+from .llm_providers import llm_provider
+
+# Model used when a caller does not ask for one
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+# Models tried in order by get_model_with_fallback until one can be created
+GEMINI_MODEL_FALLBACKS = [name.strip() for name in
+                          os.getenv("GEMINI_MODEL_FALLBACKS", "gemini-pro,gemini-1.0-pro,gemini-1.5-flash").split(",")
+                          if name.strip()]
+# Seconds a single Gemini call may take before it is cancelled
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+
+# (model name, frozen safety settings) -> model handle
+model_handles: Dict[Tuple[str, Hashable], Any] = {}
+model_handles_lock = threading.Lock()
+# Per-model counters of created handles, reused handles and failed creations
+handle_stats: Dict[str, Dict[str, int]] = {}
+# First model of GEMINI_MODEL_FALLBACKS that could be created, per frozen safety settings
+fallback_models: Dict[Hashable, str] = {}
+
+# Counters of Gemini calls made through generate_content
+call_stats = {"calls": 0, "timeouts": 0, "errors": 0}
+
+
+class LLMTimeout(Exception):
+    """Raised when a Gemini call takes longer than its timeout."""
+
+
+# Upstream errors worth retrying: rate limiting and transient server-side failures
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+)
+# Errors that count against the circuit breaker; timeouts already took long, so they are not retried
+UPSTREAM_ERRORS = RETRYABLE_ERRORS + (LLMTimeout,)
+# Errors that are Gemini's answer to the prompt (an invalid, unauthorized or blocked request), so the
+# service is up; any other error, e.g. a connection or DNS failure, counts against the circuit breaker
+ANSWERED_ERRORS = (google_exceptions.ClientError, BlockedPromptException, StopCandidateException)
+
+
+def freeze_settings(safety_settings: Optional[Dict[Any, Any]]) -> Hashable:
+    """Turn a safety settings dict into a hashable registry key."""
+    if not safety_settings:
+        return ()
+    return tuple(sorted((str(category), str(threshold)) for category, threshold in safety_settings.items()))
+
+
+def count(model_name: str, outcome: str):
+    stats = handle_stats.setdefault(model_name, {"created": 0, "reused": 0, "failed": 0})
+    stats[outcome] += 1
+
+
+def get_model(model_name: str = GEMINI_MODEL, safety_settings: Optional[Dict[Any, Any]] = None):
+    """
+    Return the shared handle of a Gemini model, creating it on first use.
+
+    Args:
+        model_name: Name of the Gemini model
+        safety_settings: Optional safety settings; each distinct set gets its own handle
+
+    Raises:
+        Exception: Whatever the provider raises if the handle cannot be created
+    """
+    key = (model_name, freeze_settings(safety_settings))
+    model = model_handles.get(key)
+    if model is not None:
+        count(model_name, "reused")
+        return model
+
+    with model_handles_lock:
+        model = model_handles.get(key)
+        if model is None:
+            try:
+                model = llm_provider.create_model(model_name, safety_settings)
+            except Exception:
+                count(model_name, "failed")
+                raise
+            model_handles[key] = model
+            count(model_name, "created")
+            print(f"Created {llm_provider.name} model handle for {model_name}")
+            return model
+    count(model_name, "reused")
+    return model
+
+
+def get_model_with_fallback(safety_settings: Optional[Dict[Any, Any]] = None):
+    """
+    Return the handle of the first model in GEMINI_MODEL_FALLBACKS that can be created, or None.
+
+    The model found is remembered, so models that failed are not retried on every call.
+    """
+    settings_key = freeze_settings(safety_settings)
+    if settings_key in fallback_models:
+        return get_model(fallback_models[settings_key], safety_settings)
+    for model_name in GEMINI_MODEL_FALLBACKS:
+        try:
+            model = get_model(model_name, safety_settings)
+        except Exception as e:
+            print(f"Error with {model_name} model: {e}")
+            continue
+        fallback_models[settings_key] = model_name
+        return model
+    print("Error with all Gemini models")
+    return None
+
+
+def llm_available(api_key: Optional[str]) -> bool:
+    """Return whether LLM calls can be made: an API key is set, or the provider needs none."""
+    return bool(api_key) or not llm_provider.requires_api_key
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Retry transient upstream errors, unless the breaker has opened in the meantime."""
+    return isinstance(error, RETRYABLE_ERRORS) and not gemini_breaker.is_open()
+
+
+async def generate_content(model, prompt, timeout: float = LLM_TIMEOUT, **kwargs):
+    """
+    Call model.generate_content_async, retrying transient errors, unless the circuit breaker is open.
+
+    Each attempt waits for admission by llm_admission first and is limited to timeout
+    seconds. Attempts are retried with jittered exponential backoff on RETRYABLE_ERRORS.
+
+    Args:
+        model: Model handle, e.g. from get_model
+        prompt: The prompt
+        timeout: Seconds a single attempt may take once started
+        **kwargs: Passed on to generate_content_async
+
+    Returns:
+        The Gemini response
+
+    Raises:
+        CircuitOpen: If Gemini has been failing; raised without calling it
+        LLMQueueFull: If too many calls are already waiting for admission
+        LLMTimeout: If an attempt did not finish within timeout seconds; the attempt is cancelled
+    """
+    gemini_breaker.before_call()
+    try:
+        async for attempt in retrying(is_retryable):
+            with attempt:
+                response = await call_model(model, prompt, timeout, **kwargs)
+    except UPSTREAM_ERRORS as e:
+        gemini_breaker.record_failure(e)
+        raise
+    except ANSWERED_ERRORS:
+        # Gemini answered, just not with content (e.g. an invalid or blocked prompt)
+        gemini_breaker.record_success()
+        raise
+    except LLMQueueFull:
+        gemini_breaker.release_probe()
+        raise
+    except Exception as e:
+        # No answer from Gemini at all, e.g. the network is down
+        gemini_breaker.record_failure(e)
+        raise
+    except BaseException:
+        gemini_breaker.release_probe()
+        raise
+    gemini_breaker.record_success()
+    return response
+
+
+async def call_model(model, prompt, timeout: float, **kwargs):
+    """Make a single Gemini call once llm_admission lets it start (see generate_content)."""
+    await llm_admission.acquire()
+    call_stats["calls"] += 1
+    try:
+        return await asyncio.wait_for(model.generate_content_async(prompt, **kwargs), timeout)
+    except asyncio.TimeoutError:
+        call_stats["timeouts"] += 1
+        print(f"Gemini request timed out after {timeout} seconds")
+        raise LLMTimeout(f"API timeout: Gemini request took longer than {timeout} seconds to respond")
+    except Exception:
+        call_stats["errors"] += 1
+        raise
+    finally:
+        llm_admission.release()
+
+
+def describe_llm_error(error: BaseException) -> str:
+    """Return a user-facing explanation of why a Gemini call failed."""
+    if isinstance(error, CircuitOpen):
+        return "The AI service is temporarily unavailable. Using basic extraction; please try again in a few minutes."
+    if isinstance(error, LLMQueueFull):
+        return "The AI service is busy. Using basic extraction; please try again shortly."
+    if isinstance(error, LLMTimeout):
+        return "The AI service did not respond in time. Using basic extraction; please try again later."
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return "API rate limit exceeded. Using basic extraction. Please try again later for better results."
+    return "AI parsing failed. Using basic extraction with limited accuracy."
+
+
+def clear_model_handles():
+    """Drop every cached handle, e.g. after the API key has been reconfigured."""
+    with model_handles_lock:
+        model_handles.clear()
+        fallback_models.clear()
+
+
+def get_llm_client_stats() -> Dict[str, Any]:
+    """Return the call counters, the admission queue metrics, the breaker state, the provider and the cached handles per model."""
+    return {
+        "calls": dict(call_stats),
+        "admission": llm_admission.stats(),
+        "breaker": gemini_breaker.stats(),
+        "provider": llm_provider.stats(),
+        "handles": len(model_handles),
+        "fallback_order": GEMINI_MODEL_FALLBACKS,
+        "fallback_models": {str(key): name for key, name in fallback_models.items()},
+        "models": {name: dict(stats) for name, stats in handle_stats.items()},
+    }
@@ -0,0 +1,247 @@
+"""
+Decoding of JSON values embedded in Gemini responses.
+
+Gemini is asked to return only JSON, but its responses often wrap the value in
+a markdown code fence or surround it with prose. extract_json tries the body of
+the fence first, then the whole response. A body that is exactly one value is
+decoded with orjson; otherwise every "{" and "[" is tried as the start of a
+value and the longest one that decodes is used. Unlike the regex clean-up it
+replaces (strip everything up to the first "{" and after the last "}"), it
+handles arrays as well as objects, skips prose that merely contains brackets or
+quotes, and does not backtrack over long responses.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple, Type, Union
+
+import orjson
+
+# Characters that can start a value embedded in prose, that matter inside a JSON value, and inside its strings
+OPENER_REGEX = re.compile(r"[{\[]")
+STRUCTURE_REGEX = re.compile(r'[{\[\]}"]')
+STRING_REGEX = re.compile(r'["\\]')
+
+CODE_FENCE = "```"
+# Matches at a position followed only by whitespace up to the end of the text or a code fence
+CUT_OFF_REGEX = re.compile(r"\s*(?:```|\Z)")
+
+# Brackets followed by something that can continue a JSON value, e.g. not "[Course" or "{name"
+VALUE_START_REGEX = re.compile(r'\{\s*["}]|\[\s*[-"\[\]{0-9tfn]')
+
+# Decodes a value at an offset and reports where it ends, which orjson cannot do
+JSON_DECODER = json.JSONDecoder()
+# Characters decoded at first from a candidate start; the window doubles while the value runs past it
+DECODE_WINDOW = 1024
+# Errors this close to the end of a window may be caused by the window cutting a token short
+WINDOW_MARGIN = 8
+# Values nested deeper than this are not decoded once the decoder has run out of recursion on them
+MAX_NESTING = 100
+
+
+class LLMJSONError(ValueError):
+    """Raised when a response contains no JSON value of the expected type."""
+
+
+def fenced_block(text: str) -> Optional[str]:
+    """
+    Return the body of the first markdown code fence in text, or None; an unclosed fence runs to the end.
+
+    Fences only count at the start of a line. JSON strings cannot contain raw
+    newlines, so a fence-like run of backticks inside a JSON string is never
+    mistaken for one.
+    """
+    start = 0 if text.startswith(CODE_FENCE) else text.find("\n" + CODE_FENCE)
+    if start < 0:
+        return None
+    # Skip the language tag, e.g. ```json
+    body_start = text.find("\n", start + 1)
+    if body_start < 0:
+        return None
+    end = text.find("\n" + CODE_FENCE, body_start)
+    return text[body_start + 1:end if end >= 0 else len(text)]
+
+
+def scan_brackets(text: str, start: int, end: int) -> Tuple[List[Tuple[int, int, int]], List[int]]:
+    """
+    Match the brackets of the JSON value at start, up to where it closes or end, skipping those inside strings.
+
+    The text must be valid JSON from start on (until end, where it may be cut
+    short), so every quote outside a string opens one.
+
+    Returns:
+        tuple: (start, end, nesting depth) of the values closed, and the offsets of the brackets still open
+    """
+    spans: List[Tuple[int, int, int]] = []
+    # [offset, deepest nesting below it] of each open bracket
+    stack: List[List[int]] = []
+    pos = start
+    while True:
+        match = STRUCTURE_REGEX.search(text, pos, end)
+        if match is None:
+            return spans, [offset for offset, _ in stack]
+        index = match.start()
+        pos = index + 1
+        char = text[index]
+        if char in "{[":
+            stack.append([index, 0])
+        elif char in "}]":
+            if not stack:
+                return spans, []
+            offset, below = stack.pop()
+            spans.append((offset, index + 1, below + 1))
+            if not stack:
+                return spans, []
+            stack[-1][1] = max(stack[-1][1], below + 1)
+        else:
+            # Jump to the closing quote, stepping over escapes
+            while True:
+                string_match = STRING_REGEX.search(text, pos, end)
+                if string_match is None:
+                    return spans, [offset for offset, _ in stack]
+                if string_match.group() == "\\":
+                    pos = string_match.end() + 1
+                    continue
+                pos = string_match.end()
+                break
+
+
+def decode_at(text: str, start: int) -> Tuple[bool, Any, int]:
+    """
+    Decode the JSON value at start.
+
+    The decoder reports an error with its line number, counted from the start of
+    the string it is given, so a failure decoding in place would take time
+    proportional to start. The value is decoded from a window of the text
+    instead, doubled until the value fits in it or fails away from its end.
+
+    Returns:
+        tuple: (True, value, offset where it ends) or (False, None, offset where decoding failed)
+
+    Raises:
+        RecursionError: If the value is nested deeper than the decoder allows
+        ValueError: If a number in the value cannot be converted
+    """
+    size = DECODE_WINDOW
+    while True:
+        window = text[start:start + size]
+        try:
+            value, end = JSON_DECODER.raw_decode(window)
+        except json.JSONDecodeError as e:
+            if start + size < len(text) and (e.pos >= len(window) - WINDOW_MARGIN
+                                              or e.msg.startswith("Unterminated string")):
+                size *= 2
+                continue
+            return False, None, start + e.pos
+        return True, value, start + end
+
+
+def is_cut_off(text: str, pos: int) -> bool:
+    """Return whether a value that failed to decode at pos ran into the end of the text or of its code fence."""
+    return CUT_OFF_REGEX.match(text, pos) is not None
+
+
+def decode_embedded(text: str, expect: Tuple[Type, ...]) -> Optional[Any]:
+    """
+    Decode the longest JSON value of an expected type that starts at a bracket in text.
+
+    Every "{" and "[" is a candidate start. Brackets in prose, e.g. "see [note)"
+    or "{name, skills}", fail to decode after a character or two. Taking the
+    longest value rather than the first means a fragment of the response never
+    wins over the response itself.
+
+    Each character is decoded a bounded number of times, so the search takes
+    linear time however many brackets precede the value:
+
+    - Values nested in a decoded value are not tried again. If the decoded value
+      has another type, its largest nested value of an expected type is decoded
+      instead (e.g. a list in an object).
+    - When a start fails, the brackets it left open fail at the same place and
+      are skipped; values it closed before failing are still tried. Values
+      nested in one cut off by the end of the text (a truncated response) are
+      not tried at all.
+    - Brackets inside strings are tried, as a bracket in prose before the real
+      value can make part of it decode as a short string (e.g. a list starting
+      at a stray "[" that ends inside the first key of the real object).
+    """
+    best: Optional[Any] = None
+    best_length = 0
+    skipped = set()
+
+    def consider(value, length):
+        nonlocal best, best_length
+        if length > best_length:
+            best, best_length = value, length
+
+    for match in OPENER_REGEX.finditer(text):
+        start = match.start()
+        if start in skipped or not VALUE_START_REGEX.match(text, start):
+            continue
+        try:
+            decoded, value, end = decode_at(text, start)
+        except RecursionError:
+            # Nested deeper than the decoder allows: skip the values too deep to decode and
+            # the brackets never closed, rather than failing on each of them in turn
+            spans, still_open = scan_brackets(text, start, len(text))
+            skipped.update(still_open)
+            skipped.update(span[0] for span in spans if span[2] > MAX_NESTING)
+            continue
+        except ValueError:
+            # e.g. an integer too long to convert
+            continue
+        if not decoded:
+            spans, still_open = scan_brackets(text, start, end)
+            skipped.update(still_open)
+            if is_cut_off(text, end):
+                skipped.update(span[0] for span in spans)
+            continue
+        spans, _ = scan_brackets(text, start, end)
+        skipped.update(span[0] for span in spans)
+        if isinstance(value, expect):
+            consider(value, end - start)
+            continue
+        # A value of another type may still hold the wanted one, e.g. a list in an object
+        nested = [(span_end - span_start, span_start) for span_start, span_end, _ in spans
+                  if span_start != start and isinstance({} if text[span_start] == "{" else [], expect)]
+        if nested:
+            length, span_start = max(nested)
+            consider(JSON_DECODER.raw_decode(text, span_start)[0], length)
+    return best
+
+
+def extract_json(text: str, expect: Union[Type, Tuple[Type, ...]] = (dict, list)) -> Any:
+    """
+    Return the JSON value in an LLM response.
+
+    The body of the first code fence is tried before the rest of the response.
+    Within it, the whole trimmed body is decoded directly when it looks like a
+    single value; otherwise the longest value embedded in it is used.
+
+    Args:
+        text: The response text
+        expect: Type or types of value wanted, by default an object or an array
+
+    Returns:
+        The decoded value
+
+    Raises:
+        LLMJSONError: If the response contains no JSON value of an expected type
+    """
+    expect = expect if isinstance(expect, tuple) else (expect,)
+    text = text or ""
+    block = fenced_block(text)
+    for candidate in ((block, text) if block is not None else (text,)):
+        trimmed = candidate.strip()
+        if trimmed[:1] in ("{", "[") and trimmed[-1:] in ("}", "]"):
+            try:
+                value = orjson.loads(trimmed)
+            except orjson.JSONDecodeError:
+                pass
+            else:
+                if isinstance(value, expect):
+                    return value
+        value = decode_embedded(candidate, expect)
+        if value is not None:
+            return value
+    names = " or ".join(kind.__name__ for kind in expect)
+    raise LLMJSONError(f"No JSON {names} found in response of {len(text)} characters")
@@ -0,0 +1,77 @@
+"""
+LLM providers: where llm_clients gets its model handles from.
+
+A provider creates model handles with the interface llm_clients relies on
+(generate_content_async(prompt) returning an object with .text):
+
+- "gemini" (default) creates genai.GenerativeModel handles and needs an API key.
+- "fake" creates fake_llm.FakeModel handles, which answer every prompt with
+  canned JSON after a configurable delay, so the backend can be load-tested and
+  benchmarked offline.
+
+The provider is chosen once per process by LLM_PROVIDER.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+
+from .fake_llm import FakeModel
+
+# LLM backend: "gemini" or "fake"
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").strip().lower()
+
+
+class GeminiProvider:
+    """Creates Gemini model handles."""
+
+    name = "gemini"
+    requires_api_key = True
+
+    def create_model(self, model_name: str, safety_settings: Optional[Dict[Any, Any]] = None):
+        if safety_settings:
+            return genai.GenerativeModel(model_name=model_name, safety_settings=safety_settings)
+        return genai.GenerativeModel(model_name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+
+class FakeProvider:
+    """Creates FakeModel handles; every handle draws its own latencies and errors."""
+
+    name = "fake"
+    requires_api_key = False
+
+    def __init__(self):
+        self.models: List[FakeModel] = []
+
+    def create_model(self, model_name: str, safety_settings: Optional[Dict[Any, Any]] = None):
+        model = FakeModel(model_name)
+        self.models.append(model)
+        return model
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "models": [model.stats() for model in self.models]}
+
+
+PROVIDERS = {provider.name: provider for provider in (GeminiProvider, FakeProvider)}
+
+
+def create_provider(name: str = LLM_PROVIDER):
+    """
+    Return a new provider by name.
+
+    Raises:
+        ValueError: If there is no provider of that name
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {name!r}, expected one of {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+
+# Used by llm_clients for every model handle
+llm_provider = create_provider()
+if llm_provider.name != "gemini":
+    print(f"Using the {llm_provider.name} LLM provider instead of Gemini")
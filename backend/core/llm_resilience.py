@@ -0,0 +1,129 @@
+"""
+Retries and circuit breaking for Gemini calls.
+
+Transient Gemini errors (429s, 5xx, deadline errors) are retried with jittered
+exponential backoff. A shared circuit breaker counts consecutive upstream
+failures; once LLM_BREAKER_THRESHOLD is reached it opens and calls fail at once
+with CircuitOpen, so callers use their rule-based fallbacks immediately instead
+of each waiting out timeouts during a brownout. After LLM_BREAKER_RESET_TIMEOUT
+seconds a single probe call is let through; its outcome closes the breaker or
+opens it again.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Attempts per Gemini call, including the first one
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+# Base and maximum seconds of the jittered exponential backoff between attempts
+LLM_RETRY_WAIT = float(os.getenv("LLM_RETRY_WAIT", "1"))
+LLM_RETRY_MAX_WAIT = float(os.getenv("LLM_RETRY_MAX_WAIT", "8"))
+# Consecutive failed calls that open the circuit breaker
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+# Seconds the breaker stays open before a probe call is allowed
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with closed, open and half-open states.
+
+    Attributes:
+        name (str): Name used in log messages
+        threshold (int): Consecutive failures that open the breaker
+        reset_timeout (float): Seconds the breaker stays open before a probe is allowed
+    """
+
+    def __init__(self, name: str, threshold: int = LLM_BREAKER_THRESHOLD, reset_timeout: float = LLM_BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.threshold = max(threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.last_error: Optional[str] = None
+        self.counts = {"successes": 0, "failures": 0, "short_circuited": 0, "opened": 0}
+
+    def is_open(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        """
+        Check that a call may go ahead; in the half-open state only one probe at a time may.
+
+        Raises:
+            CircuitOpen: If the breaker is open, or half-open with a probe already running
+        """
+        if self.state == "open" and not self.is_open():
+            self.state = "half_open"
+            print(f"{self.name} circuit breaker half-open, probing upstream")
+        if self.state == "open" or (self.state == "half_open" and self.probing):
+            self.counts["short_circuited"] += 1
+            raise CircuitOpen(f"{self.name} is unavailable (circuit breaker open after {self.failures} failures)")
+        if self.state == "half_open":
+            self.probing = True
+
+    def release_probe(self):
+        """Let another probe through after a probe call ended without an upstream outcome (e.g. it was cancelled)."""
+        self.probing = False
+
+    def record_success(self):
+        self.counts["successes"] += 1
+        self.failures = 0
+        self.probing = False
+        if self.state != "closed":
+            print(f"{self.name} circuit breaker closed")
+        self.state = "closed"
+
+    def record_failure(self, error: BaseException):
+        self.counts["failures"] += 1
+        self.failures += 1
+        self.probing = False
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.counts["opened"] += 1
+            print(f"{self.name} circuit breaker opened after {self.failures} failures: {self.last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state, the consecutive failure count, the last error and counters."""
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+        return {
+            "state": "half_open" if self.state == "open" and retry_in == 0 else self.state,
+            "consecutive_failures": self.failures,
+            "threshold": self.threshold,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error,
+            **self.counts,
+        }
+
+
+def retrying(is_retryable: Callable[[BaseException], bool]) -> AsyncRetrying:
+    """Return a tenacity retry loop with jittered exponential backoff for errors accepted by is_retryable."""
+
+    def log_retry(retry_state):
+        print(f"Retrying Gemini call (attempt {retry_state.attempt_number + 1} of {LLM_RETRY_ATTEMPTS}) "
+              f"after {retry_state.outcome.exception()}")
+
+    return AsyncRetrying(
+        stop=stop_after_attempt(max(LLM_RETRY_ATTEMPTS, 1)),
+        wait=wait_random_exponential(multiplier=LLM_RETRY_WAIT, max=LLM_RETRY_MAX_WAIT),
+        retry=retry_if_exception(is_retryable),
+        before_sleep=log_retry,
+        reraise=True,
+    )
+
+
+# Shared by every Gemini call site through llm_clients.generate_content
+gemini_breaker = CircuitBreaker("Gemini")
@@ -0,0 +1,81 @@
+"""
+Single-flight coalescing of identical in-flight async calls.
+
+When the same CV is submitted several times at once (a double-clicked upload or
+a frontend retry), each request would otherwise start its own parse and pay for
+its own Gemini calls. A coalesced function runs at most once per key at a time;
+callers that arrive while it is running await the same result.
+"""
+
+import asyncio
+import copy
+import functools
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Tracks in-flight calls by key so concurrent callers share one execution.
+
+    Attributes:
+        in_flight (dict): Key -> task of the call currently running for that key
+        calls (int): Number of calls made through this group
+        coalesced (int): Number of calls that awaited another caller's execution
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) unless a call for key is already running, then await its result.
+
+        The shared execution is shielded, so a caller that gives up does not cancel it for
+        the others. Every caller, including the one that started the execution, gets its own
+        deep copy of the result, so each can modify it without the others seeing the change.
+        """
+        self.calls += 1
+        task = self.in_flight.get(key)
+        if task is not None and not task.done():
+            self.coalesced += 1
+            print(f"Coalescing with in-flight call for {key}")
+        else:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.in_flight.pop(key, None) if self.in_flight.get(key) is done else None)
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, int]:
+        """Return call, coalesced-call and in-flight counts."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self.in_flight)}
+
+
+# Groups by name, reported by get_single_flight_stats
+flight_groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str, key: Callable[..., str]):
+    """
+    Decorate an async function so concurrent calls with the same key share one execution.
+
+    Args:
+        name: Name of the group, used in get_single_flight_stats
+        key: Function mapping the call's arguments to its coalescing key
+    """
+    group = flight_groups.setdefault(name, SingleFlight())
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await group.do(key(*args, **kwargs), func, *args, **kwargs)
+        wrapper.flight = group
+        return wrapper
+
+    return decorator
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Return the counters of every single-flight group."""
+    return {name: group.stats() for name, group in flight_groups.items()}
@@ -6,7 +6,6 @@ It integrates with LangGraph workflow for enhanced AI-powered analysis.
 """
 
 import os
-import json
 import asyncio
 from typing import List, Dict, Any, Optional
 from backend.core.job_recommendation import SAMPLE_JOBS
@@ -14,12 +13,12 @@ from backend.core.job_recommendation import SAMPLE_JOBS
 # Import Gemini for enhanced analysis
 try:
     import google.generativeai as genai
+    from backend.core.llm_clients import get_model, generate_content, llm_available
+    from backend.core.llm_json import extract_json
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     if GEMINI_API_KEY:
         genai.configure(api_key=GEMINI_API_KEY)
-        GEMINI_AVAILABLE = True
-    else:
-        GEMINI_AVAILABLE = False
+    GEMINI_AVAILABLE = llm_available(GEMINI_API_KEY)
 except ImportError:
     GEMINI_AVAILABLE = False
 
@@ -51,7 +50,7 @@ async def analyze_skills_gap_with_ai(user_profile: Dict[str, Any], target_role:
                             for edu in education[:2]])
         
         # Create a detailed prompt for Gemini
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         prompt = f"""
         Perform a detailed skills gap analysis for a professional with the following profile:
         
@@ -77,25 +76,10 @@ async def analyze_skills_gap_with_ai(user_profile: Dict[str, Any], target_role:
         Return ONLY valid JSON.
         """
         
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         try:
-            # Extract JSON from response
-            import re
-            text = response.text
-            
-            # Find JSON pattern in response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-            
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
-            
-            analysis = json.loads(json_str)
+            analysis = extract_json(response.text, dict)
             
             # Add user's original skills to the response
             analysis["user_skills"] = user_skills
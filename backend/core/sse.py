@@ -0,0 +1,63 @@
+"""
+Server-sent events helpers.
+
+A workflow run takes several Gemini calls, often close to a minute in total.
+Streaming endpoints send each intermediate result as an SSE event as soon as it
+is available, and a comment line whenever the stream is idle, so proxies do not
+close the connection while a slow call is still running.
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Tuple
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+# Seconds without an event after which a keep-alive comment is sent
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# Headers that stop browsers and proxies (e.g. nginx) from caching or buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse_event(event: str, data: Any) -> bytes:
+    """Encode one SSE message with a JSON payload."""
+    payload = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+
+
+async def sse_messages(events: AsyncIterator[Tuple[str, Any]], heartbeat: float = SSE_HEARTBEAT_INTERVAL) -> AsyncIterator[bytes]:
+    """
+    Encode (event, data) pairs as SSE messages, adding keep-alive comments while events is idle.
+
+    If the client disconnects, the pending step of events is cancelled and events is
+    closed, so the work behind it stops as well.
+    """
+    iterator = events.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+            if not done:
+                yield b": keep-alive\n\n"
+                continue
+            try:
+                event, data = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                return
+            pending = None
+            yield format_sse_event(event, data)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """Stream (event, data) pairs to the client as server-sent events."""
+    return StreamingResponse(sse_messages(events), media_type="text/event-stream", headers=SSE_HEADERS)
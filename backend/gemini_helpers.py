@@ -1,9 +1,12 @@
 import os
 import google.generativeai as genai
 from typing import Dict, Any, Optional, List
-import json
 import time
 
+from backend.core.llm_clients import get_model, generate_content, llm_available
+from backend.core.cv_prompt import compact_cv_text
+from backend.core.llm_json import extract_json, LLMJSONError
+
 # Initialize Gemini API with key from environment
 try:
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
@@ -27,18 +30,18 @@ async def parse_cv_with_gemini(cv_text: str) -> Dict[str, Any]:
     """
     try:
         # Check if API key is available
-        if not GEMINI_API_KEY:
+        if not llm_available(GEMINI_API_KEY):
             print("Gemini API key not available, returning empty results")
             return {"error": "Gemini API key not configured"}
             
         # Set up the model
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         
         # Create structured prompt for CV parsing
         prompt = f"""
         You are a professional CV/resume parser. Extract the following information from this CV text:
         
-        {cv_text}
+        {compact_cv_text(cv_text, 'parse_cv_with_gemini')}
         
         Provide output in JSON format with the following structure:
         {{
@@ -87,20 +90,11 @@ async def parse_cv_with_gemini(cv_text: str) -> Dict[str, Any]:
         """
 
         # Generate response
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
         
-        # Extract text response
+        # Extract and parse JSON
         text_response = response.text
-        
-        # Try to parse the JSON response
-        # Remove markdown code block indicators if present
-        if "```json" in text_response:
-            text_response = text_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in text_response:
-            text_response = text_response.split("```")[1].strip()
-            
-        # Parse JSON
-        parsed_data = json.loads(text_response)
+        parsed_data = extract_json(text_response, dict)
         
         # Ensure skills is a list
         if "skills" in parsed_data and not isinstance(parsed_data["skills"], list):
@@ -112,7 +106,7 @@ async def parse_cv_with_gemini(cv_text: str) -> Dict[str, Any]:
                 
         return parsed_data
     
-    except json.JSONDecodeError as e:
+    except LLMJSONError as e:
         print(f"Error parsing Gemini response as JSON: {e}")
         print(f"Raw response was: {text_response if 'text_response' in locals() else 'No response received'}")
         return {
@@ -140,7 +134,7 @@ async def generate_job_recommendations(profile_data: Dict[str, Any], count: int
     """
     try:
         # Check if API key is available
-        if not GEMINI_API_KEY:
+        if not llm_available(GEMINI_API_KEY):
             print("Gemini API key not available, returning sample data")
             return [
                 {"title": "Software Developer", "company": "Tech Corp", "match_score": 95},
@@ -149,7 +143,7 @@ async def generate_job_recommendations(profile_data: Dict[str, Any], count: int
             ]
         
         # Set up the model
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         
         # Extract skills and experience from profile
         skills = profile_data.get("skills", [])
@@ -189,19 +183,11 @@ async def generate_job_recommendations(profile_data: Dict[str, Any], count: int
         """
         
         # Generate response
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
         
         # Extract and parse JSON
         text_response = response.text
-        
-        # Clean up the response to extract just the JSON
-        if "```json" in text_response:
-            text_response = text_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in text_response:
-            text_response = text_response.split("```")[1].strip()
-            
-        # Parse JSON
-        job_recommendations = json.loads(text_response)
+        job_recommendations = extract_json(text_response, list)
         
         return job_recommendations
     
@@ -240,7 +226,7 @@ async def generate_skills_gap_analysis(profile_data: Dict[str, Any], target_job:
     """
     try:
         # Check if API key is available
-        if not GEMINI_API_KEY:
+        if not llm_available(GEMINI_API_KEY):
             print("Gemini API key not available, returning sample data")
             return {
                 "target_job": target_job,
@@ -254,7 +240,7 @@ async def generate_skills_gap_analysis(profile_data: Dict[str, Any], target_job:
             }
             
         # Set up the model
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         
         # Extract user skills
         user_skills = profile_data.get("skills", [])
@@ -291,19 +277,11 @@ async def generate_skills_gap_analysis(profile_data: Dict[str, Any], target_job:
         """
         
         # Generate response
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
         
         # Extract and parse JSON
         text_response = response.text
-        
-        # Clean up the response to extract just the JSON
-        if "```json" in text_response:
-            text_response = text_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in text_response:
-            text_response = text_response.split("```")[1].strip()
-            
-        # Parse JSON
-        analysis = json.loads(text_response)
+        analysis = extract_json(text_response, dict)
         
         return analysis
     
@@ -341,7 +319,7 @@ async def generate_learning_roadmap(profile_data: Dict[str, Any], target_job: st
     """
     try:
         # Check if API key is available
-        if not GEMINI_API_KEY:
+        if not llm_available(GEMINI_API_KEY):
             print("Gemini API key not available, returning sample data")
             return {
                 "target_job": target_job,
@@ -370,7 +348,7 @@ async def generate_learning_roadmap(profile_data: Dict[str, Any], target_job: st
             }
             
         # Set up the model
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         
         # Extract relevant user data
         user_skills = profile_data.get("skills", [])
@@ -415,19 +393,11 @@ async def generate_learning_roadmap(profile_data: Dict[str, Any], target_job: st
         """
         
         # Generate response
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
         
         # Extract and parse JSON
         text_response = response.text
-        
-        # Clean up the response to extract just the JSON
-        if "```json" in text_response:
-            text_response = text_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in text_response:
-            text_response = text_response.split("```")[1].strip()
-            
-        # Parse JSON
-        roadmap = json.loads(text_response)
+        roadmap = extract_json(text_response, dict)
         
         return roadmap
     
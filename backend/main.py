@@ -80,6 +80,8 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from supabase import create_client, Client
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -87,24 +89,50 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import our custom modules
-from backend.core.file_processing import extract_text_from_file
+from backend.core.file_processing import extract_text_from_file, UploadTooLarge, UploadSizeLimitMiddleware
 from backend.core.ai_helpers import parse_cv_text
 from backend.core.job_recommendation import get_job_recommendations
 from backend.core.gemini_helpers import parse_cv_with_gemini
+from backend.core.extraction_service import extraction_service, ExtractionQueueFull, ExtractionTimeout
+from backend.core.cache_utils import run_cache_compaction, get_cache_stats
+from backend.core.llm_admission import LLMUserMiddleware
+from backend.core.llm_clients import get_llm_client_stats
+from backend.core.llm_resilience import gemini_breaker
+from backend.core.cv_prompt import get_prompt_compaction_stats
+from backend.core.single_flight import get_single_flight_stats
 
 # Import API modules
 from backend.api.recommendation_api import add_recommendation_routes
-from api.cv_parser import add_cv_routes
-from api.contact_api import router as contact_router
-from api.auth_api import router as auth_router
-from api.admin_api import router as admin_router
+from backend.api.cv_parser import add_cv_routes, cv_jobs
+from backend.api.contact_api import router as contact_router
+from backend.api.auth_api import router as auth_router
+from backend.api.admin_api import router as admin_router
 
 # Import our improved CV parser
-from api.cv_parser import router as cv_parser_router
+from backend.api.cv_parser import router as cv_parser_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the extraction workers, CV job workers and cache compaction before serving and stop them on shutdown."""
+    await extraction_service.warm_up()
+    await cv_jobs.start()
+    # Compile the LangGraph workflow before the first CV arrives
+    get_career_path_workflow(fan_out=False)
+    get_career_path_workflow(fan_out=True)
+    # The first compaction scans the cache directory in the background, so serving starts immediately
+    compaction_task = asyncio.create_task(run_cache_compaction())
+    yield
+    compaction_task.cancel()
+    await cv_jobs.stop()
+    extraction_service.shutdown()
 
 app = FastAPI(title="Career Path Finder API", 
               description="Backend API for the Career Path Finder application",
-              version="1.0.0")
+              version="1.0.0",
+              lifespan=lifespan)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(LLMUserMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -190,11 +218,11 @@ async def get_dashboard(email: str):
         roadmap = roadmap_result.data[0]["roadmap_data"] if "roadmap_data" in roadmap_result.data[0] else None
 
     # Get job recommendations for the dashboard
-    from job_recommendation import get_job_recommendations
+    from backend.job_recommendation import get_job_recommendations
     job_recommendations = get_job_recommendations(user["profile_data"], limit=3)
     
     # Get career path recommendations for the dashboard
-    from career_path_progression import get_career_path_recommendations
+    from backend.career_path_progression import get_career_path_recommendations
     career_path_recommendations = get_career_path_recommendations(user["profile_data"], limit=2)
     
     # Build dashboard response with real recommendations
@@ -217,10 +245,13 @@ async def get_dashboard(email: str):
     return dashboard
 
 # Import the caching utilities
-from core.cache_utils import get_cache_key, get_from_cache, save_to_cache
+from backend.core.cache_utils import (get_cache_key, get_from_cache, save_to_cache,
+                                      get_workflow_from_cache, save_workflow_to_cache, WORKFLOW_CACHE_VERSION)
+from backend.core.file_cache import get_upload_key, get_file_entry, save_file_text, save_file_result
 
 # Import LangGraph workflow
-from workflows.langgraph_workflow import run_workflow_with_cv
+from backend.workflows.langgraph_workflow import run_workflow_with_cv, get_career_path_workflow, resolve_fan_out
+from backend.workflows.node_cache import get_node_cache_stats
 
 # Add API routes
 add_recommendation_routes(app)
@@ -236,23 +267,53 @@ def get_supabase_override():
 app.include_router(cv_parser_router, prefix="/api")
 
 # Add contact API router with Supabase dependency override
-from api.contact_api import get_supabase as contact_get_supabase
+from backend.api.contact_api import get_supabase as contact_get_supabase
 app.dependency_overrides[contact_get_supabase] = get_supabase_override
 app.include_router(contact_router)
 
 # Add auth API router with Supabase dependency override
-from api.auth_api import get_supabase as auth_get_supabase
+from backend.api.auth_api import get_supabase as auth_get_supabase
 app.dependency_overrides[auth_get_supabase] = get_supabase_override
 app.include_router(auth_router)
 
 # Add admin API router with Supabase dependency override
-from api.admin_api import get_supabase as admin_get_supabase
+from backend.api.admin_api import get_supabase as admin_get_supabase
 app.dependency_overrides[admin_get_supabase] = get_supabase_override
 app.include_router(admin_router)
 
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """
+    Report Gemini usage: call counts, the admission queue (depth per user, in-flight
+    calls, wait-time percentiles), the circuit breaker, the cached model handles, the
+    input and output size of compacted CV prompts and the CV parses and workflow runs
+    coalesced with an identical one already in flight.
+    """
+    return {**get_llm_client_stats(), "prompt_compaction": get_prompt_compaction_stats(),
+            "single_flight": get_single_flight_stats()}
+
+
+@app.get("/api/llm/breaker")
+async def get_llm_breaker():
+    """Report the Gemini circuit breaker: state, consecutive failures and seconds until the next probe."""
+    return gemini_breaker.stats()
+
+
+@app.get("/api/cache/stats")
+async def get_result_cache_stats():
+    """
+    Report the result cache: hits and misses of the memory and disk tiers, the memory
+    tier's size, the last compaction and the hit rate of each memoized workflow node.
+    """
+    return {**get_cache_stats(), "nodes": get_node_cache_stats()}
+
 # Legacy CV Upload and Parsing Endpoint (kept for backward compatibility)
 @app.post("/api/upload-cv")
-async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(True, description="Whether to use LangGraph for enhanced CV processing")):
+async def upload_cv(
+    file: UploadFile = File(...),
+    use_langgraph: bool = Query(True, description="Whether to use LangGraph for enhanced CV processing"),
+    fan_out: Optional[bool] = Query(None, description="Generate career recommendations in parallel with the skills analysis (defaults to the server setting)")
+):
     """
     Upload and parse a CV file (PDF or DOCX).
     
@@ -262,30 +323,49 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
     Parameters:
     - file: The CV file to upload (PDF or DOCX)
     - use_langgraph: Whether to use LangGraph for enhanced processing (defaults to True)
+    - fan_out: Whether to run the fan-out workflow, which skips one Gemini round-trip (defaults to WORKFLOW_FAN_OUT)
     """
     # Validate file type
     if not file.filename.lower().endswith(('.pdf', '.docx')):
         raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
     
     try:
-        # Extract text from file
-        print(f"Extracting text from {file.filename}...")
-        extracted_text = await extract_text_from_file(file)
+        # Skip extraction entirely if this exact file has been processed before
+        file_key = await get_upload_key(file)
+        file_entry = get_file_entry(file_key)
+        if file_entry and file_entry["result"] and not use_langgraph:
+            print("Using cached result for identical file")
+            return {
+                "status": "success",
+                "data": file_entry["result"],
+                "source": "cache"
+            }
+        
+        if file_entry:
+            print("Using cached text for identical file")
+            extracted_text = file_entry["text"]
+        else:
+            # Extract text from file
+            print(f"Extracting text from {file.filename}...")
+            extracted_text = await extract_text_from_file(file)
+            save_file_text(file_key, extracted_text)
         
         if not extracted_text or len(extracted_text) < 50:  # Basic validation
             print("Insufficient text extracted, using fallback methods")
             # Still attempt fallback extraction even with limited text
             from backend.core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
                                  extract_education, extract_experience, extract_projects, extract_interests)
+            from backend.core.cv_document import CVDocument
+            cv_doc = CVDocument(extracted_text)
             fallback_data = {
-                "name": extract_name(extracted_text),
-                "email": extract_email(extracted_text),
-                "phone": extract_phone(extracted_text),
-                "skills": extract_skills(extracted_text) if extracted_text else ["Insufficient document text"],
-                "education": extract_education(extracted_text) if extracted_text else [{"institution": "Could not extract education information"}],
-                "work_experience": extract_experience(extracted_text) if extracted_text else [{"company": "Could not extract work experience"}],
-                "projects": extract_projects(extracted_text) if extracted_text else [{"name": "Could not extract projects"}],
-                "interests": extract_interests(extracted_text) if extracted_text else ["Document processing issue"]
+                "name": extract_name(cv_doc),
+                "email": extract_email(cv_doc),
+                "phone": extract_phone(cv_doc),
+                "skills": extract_skills(cv_doc) if extracted_text else ["Insufficient document text"],
+                "education": extract_education(cv_doc) if extracted_text else [{"institution": "Could not extract education information"}],
+                "work_experience": extract_experience(cv_doc) if extracted_text else [{"company": "Could not extract work experience"}],
+                "projects": extract_projects(cv_doc) if extracted_text else [{"name": "Could not extract projects"}],
+                "interests": extract_interests(cv_doc) if extracted_text else ["Document processing issue"]
             }
             return {
                 "status": "success",
@@ -294,24 +374,33 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
                 "message": "Limited text extracted from document. Results may be incomplete."
             }
         
-        # Check cache first
         cache_key = get_cache_key(extracted_text)
-        cached_result = get_from_cache(cache_key)
-        
-        if cached_result:
-            print("Using cached CV parsing result")
-            return {
-                "status": "success",
-                "data": cached_result,
-                "source": "cache"
-            }
         
         if use_langgraph:
+            # A cached workflow run is answered in the same shape as a fresh one
+            fan_out = resolve_fan_out(fan_out)
+            workflow_mode = "fan_out" if fan_out else "sequential"
+            cached_workflow = get_workflow_from_cache(extracted_text, fan_out)
+            if cached_workflow:
+                print("Using cached LangGraph workflow result")
+                return {
+                    "status": "success",
+                    "data": cached_workflow.get("parsed_profile", {}),
+                    "workflow_result": {
+                        "skills_analysis": cached_workflow.get("skills_analysis"),
+                        "career_recommendations": cached_workflow.get("career_recommendations"),
+                        "roadmap": cached_workflow.get("roadmap")
+                    },
+                    "source": "cache",
+                    "cache_schema_version": WORKFLOW_CACHE_VERSION,
+                    "workflow_mode": workflow_mode
+                }
+            
             # Process with LangGraph workflow
             print("Processing CV with LangGraph workflow...")
             try:
                 # Run the full LangGraph workflow
-                workflow_result = await run_workflow_with_cv(extracted_text)
+                workflow_result = await run_workflow_with_cv(extracted_text, fan_out)
                 
                 if "error" in workflow_result and workflow_result["error"]:
                     print(f"Error in LangGraph workflow: {workflow_result['error']}")
@@ -327,9 +416,13 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
                     
                     if workflow_result.get("career_recommendations"):
                         parsed_cv["career_recommendations"] = workflow_result["career_recommendations"]
+                    
+                    # Keep the whole run so a repeat upload gets the full response
+                    save_workflow_to_cache(extracted_text, workflow_result, fan_out)
                 
                 # Save to cache for future use
                 save_to_cache(cache_key, parsed_cv)
+                save_file_result(file_key, extracted_text, parsed_cv)
                 
                 return {
                     "status": "success",
@@ -339,7 +432,8 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
                         "career_recommendations": workflow_result.get("career_recommendations"),
                         "roadmap": workflow_result.get("roadmap")
                     },
-                    "source": "langgraph"
+                    "source": "langgraph",
+                    "workflow_mode": workflow_mode
                 }
                 
             except Exception as workflow_error:
@@ -347,6 +441,18 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
                 # Fall back to basic parsing
                 print("Falling back to basic parsing...")
         
+        # Check cache before parsing with basic methods
+        cached_result = get_from_cache(cache_key)
+        
+        if cached_result:
+            print("Using cached CV parsing result")
+            save_file_result(file_key, extracted_text, cached_result)
+            return {
+                "status": "success",
+                "data": cached_result,
+                "source": "cache"
+            }
+        
         # Parse the extracted text with basic methods
         print("Parsing CV text with basic AI...")
         parsed_cv = await parse_cv_text(extracted_text)
@@ -357,6 +463,7 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
             print(f"Using fallback data due to API error: {parsed_cv['api_error']}")
             result_data = parsed_cv.get("parsed_data", {})
             save_to_cache(cache_key, result_data)
+            save_file_result(file_key, extracted_text, result_data)
             return {
                 "status": "success",
                 "data": result_data,
@@ -366,18 +473,7 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
         elif "error" in parsed_cv:
             # Still return what we have instead of raising an exception
             print(f"Error in parsing: {parsed_cv['error']}")
-            from backend.core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
-                                 extract_education, extract_experience, extract_projects, extract_interests)
-            fallback_data = {
-                "name": extract_name(extracted_text),
-                "email": extract_email(extracted_text),
-                "phone": extract_phone(extracted_text),
-                "skills": extract_skills(extracted_text),
-                "education": extract_education(extracted_text),
-                "work_experience": extract_experience(extracted_text),
-                "projects": extract_projects(extracted_text),
-                "interests": extract_interests(extracted_text)
-            }
+            fallback_data = await extraction_service.extract_profile(extracted_text)
             return {
                 "status": "partial",
                 "data": fallback_data,
@@ -386,35 +482,36 @@ async def upload_cv(file: UploadFile = File(...), use_langgraph: bool = Query(Tr
         else:
             # Successful parsing
             save_to_cache(cache_key, parsed_cv)
+            save_file_result(file_key, extracted_text, parsed_cv)
             return {
                 "status": "success",
                 "data": parsed_cv,
                 "source": "basic_ai"
             }
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.detail)
+    except ExtractionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Error processing CV: {e}")
         # Instead of failing, return a fallback response
         try:
             # Still try to extract basic info
-            from backend.core.ai_helpers import (extract_name, extract_email, extract_phone, extract_skills, 
-                                  extract_education, extract_experience, extract_projects, extract_interests)
-            
-            fallback_data = {
-                "name": extract_name(extracted_text if 'extracted_text' in locals() else ""),
-                "email": extract_email(extracted_text if 'extracted_text' in locals() else ""),
-                "phone": extract_phone(extracted_text if 'extracted_text' in locals() else ""),
-                "skills": extract_skills(extracted_text if 'extracted_text' in locals() else ""),
-                "education": extract_education(extracted_text if 'extracted_text' in locals() else ""),
-                "work_experience": extract_experience(extracted_text if 'extracted_text' in locals() else ""),
-                "projects": extract_projects(extracted_text if 'extracted_text' in locals() else ""),
-                "interests": extract_interests(extracted_text if 'extracted_text' in locals() else "")
-            }
+            fallback_data = await extraction_service.extract_profile(
+                extracted_text if 'extracted_text' in locals() else ""
+            )
             
             return {
                 "status": "error_with_fallback",
                 "data": fallback_data,
                 "error": str(e)
             }
+        except ExtractionQueueFull as fallback_error:
+            raise HTTPException(status_code=503, detail=str(fallback_error), headers={"Retry-After": "5"})
+        except ExtractionTimeout as fallback_error:
+            raise HTTPException(status_code=504, detail=str(fallback_error))
         except Exception as fallback_error:
             # If even fallback fails, just return the error
             print(f"Fallback extraction also failed: {fallback_error}")
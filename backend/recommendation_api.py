@@ -9,12 +9,12 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
 # Import job recommendation module
-from job_recommendation import get_job_recommendations
-from career_path_progression import get_career_path_recommendations
-from skills_gap_analysis import analyze_skills_gap
+from backend.job_recommendation import get_job_recommendations
+from backend.career_path_progression import get_career_path_recommendations
+from backend.skills_gap_analysis import analyze_skills_gap
 
 # Import LangGraph workflow
-from workflows.langgraph_workflow import run_workflow_with_cv, run_workflow_with_profile
+from backend.workflows.langgraph_workflow import run_workflow_with_cv, run_workflow_with_profile
 
 # Define the recommendation router
 recommendation_router = APIRouter()
@@ -46,7 +46,7 @@ def add_recommendation_routes(app):
             # Store results in database if user_id is provided
             user_id = profile_data.get("user_id")
             if user_id:
-                from main import supabase
+                from backend.main import supabase
                 roadmap_data = result.get("roadmap", {})
                 
                 # Check if user already has a roadmap
@@ -81,7 +81,7 @@ def add_recommendation_routes(app):
         """Get job recommendations for a user"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
@@ -101,7 +101,7 @@ def add_recommendation_routes(app):
         """Get career path recommendations for a user"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
@@ -121,7 +121,7 @@ def add_recommendation_routes(app):
         """Get skills gap analysis for a user and optional job"""
         try:
             # Get user profile from Supabase
-            from main import supabase
+            from backend.main import supabase
             user_result = supabase.table("users").select("*").eq("email", email).execute()
             user = None
             if user_result.data and len(user_result.data) > 0:
@@ -0,0 +1,315 @@
+"""
+Golden-output tests for the fallback extractors in ai_helpers.
+
+The expected values were produced by the extractors as they were before they
+were rewritten around the precompiled skill matcher and CVDocument, so these
+tests fail if a rewrite changes what any extractor returns, quirks included.
+"""
+
+import pytest
+
+from backend.core import ai_helpers
+
+CVS = {
+    "plain": (
+        "Jane Doe\n"
+        "jane.doe@example.com | +44 20 7946 0958\n"
+        "\n"
+        "Summary:\n"
+        "Data engineer with 5 years of experience.\n"
+        "\n"
+        "Work Experience:\n"
+        "2019 - 2023 Data Engineer at Acme Corp\n"
+        "• Built ETL pipelines with Python, Spark and Airflow on AWS.\n"
+        "• Reduced query costs by 40% using PostgreSQL indexes.\n"
+        "2017 - 2019 Junior Developer at Globex\n"
+        "• Developed a web application using Django and React.\n"
+        "\n"
+        "Education:\n"
+        "BSc Computer Science, University of Leeds, 2017\n"
+        "MSc Data Science, Imperial College London, 2019\n"
+        "\n"
+        "Skills:\n"
+        "Python, SQL, Spark, Docker, Kubernetes, Machine Learning, Git\n"
+        "\n"
+        "Projects:\n"
+        "• CV Parser - Built a CV parsing service with FastAPI and Gemini.\n"
+        "• Dashboard Platform: Developed a dashboard using React and Node.js. Technologies: TypeScript, D3\n"
+        "\n"
+        "Interests:\n"
+        "Hiking, chess, open source\n"
+    ),
+    "uppercase": (
+        "JOHN SMITH\n"
+        "Senior Software Engineer\n"
+        "Email: john.smith@mail.com   Phone: (555) 123-4567\n"
+        "\n"
+        "PROFESSIONAL EXPERIENCE\n"
+        "Senior Software Engineer, Initech (2020-Present)\n"
+        "- Led a team of 6 engineers building microservices in Java and Go.\n"
+        "- Migrated legacy systems to Kubernetes on Google Cloud.\n"
+        "\n"
+        "EDUCATION\n"
+        "Bachelor of Engineering in Software Engineering, MIT, 2014\n"
+        "\n"
+        "TECHNICAL SKILLS\n"
+        "Java, Go, C++, JavaScript, TensorFlow, Terraform, Jenkins, Agile\n"
+        "\n"
+        "HOBBIES\n"
+        "Cycling and photography\n"
+    ),
+    "minimal": (
+        "Alex Kim\n"
+        "alex@kim.dev\n"
+        "Skills: python, r, tableau, excel\n"
+    ),
+    "no_headers": (
+        "Maria Garcia\n"
+        "I am a frontend developer experienced in Vue.js, Angular, HTML and CSS.\n"
+        "Worked at Shopify as a UI developer from 2018 to 2022.\n"
+        "Studied at Universidad de Madrid, Bachelor in Computer Science.\n"
+        "Contact: maria.garcia@example.es, +34 612 345 678\n"
+    ),
+    "academic": (
+        "Dr. Priya Patel\n"
+        "priya@uni.edu\n"
+        "\n"
+        "Academic Background:\n"
+        "PhD in Machine Learning, Stanford University, 2016\n"
+        "B.Tech in Electrical Engineering, IIT Bombay, 2011\n"
+        "\n"
+        "Employment History:\n"
+        "Research Scientist at DeepMind, 2016 - present\n"
+        "Teaching Assistant, Stanford University, 2012 - 2016\n"
+        "\n"
+        "Publications:\n"
+        '"Deep Learning for Graphs", NeurIPS 2018\n'
+        "\n"
+        "Key Projects:\n"
+        "Graph Neural Network Toolkit - PyTorch library for graph learning\n"
+        "AutoML Benchmark - Large scale benchmark of AutoML systems\n"
+        "\n"
+        "Certifications:\n"
+        "AWS Certified Machine Learning Specialty\n"
+        "\n"
+        "Interests: running, piano\n"
+    ),
+    "empty": "",
+}
+
+EXPECTED = {
+    "plain": {
+        "extract_name": "Work Experience:",
+        "extract_email": "jane.doe@example.com",
+        "extract_phone": "",
+        "extract_skills": [
+            "Python",
+            "TypeScript",
+            "React",
+            "Node.js",
+            "Django",
+            "FastAPI",
+            "SQL",
+            "PostgreSQL",
+            "AWS",
+            "Docker",
+            "Kubernetes",
+            "Git",
+            "Machine Learning",
+        ],
+        "extract_education": [
+            {
+                "institution": "University of Leeds",
+                "degree": "BSc Computer Science",
+                "field": "Not specified",
+                "years": "2017",
+            },
+            {
+                "institution": "Imperial College London",
+                "degree": "MSc Data Science",
+                "field": "Not specified",
+                "years": "2019",
+            },
+        ],
+        "extract_experience": [
+            {
+                "company": "Acme Corp",
+                "role": "2019 - 2023  Data Engineer",
+                "years": "2019 - 2023",
+                "description": "• Built ETL pipelines with Python, Spark and Airflow on AWS. • Reduced query costs by 40% using PostgreSQL indexes.",
+            },
+        ],
+        "extract_projects": [
+            {
+                "name": "• CV Parser - Built a CV parsing service with FastAPI and Gemini.",
+                "description": "",
+                "technologies": [],
+            },
+            {
+                "name": "Dashboard Platform: Developed a dashboard using React and Node.js. Technologies: TypeScript, D3",
+                "description": "",
+                "technologies": ["TypeScript", "D3"],
+            },
+        ],
+        "extract_interests": ["hiking", "chess", "open source"],
+    },
+    "uppercase": {
+        "extract_name": "Senior Software Engineer",
+        "extract_email": "john.smith@mail.com",
+        "extract_phone": "(555) ",
+        "extract_skills": [
+            "JavaScript",
+            "Java",
+            "Go",
+            "Google Cloud",
+            "Kubernetes",
+            "Jenkins",
+            "Terraform",
+            "TensorFlow",
+            "Agile",
+            "Microservices",
+        ],
+        "extract_education": [
+            {
+                "institution": "",
+                "degree": "ms to Kubernetes on Google Cloud",
+                "field": "Not specified",
+                "years": "",
+            },
+            {
+                "institution": "",
+                "degree": "Bachelor of Engineering in Software En",
+                "field": "Software Engineering",
+                "years": "2014",
+            },
+        ],
+        "extract_experience": [
+            {
+                "role": "Engineer",
+                "company": "Company details in CV",
+                "description": "See full CV for detailed work experience description.",
+            },
+        ],
+        "extract_projects": [
+            {
+                "name": "No project information found",
+                "description": "Consider adding projects to showcase your practical experience.",
+            },
+        ],
+        "extract_interests": ["cycling and photography"],
+    },
+    "minimal": {
+        "extract_name": "Alex Kim",
+        "extract_email": "alex@kim.dev",
+        "extract_phone": "Phone not detected",
+        "extract_skills": ["Python", "Tableau", "R"],
+        "extract_education": [
+            {
+                "institution": "Education section not clearly identified",
+                "degree": "See full CV for details",
+                "field": "",
+                "years": "",
+            },
+        ],
+        "extract_experience": [
+            {"company": "Experience section not clearly identified", "role": "See full CV for details"},
+        ],
+        "extract_projects": [
+            {
+                "name": "No project information found",
+                "description": "Consider adding projects to showcase your practical experience.",
+            },
+        ],
+        "extract_interests": ["Interests not specifically identified"],
+    },
+    "no_headers": {
+        "extract_name": "Maria Garcia",
+        "extract_email": "maria.garcia@example.es",
+        "extract_phone": "+34 612",
+        "extract_skills": ["HTML", "CSS", "Vue.js", "Angular"],
+        "extract_education": [
+            {"institution": "", "degree": "Madrid", "field": "Computer Science", "years": ""},
+            {"institution": "", "degree": "maria", "field": "Not specified", "years": ""},
+        ],
+        "extract_experience": [
+            {
+                "company": "",
+                "role": "Maria Garcia",
+                "years": "",
+                "description": "I am a frontend developer experienced in Vue .js, Angular, HTML and CSS.",
+            },
+        ],
+        "extract_projects": [
+            {
+                "name": "No project information found",
+                "description": "Consider adding projects to showcase your practical experience.",
+            },
+        ],
+        "extract_interests": ["Interests not specifically identified"],
+    },
+    "academic": {
+        "extract_name": "Dr. Priya Patel",
+        "extract_email": "priya@uni.edu",
+        "extract_phone": "Phone not detected",
+        "extract_skills": ["AWS", "Machine Learning", "Deep Learning", "PyTorch"],
+        "extract_education": [
+            {
+                "institution": "Stanford University",
+                "degree": "PhD in Machine Learning",
+                "field": "Machine Learning",
+                "years": "2016",
+            },
+            {
+                "institution": "",
+                "degree": "B.Tech in Electrical Engineering",
+                "field": "Electrical Engineering",
+                "years": "2011",
+            },
+        ],
+        "extract_experience": [
+            {
+                "company": "DeepMind,  2016 - present",
+                "role": "Research Scientist",
+                "years": "2016 - present",
+                "description": "",
+            },
+        ],
+        "extract_projects": [
+            {
+                "name": "Graph Neural Network Toolkit - PyTorch library for graph learning",
+                "description": "AutoML Benchmark - Large scale benchmark of AutoML systems",
+                "technologies": [],
+            },
+        ],
+        "extract_interests": [": running", "piano"],
+    },
+    "empty": {
+        "extract_name": "Name not detected",
+        "extract_email": "Email not detected",
+        "extract_phone": "Phone not detected",
+        "extract_skills": ["Skills extraction requires full API"],
+        "extract_education": [
+            {
+                "institution": "Education section not clearly identified",
+                "degree": "See full CV for details",
+                "field": "",
+                "years": "",
+            },
+        ],
+        "extract_experience": [
+            {"company": "Experience section not clearly identified", "role": "See full CV for details"},
+        ],
+        "extract_projects": [
+            {
+                "name": "No project information found",
+                "description": "Consider adding projects to showcase your practical experience.",
+            },
+        ],
+        "extract_interests": ["Interests not specifically identified"],
+    },
+}
+
+
+@pytest.mark.parametrize("cv, extractor", [(cv, extractor) for cv in EXPECTED for extractor in EXPECTED[cv]])
+def test_extractor_output_is_unchanged(cv, extractor):
+    assert getattr(ai_helpers, extractor)(CVS[cv]) == EXPECTED[cv][extractor]
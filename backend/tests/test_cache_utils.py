@@ -0,0 +1,192 @@
+"""Tests for the two-tier CV parsing cache."""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+import pytest
+import zstandard
+
+from backend.core import cache_utils
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the cache at an empty directory with an empty memory tier and counters."""
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_utils, "memory_cache", OrderedDict())
+    monkeypatch.setattr(cache_utils, "memory_cache_bytes", 0)
+    monkeypatch.setattr(cache_utils, "ready_shards", set())
+    monkeypatch.setattr(cache_utils, "legacy_cache_migrated", False)
+    monkeypatch.setattr(cache_utils, "cache_stats", {"memory": {"hits": 0, "misses": 0},
+                                                     "disk": {"hits": 0, "misses": 0}})
+    return tmp_path
+
+
+def test_entries_are_served_from_memory_after_a_disk_hit():
+    cache_utils.save_to_cache("key", {"name": "Ada"})
+    cache_utils.forget("key")
+
+    assert cache_utils.get_from_cache("key") == {"name": "Ada"}
+    assert cache_utils.get_from_cache("key") == {"name": "Ada"}
+    assert cache_utils.get_from_cache("missing") is None
+    stats = cache_utils.get_cache_stats()
+    assert stats["memory"]["hits"] == 1 and stats["memory"]["misses"] == 2
+    assert stats["disk"]["hits"] == 1 and stats["disk"]["misses"] == 1
+    assert stats["memory"]["entries"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(cache_utils, "MEMORY_CACHE_MAX_ENTRIES", 2)
+    for key in ("a", "b"):
+        cache_utils.save_to_cache(key, key)
+    cache_utils.get_from_cache("a")
+    cache_utils.save_to_cache("c", "c")
+
+    assert list(cache_utils.memory_cache) == ["a", "c"]
+    assert cache_utils.memory_cache_bytes == sum(len(payload) for payload, _ in cache_utils.memory_cache.values())
+
+
+def test_counters_are_not_lost_across_threads():
+    cache_utils.save_to_cache("key", [1, 2, 3])
+
+    def lookups():
+        for _ in range(2000):
+            cache_utils.get_from_cache("key")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache_utils.get_cache_stats()["memory"]["hits"] == 8 * 2000
+
+
+def write_legacy_entry(cache_dir, key, data, age_days=0):
+    path = cache_dir / f"{key}.json"
+    path.write_text(json.dumps(data))
+    saved_at = time.time() - age_days * 86400
+    os.utime(path, (saved_at, saved_at))
+    return path
+
+
+def test_legacy_entry_is_migrated_to_a_compressed_shard_on_access(cache_dir):
+    legacy = write_legacy_entry(cache_dir, "key", {"name": "Ada", "skills": ["python"]}, age_days=1)
+    saved_at = legacy.stat().st_mtime
+
+    assert cache_utils.get_from_cache("key") == {"name": "Ada", "skills": ["python"]}
+    path = cache_utils.get_cache_path("key")
+    assert not legacy.exists()
+    assert os.path.getmtime(path) == pytest.approx(saved_at)
+    with open(path, "rb") as f:
+        assert orjson.loads(zstandard.ZstdDecompressor().decompress(f.read())) == {"name": "Ada", "skills": ["python"]}
+    cache_utils.forget("key")
+    assert cache_utils.get_from_cache("key") == {"name": "Ada", "skills": ["python"]}
+
+
+def test_migrate_legacy_cache_moves_every_entry(cache_dir):
+    write_legacy_entry(cache_dir, "fresh", [1, 2])
+    write_legacy_entry(cache_dir, "expired", [3], age_days=cache_utils.CACHE_EXPIRY_DAYS + 1)
+    (cache_dir / "corrupt.json").write_text("{not json")
+
+    assert cache_utils.migrate_legacy_cache() == 1
+    assert list(cache_dir.glob("*.json")) == []
+    assert cache_utils.get_from_cache("fresh") == [1, 2]
+    assert cache_utils.get_from_cache("expired") is None
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_corrupt_entry_is_removed(cache_dir, legacy):
+    if legacy:
+        path = cache_dir / "key.json"
+        path.write_text("{not json")
+    else:
+        cache_utils.save_to_cache("key", {"name": "Ada"})
+        cache_utils.forget("key")
+        path = cache_utils.get_cache_path("key")
+        with open(path, "wb") as f:
+            f.write(b"not zstd")
+
+    assert cache_utils.get_from_cache("key") is None
+    assert not os.path.exists(path)
+
+
+def test_writes_leave_no_temporary_files(cache_dir):
+    for i in range(20):
+        cache_utils.save_to_cache(f"key{i}", {"i": i})
+    files = [entry.name for entry in cache_utils.scan_cache_files()]
+    assert len(files) == 20 and all(name.endswith(cache_utils.CACHE_SUFFIX) for name in files)
+
+
+def age_entry(key, seconds):
+    """Make an entry look written and last read seconds ago."""
+    path = cache_utils.get_cache_path(key)
+    when = time.time() - seconds
+    os.utime(path, (when, when))
+    return path
+
+
+def test_compaction_removes_expired_and_least_recently_used_entries():
+    for i in range(5):
+        cache_utils.save_to_cache(f"key{i}", {"i": i})
+        age_entry(f"key{i}", 100 - i)
+    expired = age_entry("key4", (cache_utils.CACHE_EXPIRY_DAYS + 1) * 86400)
+    cache_utils.memory_cache.clear()
+    # key0 is the oldest, but an entry held in memory counts as the most recently used
+    cache_utils.remember("key0", b"{}", time.time())
+
+    result = cache_utils.compact_cache(max_entries=2)
+
+    assert result["removed"] == 3 and result["entries"] == 2
+    assert not os.path.exists(expired)
+    assert sorted(entry.name for entry in cache_utils.scan_cache_files()) == ["key0.zst", "key3.zst"]
+    assert cache_utils.get_cache_stats()["disk"]["last_compaction"]["removed"] == 3
+
+
+def test_compaction_keeps_the_directory_under_max_bytes():
+    for i in range(10):
+        cache_utils.save_to_cache(f"key{i}", "x" * 1000 + str(i))
+        age_entry(f"key{i}", 100 - i)
+    size = os.path.getsize(cache_utils.get_cache_path("key0"))
+
+    result = cache_utils.compact_cache(max_bytes=size * 3)
+
+    assert result["entries"] == 3 and result["bytes"] <= size * 3
+    assert sorted(entry.name for entry in cache_utils.scan_cache_files()) == ["key7.zst", "key8.zst", "key9.zst"]
+    assert cache_utils.get_from_cache("key0") is None
+
+
+def test_compaction_removes_stale_temporary_files():
+    cache_utils.save_to_cache("key", 1)
+    shard_dir = cache_utils.get_shard_dir("key")
+    stale, fresh = (os.path.join(shard_dir, name + cache_utils.TEMP_SUFFIX) for name in ("stale", "fresh"))
+    for path in (stale, fresh):
+        open(path, "wb").close()
+    when = time.time() - cache_utils.STALE_TEMP_SECONDS - 1
+    os.utime(stale, (when, when))
+
+    assert cache_utils.compact_cache()["removed"] == 1
+    assert not os.path.exists(stale) and os.path.exists(fresh)
+
+
+def test_workflow_state_is_cached_per_mode_without_the_cv():
+    state = {"raw_cv": "Jane Doe\nSkills: Python", "parsed_profile": {"name": "Jane Doe"}, "roadmap": {"steps": []},
+             "error": None, "current_step": "end"}
+    cache_utils.save_workflow_to_cache(state["raw_cv"], state, fan_out=True)
+
+    assert cache_utils.get_workflow_from_cache(state["raw_cv"], fan_out=True) == state
+    assert cache_utils.get_workflow_from_cache(state["raw_cv"]) is None
+    stored = cache_utils.get_from_cache(cache_utils.get_workflow_cache_key(state["raw_cv"], fan_out=True))
+    assert "raw_cv" not in stored["state"]
+
+
+def test_workflow_entries_of_other_versions_are_ignored(monkeypatch):
+    cache_utils.save_workflow_to_cache("cv", {"roadmap": {}})
+    monkeypatch.setattr(cache_utils, "WORKFLOW_CACHE_VERSION", cache_utils.WORKFLOW_CACHE_VERSION + 1)
+    assert cache_utils.get_workflow_from_cache("cv") is None
+    cache_utils.save_to_cache(cache_utils.get_workflow_cache_key("cv"), {"version": 1, "state": {}})
+    assert cache_utils.get_workflow_from_cache("cv") is None
@@ -0,0 +1,44 @@
+"""Tests for the CV segmentation shared by the fallback extractors."""
+
+from backend.core.cv_document import CVDocument
+
+CV = """Jane Doe
+jane@example.com
+
+Education:
+BSc Computer Science, 2018
+
+Work Experience:
+Data Engineer at Acme, 2019-2023
+
+Skills: Python, SQL
+"""
+
+
+def test_headers_are_found_once_per_occurrence():
+    cv_doc = CVDocument(CV)
+    assert set(cv_doc.sections) == {"education", "work experience", "skills"}
+    start, end = cv_doc.sections["skills"][0]
+    assert cv_doc.text[start:end].strip() == "Skills:"
+
+
+def test_section_runs_to_the_next_closing_header():
+    cv_doc = CVDocument(CV)
+    assert cv_doc.section(["education"], ["work experience", "skills"], 500) == "BSc Computer Science, 2018"
+    assert cv_doc.section([("experience", "work experience")], ["skills"], 500) == "Data Engineer at Acme, 2019-2023"
+
+
+def test_section_without_closing_header_is_limited():
+    cv_doc = CVDocument(CV)
+    assert cv_doc.section(["skills"], ["education"], 7) == "Python"
+
+
+def test_missing_section_is_empty():
+    assert CVDocument(CV).section(["projects"], ["skills"], 500) == ""
+    assert CVDocument(None).section(["skills"], [], 500) == ""
+
+
+def test_from_text_reuses_documents():
+    cv_doc = CVDocument(CV)
+    assert CVDocument.from_text(cv_doc) is cv_doc
+    assert CVDocument.from_text(CV).text == CV
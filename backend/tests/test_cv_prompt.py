@@ -0,0 +1,62 @@
+"""Tests for the compaction of CV text before it is sent to Gemini."""
+
+from backend.core.cv_prompt import TRUNCATION_MARKER, compact_cv_text, normalize_cv_text
+
+
+def paged_cv(pages):
+    """Join pages the way extract_pdf_text does."""
+    return "\f".join(page + "\n" for page in pages)
+
+
+PAGES = [
+    "Jane Doe\njane@example.com\n\nSkills:\nPython, SQL\n\nJane Doe - Curriculum Vitae\nPage 1 of 3",
+    "Jane Doe - Curriculum Vitae\nWork Experience:\n12\nData Engineer at Acme, 2019-2023\nJane Doe - Curriculum Vitae\nPage 2 of 3",
+    "Jane Doe - Curriculum Vitae\nEducation:\nBSc Computer Science, 2018\nJane Doe - Curriculum Vitae\nPage 3 of 3",
+]
+
+
+def test_whitespace_is_normalised_without_removing_text():
+    text = "  Jane   Doe\u00a0\u200b \r\n\r\n\r\n\tSkills:  Python \n\n12\nPython, SQL\nPython, SQL\n"
+    assert normalize_cv_text(text) == [["Jane Doe", "", "Skills: Python", "", "12", "Python, SQL", "Python, SQL"]]
+
+
+def test_repeated_lines_and_numbers_are_kept_within_budget():
+    text = paged_cv(PAGES)
+    compacted = compact_cv_text(text, budget=0)
+    assert compacted.count("Jane Doe - Curriculum Vitae") == 5
+    assert "Page 2 of 3" in compacted and "\n12\n" in compacted
+    assert compact_cv_text(text, budget=1000) == compacted
+
+
+def test_page_furniture_is_removed_over_budget():
+    text = paged_cv(PAGES)
+    budget = len(compact_cv_text(text, budget=0)) // 4 - 10
+    compacted = compact_cv_text(text, budget=budget)
+    assert compacted == (
+        "Jane Doe\njane@example.com\n\nSkills:\nPython, SQL\n"
+        "Work Experience:\n12\nData Engineer at Acme, 2019-2023\n"
+        "Education:\nBSc Computer Science, 2018"
+    )
+
+
+def test_header_repeating_the_cv_heading_is_kept_on_the_first_page():
+    pages = [f"Jane Doe\nSection {i}:\n" + "Built data pipelines. " * 20 for i in range(3)]
+    compacted = compact_cv_text(paged_cv(pages), budget=300)
+    assert compacted.startswith("Jane Doe\nSection 0:")
+    assert compacted.count("Jane Doe") == 1
+
+
+def test_line_repeated_inside_a_page_is_kept_over_budget():
+    pages = ["Jane Doe\nPython, SQL\nPython, SQL", "Skills:\nPython, SQL\n" + "Spark " * 100]
+    compacted = compact_cv_text(paged_cv(pages), budget=100)
+    assert compacted.count("Python, SQL") == 3
+
+
+def test_least_important_sections_are_cut_first():
+    text = ("Jane Doe\njane@example.com\nSkills:\nPython, SQL\n"
+            "Hobbies:\n" + "Hiking in the mountains.\n" * 40 + "References:\nAvailable on request.\n")
+    compacted = compact_cv_text(text, budget=60)
+    assert len(compacted) <= 60 * 4
+    assert compacted.startswith("Jane Doe\njane@example.com\nSkills:\nPython, SQL\nHobbies:")
+    assert TRUNCATION_MARKER in compacted
+    assert "References:" not in compacted
@@ -0,0 +1,129 @@
+"""Tests for the extraction service and the file extraction that runs on it."""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from backend.benchmarks.corpus import generate_docx
+from backend.core import file_processing
+from backend.core.extraction_service import ExtractionService, ExtractionQueueFull, ExtractionTimeout
+
+
+def test_jobs_run_off_the_event_loop():
+    service = ExtractionService(workers=0, queue_size=4, timeout=5)
+
+    async def main():
+        return threading.get_ident(), await service.run(threading.get_ident)
+
+    loop_thread, job_thread = asyncio.run(main())
+    assert job_thread != loop_thread
+
+
+def test_zero_timeout_is_not_replaced_by_default():
+    service = ExtractionService(workers=0, queue_size=4, timeout=5)
+
+    with pytest.raises(ExtractionTimeout, match="0 seconds"):
+        asyncio.run(service.run(time.sleep, 0.2, timeout=0))
+
+
+def test_jobs_beyond_queue_size_are_rejected():
+    service = ExtractionService(workers=0, queue_size=1, timeout=5)
+
+    async def main():
+        running = [asyncio.ensure_future(service.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ExtractionQueueFull):
+            await service.run(time.sleep, 0.1)
+        await asyncio.gather(*running)
+
+    asyncio.run(main())
+    assert service.pending == 0
+
+
+def test_docx_text_is_extracted_on_the_extraction_service(tmp_path, monkeypatch):
+    service = ExtractionService(workers=0, queue_size=4, timeout=5)
+    monkeypatch.setattr(file_processing, "extraction_service", service)
+    path = tmp_path / "cv.docx"
+    path.write_bytes(generate_docx("Jane Doe\nSkills: Python, SQL"))
+    threads = []
+    read_docx_text = file_processing.read_docx_text
+
+    def recording_read(path):
+        threads.append(threading.get_ident())
+        return read_docx_text(path)
+
+    monkeypatch.setattr(file_processing, "read_docx_text", recording_read)
+
+    async def main():
+        return threading.get_ident(), await file_processing.extract_text(str(path), "cv.docx")
+
+    loop_thread, text = asyncio.run(main())
+    assert text == "Jane Doe\nSkills: Python, SQL"
+    assert threads and threads[0] != loop_thread
+
+
+def test_docx_extraction_timeout_is_raised(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_processing, "extraction_service", ExtractionService(workers=0, queue_size=4, timeout=0))
+    path = tmp_path / "cv.docx"
+    path.write_bytes(generate_docx("Jane Doe"))
+
+    with pytest.raises(ExtractionTimeout):
+        asyncio.run(file_processing.extract_text(str(path), "cv.docx"))
+
+
+def spooled_upload(content, max_size):
+    file = tempfile.SpooledTemporaryFile(max_size=max_size)
+    file.write(content)
+    file.seek(0)
+    return UploadFile(file=file, filename="cv.docx")
+
+
+def test_small_upload_is_extracted_without_a_copy(monkeypatch):
+    monkeypatch.setattr(file_processing, "extraction_service", ExtractionService(workers=0, queue_size=4, timeout=5))
+    copies = []
+    monkeypatch.setattr(file_processing, "spool_upload", lambda *args: copies.append(args))
+    upload = spooled_upload(generate_docx("Jane Doe\nSkills: Python"), 1024 * 1024)
+
+    assert asyncio.run(file_processing.extract_text_from_file(upload)) == "Jane Doe\nSkills: Python"
+    assert copies == []
+
+
+def test_upload_of_a_named_file_is_read_in_place(tmp_path):
+    path = tmp_path / "cv.docx"
+    path.write_bytes(generate_docx("Jane Doe"))
+
+    async def main():
+        with open(path, "rb") as f:
+            return await file_processing.upload_source(UploadFile(file=f, filename="cv.docx"))
+
+    assert asyncio.run(main()) == (str(path), False)
+
+
+def test_large_upload_is_copied_once_and_removed(monkeypatch):
+    monkeypatch.setattr(file_processing, "extraction_service", ExtractionService(workers=0, queue_size=4, timeout=5))
+    monkeypatch.setattr(file_processing, "UPLOAD_MEMORY_BYTES", 16)
+    upload = spooled_upload(generate_docx("Jane Doe"), 16)
+    sources = []
+    extract_text = file_processing.extract_text
+
+    async def recording_extract(source, filename):
+        sources.append(source)
+        return await extract_text(source, filename)
+
+    monkeypatch.setattr(file_processing, "extract_text", recording_extract)
+
+    assert asyncio.run(file_processing.extract_text_from_file(upload)) == "Jane Doe"
+    assert isinstance(sources[0], str) and not os.path.exists(sources[0])
+
+
+def test_oversized_upload_is_rejected_before_it_is_copied():
+    upload = spooled_upload(b"x" * 64, 16)
+
+    with pytest.raises(file_processing.UploadTooLarge):
+        asyncio.run(file_processing.spool_upload(upload, max_bytes=32))
+    assert upload.file.tell() == 0
@@ -0,0 +1,52 @@
+"""Tests for the content-addressed cache of uploaded files."""
+
+import asyncio
+import hashlib
+import io
+from collections import OrderedDict
+
+import pytest
+from fastapi import UploadFile
+
+from backend.core import cache_utils, file_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_utils, "memory_cache", OrderedDict())
+    monkeypatch.setattr(cache_utils, "memory_cache_bytes", 0)
+    monkeypatch.setattr(cache_utils, "ready_shards", set())
+
+
+def upload(content, filename="cv.pdf"):
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+def test_upload_key_hashes_the_bytes_in_chunks_and_rewinds(monkeypatch):
+    monkeypatch.setattr(file_cache, "HASH_CHUNK_SIZE", 7)
+    content = b"%PDF-1.4 " * 100
+    file = upload(content)
+    file.file.seek(50)
+
+    key = asyncio.run(file_cache.get_upload_key(file))
+
+    assert key == "file-" + hashlib.blake2b(content, digest_size=20).hexdigest()
+    assert file.file.tell() == 0
+
+
+def test_upload_key_depends_on_content_only():
+    keys = [asyncio.run(file_cache.get_upload_key(upload(content, filename)))
+            for content, filename in ((b"cv", "a.pdf"), (b"cv", "b.docx"), (b"cv2", "a.pdf"))]
+    assert keys[0] == keys[1] != keys[2]
+
+
+def test_text_is_cached_before_the_result():
+    key = asyncio.run(file_cache.get_upload_key(upload(b"cv")))
+    assert file_cache.get_file_entry(key) is None
+
+    file_cache.save_file_text(key, "Jane Doe")
+    assert file_cache.get_file_entry(key) == {"text": "Jane Doe", "result": None}
+
+    file_cache.save_file_result(key, "Jane Doe", {"name": "Jane Doe"})
+    assert file_cache.get_file_entry(key) == {"text": "Jane Doe", "result": {"name": "Jane Doe"}}
@@ -0,0 +1,170 @@
+"""Tests for the background job queue."""
+
+import asyncio
+
+import pytest
+
+from backend.core.job_queue import JobQueue, JobQueueFull
+
+
+async def wait_for_status(queue, job_id, statuses=("succeeded", "failed"), timeout=2):
+    async def poll():
+        while queue.get(job_id)["status"] not in statuses:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+    return queue.get(job_id)
+
+
+def test_job_runs_and_result_can_be_polled():
+    async def handler(payload):
+        return {"length": len(payload["text"])}
+
+    async def main():
+        queue = JobQueue("test", handler, workers=1, queue_size=4, db_path="")
+        await queue.start()
+        job = queue.submit({"text": "cv text"})
+        assert queue.get(job["id"])["status"] in ("queued", "running")
+        finished = await wait_for_status(queue, job["id"])
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(main())
+    assert finished["status"] == "succeeded"
+    assert finished["result"] == {"length": 7}
+    assert "payload" not in finished
+
+
+def test_full_queue_rejects_new_jobs():
+    release = None
+
+    async def handler(payload):
+        await release.wait()
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = JobQueue("test", handler, workers=1, queue_size=2, db_path="")
+        await queue.start()
+        running = queue.submit({})
+        await wait_for_status(queue, running["id"], ("running",))
+        queue.submit({})
+        queue.submit({})
+        with pytest.raises(JobQueueFull):
+            queue.submit({})
+        stats = queue.stats()
+        release.set()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["submitted"] == 3
+    assert stats["rejected"] == 1
+    assert stats["queued"] == 2
+
+
+def test_failed_and_timed_out_jobs_report_errors():
+    async def handler(payload):
+        if payload["mode"] == "fail":
+            raise ValueError("unreadable file")
+        await asyncio.sleep(1)
+
+    cleaned = []
+
+    async def main():
+        queue = JobQueue("test", handler, cleanup=cleaned.append, workers=2, queue_size=4, timeout=0.02, db_path="")
+        await queue.start()
+        failed = queue.submit({"mode": "fail"})
+        slow = queue.submit({"mode": "slow"})
+        results = [await wait_for_status(queue, failed["id"]), await wait_for_status(queue, slow["id"])]
+        await queue.stop()
+        return results
+
+    failed, slow = asyncio.run(main())
+    assert failed["status"] == "failed" and failed["error"] == "unreadable file"
+    assert slow["status"] == "failed" and "0.02 seconds" in slow["error"]
+    assert len(cleaned) == 2
+
+
+def test_sqlite_store_resumes_unfinished_jobs(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    handled = []
+
+    async def stuck(payload):
+        await asyncio.sleep(10)
+
+    async def handler(payload):
+        handled.append(payload)
+        return payload["text"].upper()
+
+    async def first_run():
+        queue = JobQueue("test", stuck, workers=1, queue_size=4, db_path=db_path)
+        await queue.start()
+        running = queue.submit({"text": "running"})
+        await wait_for_status(queue, running["id"], ("running",))
+        queued = queue.submit({"text": "queued"})
+        # Simulates a restart: the workers stop with one job running and one queued
+        await queue.stop()
+        return running["id"], queued["id"]
+
+    async def second_run(job_ids):
+        queue = JobQueue("test", handler, workers=1, queue_size=4, db_path=db_path)
+        await queue.start()
+        finished = [await wait_for_status(queue, job_id) for job_id in job_ids]
+        await queue.stop()
+        return finished
+
+    job_ids = asyncio.run(first_run())
+    finished = asyncio.run(second_run(job_ids))
+    assert [job["status"] for job in finished] == ["succeeded", "succeeded"]
+    assert [job["result"] for job in finished] == ["RUNNING", "QUEUED"]
+    assert handled == [{"text": "running"}, {"text": "queued"}]
+
+
+def test_submit_before_start_fails():
+    async def handler(payload):
+        return None
+
+    with pytest.raises(RuntimeError):
+        JobQueue("test", handler, db_path="").submit({})
+
+
+def test_unsaved_results_and_cleanup_errors_do_not_stop_workers(tmp_path):
+    async def handler(payload):
+        # A set cannot be stored as JSON in SQLite
+        return {"python"} if payload["mode"] == "unserializable" else "done"
+
+    def cleanup(payload):
+        raise FileNotFoundError(payload["mode"])
+
+    async def main():
+        queue = JobQueue("test", handler, cleanup=cleanup, workers=1, queue_size=4,
+                         db_path=str(tmp_path / "jobs.db"))
+        await queue.start()
+        unserializable = queue.submit({"mode": "unserializable"})
+        ok = queue.submit({"mode": "ok"})
+        results = [await wait_for_status(queue, unserializable["id"]), await wait_for_status(queue, ok["id"])]
+        alive = [not task.done() for task in queue.tasks]
+        await queue.stop()
+        return results, alive
+
+    (unserializable, ok), alive = asyncio.run(main())
+    assert unserializable["status"] == "failed" and unserializable["result"] is None
+    assert ok["status"] == "succeeded" and ok["result"] == "done"
+    assert alive == [True]
+
+
+def test_handler_errors_are_logged_with_traceback(capsys):
+    async def handler(payload):
+        raise KeyError("skills")
+
+    async def main():
+        queue = JobQueue("test", handler, workers=1, queue_size=4, db_path="")
+        await queue.start()
+        job = await wait_for_status(queue, queue.submit({})["id"])
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+    assert job["status"] == "failed"
+    err = capsys.readouterr().err
+    assert "test job" in err and "Traceback" in err and "KeyError" in err
@@ -0,0 +1,201 @@
+"""Tests for the LangGraph career path workflow, with Gemini replaced by canned answers."""
+
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.core import cache_utils
+from backend.workflows import langgraph_workflow, node_cache
+
+# Canned answer of each node, found by a phrase of its prompt
+ANSWERS = {
+    "parse_cv": ("Extract structured", {"name": "Jane Doe", "skills": ["Python", "SQL"]}),
+    "analyze_skills": ("Analyze the skills", {"current_skill_level": "Mid-level", "strengths": ["Python"],
+                                              "gaps": ["Kubernetes"]}),
+    "recommend_careers": ("career paths", [{"title": "Backend Engineer", "required_skills": ["Python"]}]),
+    "roadmap_generation": ("career development roadmap", {"roadmap_summary": "Grow into backend engineering",
+                                                         "milestones": [{"title": "Learn Kubernetes"}]}),
+}
+
+
+class FakeGemini:
+    """Answers generate_content with the canned answers and records which nodes called it."""
+
+    def __init__(self):
+        self.calls = []
+        self.prompts = {}
+        self.latency = 0.0
+        self.answers = {node: json.dumps(answer) for node, (_, answer) in ANSWERS.items()}
+        self.failing = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, prompt):
+        node = next(node for node, (phrase, _) in ANSWERS.items() if phrase in prompt)
+        self.calls.append(node)
+        self.prompts[node] = prompt
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if node in self.failing:
+                raise RuntimeError(f"{node} is unavailable")
+            return type("Response", (), {"text": self.answers[node]})()
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def gemini(tmp_path, monkeypatch):
+    """Replace Gemini with a FakeGemini and memoize node results in an empty cache."""
+    fake = FakeGemini()
+    monkeypatch.setattr(langgraph_workflow, "get_model", lambda: None)
+    monkeypatch.setattr(langgraph_workflow, "generate_content", fake.generate_content)
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_utils, "memory_cache", OrderedDict())
+    monkeypatch.setattr(cache_utils, "memory_cache_bytes", 0)
+    monkeypatch.setattr(cache_utils, "ready_shards", set())
+    monkeypatch.setattr(node_cache, "node_cache_stats", {})
+    return fake
+
+
+def run(cv_text, fan_out=False):
+    return asyncio.run(langgraph_workflow.run_workflow_with_cv(cv_text, fan_out))
+
+
+def test_node_results_are_reused_for_equivalent_inputs(gemini):
+    first = run("Jane Doe\nSkills: Python, SQL")
+    second = run("Jane Doe\nSkills: SQL, Python\nHobbies: chess")
+
+    # Only the CV differs, so every node after parse_cv reuses the first run's answer
+    assert gemini.calls == list(ANSWERS) + ["parse_cv"]
+    assert second["roadmap"] == first["roadmap"] and not second["error"]
+    stats = node_cache.get_node_cache_stats()
+    assert stats["skills_analysis"]["hits"] == 1
+    assert stats["parse_cv"] == {"hits": 0, "misses": 2, "stores": 2, "hit_rate": 0.0}
+
+
+def test_fallback_results_are_not_memoized(gemini):
+    gemini.answers["analyze_skills"] = "I cannot analyse these skills."
+    run("Jane Doe\nSkills: Python, SQL")
+    run("Jane Doe\nSkills: Python, SQL, Git")
+
+    assert gemini.calls.count("analyze_skills") == 2
+
+
+def test_expired_node_results_are_recomputed(gemini, monkeypatch):
+    inputs = {"current_skills": node_cache.canonical_items(["Python"]), "career_goal": ""}
+    node_cache.save_node_result("skills_analysis", inputs, {"strengths": ["Python"]})
+    assert node_cache.get_node_result("skills_analysis", inputs) == {"strengths": ["Python"]}
+
+    monkeypatch.setattr(node_cache, "NODE_CACHE_TTL", -1)
+    assert node_cache.get_node_result("skills_analysis", inputs) is None
+
+
+def test_equivalent_prompt_inputs_have_one_canonical_form():
+    assert node_cache.canonical_items([" Python ", "sql", "python", "Machine  Learning"]) == \
+        node_cache.canonical_items(["SQL", "machine learning", "PYTHON"])
+    assert node_cache.canonical_items(None) == [] and node_cache.canonical_items("Python") == ["python"]
+
+
+def test_workflow_is_compiled_once_per_mode(monkeypatch):
+    monkeypatch.setattr(langgraph_workflow, "compiled_workflows", {})
+    compiled = []
+    create = langgraph_workflow.create_career_path_workflow
+
+    def counting_create(fan_out=False):
+        compiled.append(fan_out)
+        return create(fan_out)
+
+    monkeypatch.setattr(langgraph_workflow, "create_career_path_workflow", counting_create)
+
+    def get_both():
+        return langgraph_workflow.get_career_path_workflow(False), langgraph_workflow.get_career_path_workflow(True)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: get_both(), range(16)))
+
+    assert sorted(compiled) == [False, True]
+    assert all(result[0] is results[0][0] and result[1] is results[0][1] for result in results)
+    assert results[0][0] is not results[0][1]
+
+
+def test_shared_workflow_keeps_no_state_between_runs(gemini):
+    first = run("Jane Doe\nSkills: Python, SQL")
+    gemini.answers["parse_cv"] = json.dumps({"name": "John Smith", "skills": ["Java"]})
+    second = run("John Smith\nSkills: Java")
+
+    assert first["parsed_profile"]["name"] == "Jane Doe" and first["raw_cv"].startswith("Jane")
+    assert second["parsed_profile"]["name"] == "John Smith" and second["raw_cv"].startswith("John")
+
+
+def test_fan_out_runs_recommendations_alongside_the_skills_analysis(gemini):
+    gemini.latency = 0.02
+    sequential = run("Jane Doe\nSkills: Python, SQL", fan_out=False)
+    assert gemini.max_in_flight == 1
+
+    # A different profile, so no node result of the first run is reused
+    gemini.answers["parse_cv"] = json.dumps({"name": "Jane Doe", "skills": ["Python", "Go"]})
+    fan_out = run("Jane Doe\nSkills: Python, Go", fan_out=True)
+
+    assert gemini.max_in_flight == 2
+    assert sorted(gemini.calls[4:]) == sorted(ANSWERS)
+    # Without the analysis, the recommendations are based on the profile itself
+    assert "Work Experience:" in gemini.prompts["recommend_careers"]
+    assert fan_out["roadmap"] and not fan_out["error"]
+    assert {field for field, value in fan_out.items() if value} == {field for field, value in sequential.items() if value}
+
+
+@pytest.mark.parametrize("failing", ["analyze_skills", "recommend_careers"])
+def test_fan_out_branch_failure_ends_the_run(gemini, failing):
+    gemini.failing.add(failing)
+    result = run("Jane Doe\nSkills: Python, SQL", fan_out=True)
+
+    assert result["error"] and result["roadmap"] is None
+    assert "roadmap_generation" not in gemini.calls
+
+
+def test_parse_failure_skips_both_branches(gemini):
+    gemini.failing.add("parse_cv")
+    result = run("Jane Doe\nSkills: Python, SQL", fan_out=True)
+
+    assert result["error"].startswith("Failed to parse CV")
+    assert gemini.calls == ["parse_cv"]
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+@pytest.mark.parametrize("fan_out", [False, True])
+def test_streamed_deltas_rebuild_the_final_state(gemini, fan_out):
+    cv_text = "Jane Doe\nSkills: Python, SQL"
+    updates = asyncio.run(collect(langgraph_workflow.stream_workflow_with_cv(cv_text, fan_out)))
+    final = run(cv_text, fan_out)
+
+    nodes = [node for node, _ in updates]
+    assert nodes[0] == "parse_cv" and nodes[-1] == "roadmap_generation"
+    assert sorted(nodes[1:3]) == ["analyze_skills", "recommend_careers"]
+    state = {"raw_cv": cv_text, "error": None}
+    for _, delta in updates:
+        state = langgraph_workflow.apply_workflow_update(state, delta)
+    assert {field: state.get(field) for field in langgraph_workflow.NODE_OUTPUTS.values()} == \
+        {field: final[field] for field in langgraph_workflow.NODE_OUTPUTS.values()}
+
+
+def test_cached_state_replays_as_the_streamed_node_outputs(gemini):
+    final = run("Jane Doe\nSkills: Python, SQL")
+    replayed = list(langgraph_workflow.replay_workflow_state(final))
+
+    assert [node for node, _ in replayed] == list(langgraph_workflow.NODE_OUTPUTS)
+    assert replayed[0] == ("parse_cv", {"parsed_profile": final["parsed_profile"]})
+
+
+def test_first_streamed_error_is_kept():
+    state = langgraph_workflow.apply_workflow_update({"error": None}, {"error": "Failed to analyze skills"})
+    state = langgraph_workflow.apply_workflow_update(state, {"error": "Insufficient data", "current_step": "end"})
+    assert state["error"] == "Failed to analyze skills" and state["current_step"] == "end"
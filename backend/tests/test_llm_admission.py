@@ -0,0 +1,141 @@
+"""Tests for admission control of Gemini calls: fairness, queue limit and queue timeout."""
+
+import asyncio
+
+import pytest
+
+from backend.core.llm_admission import (
+    LLMAdmissionController, LLMQueueFull, LLMQueueTimeout, LLMUserMiddleware, current_llm_user,
+)
+
+
+async def wait_until_queued(controller, count):
+    while controller.queued < count:
+        await asyncio.sleep(0)
+
+
+def test_waiting_calls_are_served_round_robin_per_user():
+    controller = LLMAdmissionController(max_concurrency=1, rate=0, max_queue=10, queue_timeout=0)
+    order = []
+
+    async def call(user):
+        await controller.acquire(user)
+        order.append(user)
+        await asyncio.sleep(0)
+        controller.release()
+
+    async def main():
+        # Hold the only slot so every call below has to queue
+        await controller.acquire("holder")
+        tasks = [asyncio.ensure_future(call(user)) for user in ("greedy", "greedy", "greedy", "other")]
+        await wait_until_queued(controller, 4)
+        assert controller.stats()["queue_depth_by_user"] == {"greedy": 3, "other": 1}
+        controller.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["greedy", "other", "greedy", "greedy"]
+    assert controller.in_flight == 0
+
+
+def test_calls_beyond_queue_limit_are_rejected():
+    controller = LLMAdmissionController(max_concurrency=1, rate=0, max_queue=2, queue_timeout=0)
+
+    async def main():
+        await controller.acquire("holder")
+        waiting = [asyncio.ensure_future(controller.acquire("user")) for _ in range(2)]
+        await wait_until_queued(controller, 2)
+        with pytest.raises(LLMQueueFull):
+            await controller.acquire("user")
+        for _ in waiting:
+            controller.release()
+        await asyncio.gather(*waiting)
+        controller.release()
+
+    asyncio.run(main())
+    assert controller.counts["rejected"] == 1
+    assert controller.queued == 0
+
+
+def test_call_waiting_past_queue_timeout_gives_up():
+    controller = LLMAdmissionController(max_concurrency=1, rate=0, max_queue=10, queue_timeout=0.01)
+
+    async def main():
+        await controller.acquire("holder")
+        with pytest.raises(LLMQueueTimeout):
+            await controller.acquire("user")
+        assert controller.queued == 0
+        # The slot freed afterwards is not handed to the call that gave up
+        controller.release()
+        await controller.acquire("user")
+        controller.release()
+
+    asyncio.run(main())
+    assert controller.counts["timed_out"] == 1
+    assert controller.in_flight == 0
+
+
+def test_cancelled_waiter_is_removed_from_queue():
+    controller = LLMAdmissionController(max_concurrency=1, rate=0, max_queue=10, queue_timeout=0)
+
+    async def main():
+        await controller.acquire("holder")
+        waiter = asyncio.ensure_future(controller.acquire("user"))
+        await wait_until_queued(controller, 1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        controller.release()
+
+    asyncio.run(main())
+    assert controller.in_flight == 0
+
+
+def test_rate_limit_spaces_calls_after_burst():
+    controller = LLMAdmissionController(max_concurrency=10, rate=100, burst=2, max_queue=10, queue_timeout=1)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            await controller.acquire("user")
+        return loop.time() - started
+
+    # Two calls start from the burst, the next two wait about 10 ms each for a token
+    assert asyncio.run(main()) >= 0.015
+    assert controller.counts["queued"] == 2
+
+
+def run_middleware(scope, secret=""):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["user"] = current_llm_user.get()
+
+    asyncio.run(LLMUserMiddleware(app, secret)(scope, None, None))
+    return seen["user"]
+
+
+def test_middleware_keys_requests_on_client_address_without_verified_token():
+    scope = {
+        "type": "http",
+        "client": ("203.0.113.7", 5000),
+        "headers": [(b"x-user-id", b"someone-else"), (b"authorization", b"Bearer forged")],
+        "query_string": b"email=someone@example.com",
+    }
+    assert run_middleware(scope) == "client:203.0.113.7"
+
+
+def test_middleware_keys_requests_on_verified_token_subject():
+    jwt = pytest.importorskip("jwt")
+    token = jwt.encode({"sub": "user-1", "aud": "authenticated"}, "secret", algorithm="HS256")
+    scope = {
+        "type": "http",
+        "client": ("203.0.113.7", 5000),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }
+    assert run_middleware(scope, secret="secret") == "user:user-1"
+    assert run_middleware(scope, secret="other") == "client:203.0.113.7"
+    forged = {**scope, "headers": [(b"authorization", b"Bearer forged")]}
+    assert run_middleware(forged, secret="secret") == "client:203.0.113.7"
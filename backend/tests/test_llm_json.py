@@ -0,0 +1,96 @@
+"""Tests for decoding JSON values embedded in Gemini responses."""
+
+import time
+
+import pytest
+
+from backend.core.llm_json import LLMJSONError, extract_json
+
+
+@pytest.mark.parametrize("response", [
+    '{"name": "Ada", "skills": ["python"]}',
+    '```json\n{"name": "Ada", "skills": ["python"]}\n```',
+    '```\n{"name": "Ada", "skills": ["python"]}\n```\nLet me know if you need more.',
+    'Here is the result:\n{"name": "Ada", "skills": ["python"]}\nHope this helps!',
+    'Result (see [note): {"name": "Ada", "skills": ["python"]}',
+    'The list [of skills is {"name": "Ada", "skills": ["python"]}',
+    'Text "quoted [" then {"name": "Ada", "skills": ["python"]}',
+    'Fields {name, skills} are below.\n{"name": "Ada", "skills": ["python"]}',
+])
+def test_object_is_found_in_wrapped_responses(response):
+    assert extract_json(response) == {"name": "Ada", "skills": ["python"]}
+
+
+def test_arrays_are_decoded():
+    assert extract_json('Careers:\n[{"title": "Data Engineer"}, {"title": "Analyst"}]') == [
+        {"title": "Data Engineer"}, {"title": "Analyst"},
+    ]
+
+
+def test_brackets_inside_strings_are_not_values():
+    response = 'Answer: {"summary": "Uses {braces} and [brackets]", "years": 3}'
+    assert extract_json(response) == {"summary": "Uses {braces} and [brackets]", "years": 3}
+
+
+def test_longest_value_wins_over_earlier_fragment():
+    response = 'Example: [1] and the real answer {"skills": ["python", "sql"], "level": "senior"}'
+    assert extract_json(response, dict) == {"skills": ["python", "sql"], "level": "senior"}
+    assert extract_json(response) == {"skills": ["python", "sql"], "level": "senior"}
+
+
+def test_expected_type_is_found_inside_other_values():
+    assert extract_json('{"data": [1, 2, 3]}', list) == [1, 2, 3]
+
+
+def test_fence_body_is_preferred_over_surrounding_text():
+    response = '{"draft": true}\n```json\n{"final": true}\n```'
+    assert extract_json(response) == {"final": True}
+
+
+def test_truncated_response_is_rejected_rather_than_returning_a_fragment():
+    response = '```json\n{"name": "Ada", "skills": ["python", "sql"], "experience": [{"title": "Engineer"'
+    with pytest.raises(LLMJSONError):
+        extract_json(response)
+
+
+@pytest.mark.parametrize("response", ["", None, "No JSON here.", "[unclosed prose", '"just a string"'])
+def test_missing_value_raises(response):
+    with pytest.raises(LLMJSONError):
+        extract_json(response)
+
+
+def test_wrong_type_raises():
+    with pytest.raises(LLMJSONError):
+        extract_json('[1, 2, 3]', dict)
+
+
+def test_llm_json_error_is_a_value_error():
+    with pytest.raises(ValueError):
+        extract_json("nothing")
+
+
+def test_value_after_many_markdown_links_is_found():
+    links = "\n".join(f"- [Course {i}](http://example.com/{i})" for i in range(200))
+    assert extract_json(f"Recommended courses:\n{links}\n\n{{\"ok\": true}}") == {"ok": True}
+
+
+def assert_fast(response, expect, expected):
+    started = time.perf_counter()
+    assert extract_json(response, expect) == expected
+    assert time.perf_counter() - started < 2
+
+
+@pytest.mark.parametrize("response", [
+    "[" * 20000 + '{"ok": true}',
+    "[a " * 20000 + '{"ok": true}',
+    "- [x](y) " * 20000 + '{"ok": true}',
+    "[1, 2 x " * 20000 + '{"ok": true}',
+    '{"a" ' * 20000 + '{"ok": true}',
+])
+def test_value_after_many_brackets_is_found_in_linear_time(response):
+    assert_fast(response, (dict, list), {"ok": True})
+
+
+@pytest.mark.parametrize("depth", [500, 2000, 20000])
+def test_object_nested_in_lists_is_found_in_linear_time(depth):
+    assert_fast("[" * depth + '{"a": 1}' + "]" * depth, dict, {"a": 1})
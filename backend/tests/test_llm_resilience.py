@@ -0,0 +1,123 @@
+"""Tests for the Gemini circuit breaker and the way generate_content feeds it."""
+
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from backend.core import llm_clients, llm_resilience
+from backend.core.llm_admission import LLMAdmissionController
+from backend.core.llm_resilience import CircuitBreaker, CircuitOpen
+
+
+class FakeModel:
+    """Model handle whose calls raise the queued errors in turn, then return "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """Give generate_content a fresh breaker, an unlimited admission controller and no retries."""
+    breaker = CircuitBreaker("Test", threshold=2, reset_timeout=60)
+    monkeypatch.setattr(llm_clients, "gemini_breaker", breaker)
+    monkeypatch.setattr(llm_clients, "llm_admission", LLMAdmissionController(max_concurrency=8, rate=0))
+    monkeypatch.setattr(llm_resilience, "LLM_RETRY_ATTEMPTS", 1)
+    return breaker
+
+
+def generate(model):
+    return asyncio.run(llm_clients.generate_content(model, "prompt", timeout=1))
+
+
+def test_breaker_opens_after_threshold_and_short_circuits(breaker):
+    model = FakeModel(google_exceptions.ServiceUnavailable("down"), google_exceptions.ServiceUnavailable("down"))
+    for _ in range(2):
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            generate(model)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpen):
+        generate(model)
+    assert model.calls == 2
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_successful_probe_closes_breaker(breaker):
+    model = FakeModel(google_exceptions.ServiceUnavailable("down"), google_exceptions.ServiceUnavailable("down"))
+    for _ in range(2):
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            generate(model)
+    breaker.reset_timeout = 0
+
+    assert generate(model) == "ok"
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_failed_probe_reopens_breaker(breaker):
+    model = FakeModel(*(google_exceptions.ServiceUnavailable("down") for _ in range(3)))
+    for _ in range(2):
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            generate(model)
+    breaker.reset_timeout = 0
+
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        generate(model)
+    assert breaker.state == "open"
+    assert breaker.counts["opened"] == 2
+
+
+def test_half_open_breaker_lets_one_probe_through(breaker):
+    breaker.record_failure(RuntimeError("down"))
+    breaker.record_failure(RuntimeError("down"))
+    breaker.reset_timeout = 0
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    # A probe that ends without an outcome lets the next one through
+    breaker.release_probe()
+    breaker.before_call()
+
+
+def test_answered_errors_count_as_successes(breaker):
+    model = FakeModel(google_exceptions.InvalidArgument("bad prompt"), google_exceptions.PermissionDenied("no key"),
+                      google_exceptions.InvalidArgument("bad prompt"))
+    breaker.record_failure(RuntimeError("down"))
+    for error in (google_exceptions.InvalidArgument, google_exceptions.PermissionDenied,
+                  google_exceptions.InvalidArgument):
+        with pytest.raises(error):
+            generate(model)
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    assert breaker.counts["successes"] == 3
+
+
+def test_connection_errors_count_as_failures(breaker):
+    model = FakeModel(ConnectionError("no route"), ConnectionError("no route"))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            generate(model)
+    assert breaker.state == "open"
+    assert "ConnectionError" in breaker.last_error
+
+
+def test_timeouts_count_as_failures(breaker):
+    class SlowModel:
+        async def generate_content_async(self, prompt, **kwargs):
+            await asyncio.sleep(1)
+
+    for _ in range(2):
+        with pytest.raises(llm_clients.LLMTimeout):
+            asyncio.run(llm_clients.generate_content(SlowModel(), "prompt", timeout=0.01))
+    assert breaker.state == "open"
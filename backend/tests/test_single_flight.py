@@ -0,0 +1,123 @@
+"""Tests for single-flight coalescing of concurrent identical calls."""
+
+import asyncio
+
+import pytest
+
+from backend.core.single_flight import SingleFlight, single_flight, get_single_flight_stats
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    runs = []
+
+    async def parse(text):
+        runs.append(text)
+        await asyncio.sleep(0.01)
+        return {"text": text, "skills": ["python"]}
+
+    async def main():
+        return await asyncio.gather(*(group.do("cv", parse, "same cv") for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert runs == ["same cv"]
+    assert all(result == {"text": "same cv", "skills": ["python"]} for result in results)
+    assert group.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight()
+    runs = []
+
+    async def parse(text):
+        runs.append(text)
+        await asyncio.sleep(0.01)
+        return text
+
+    async def main():
+        return await asyncio.gather(group.do("a", parse, "a"), group.do("b", parse, "b"))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sorted(runs) == ["a", "b"]
+    assert group.coalesced == 0
+
+
+def test_every_caller_gets_its_own_copy():
+    group = SingleFlight()
+
+    async def parse():
+        await asyncio.sleep(0.01)
+        return {"skills": ["python"]}
+
+    async def leader():
+        result = await group.do("cv", parse)
+        result["skills"].append("leaked")
+        return result
+
+    async def joiner():
+        await asyncio.sleep(0)
+        return await group.do("cv", parse)
+
+    async def main():
+        return await asyncio.gather(leader(), joiner())
+
+    leader_result, joiner_result = asyncio.run(main())
+    assert leader_result["skills"] == ["python", "leaked"]
+    assert joiner_result["skills"] == ["python"]
+    assert group.coalesced == 1
+
+
+def test_error_is_raised_to_every_caller_and_key_is_released():
+    group = SingleFlight()
+    runs = []
+
+    async def parse():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("bad cv")
+
+    async def main():
+        results = await asyncio.gather(group.do("cv", parse), group.do("cv", parse), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # A later call starts a new execution instead of reusing the failed one
+        with pytest.raises(ValueError):
+            await group.do("cv", parse)
+
+    asyncio.run(main())
+    assert len(runs) == 2
+    assert group.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_execution():
+    group = SingleFlight()
+
+    async def parse():
+        await asyncio.sleep(0.02)
+        return "parsed"
+
+    async def main():
+        first = asyncio.ensure_future(group.do("cv", parse))
+        second = asyncio.ensure_future(group.do("cv", parse))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "parsed"
+
+
+def test_decorator_coalesces_by_key_and_reports_stats():
+    runs = []
+
+    @single_flight("test-decorator", key=lambda text, **_: text.strip())
+    async def parse(text, fan_out=False):
+        runs.append(text)
+        await asyncio.sleep(0.01)
+        return len(text)
+
+    async def main():
+        return await asyncio.gather(parse("cv"), parse(" cv "), parse("other"))
+
+    asyncio.run(main())
+    assert len(runs) == 2
+    assert get_single_flight_stats()["test-decorator"]["coalesced"] == 1
+    assert parse.flight is not None
@@ -0,0 +1,45 @@
+"""Tests for the server-sent events helpers."""
+
+import asyncio
+
+from backend.core.sse import format_sse_event, sse_messages
+
+
+def test_events_are_encoded_as_json_messages():
+    assert format_sse_event("skills_analysis", {"gaps": ["Go"]}) == \
+        b'event: skills_analysis\ndata: {"gaps":["Go"]}\n\n'
+
+
+def test_idle_stream_sends_keep_alive_comments():
+    async def events():
+        await asyncio.sleep(0.05)
+        yield "done", {}
+
+    async def main():
+        return [message async for message in sse_messages(events(), heartbeat=0.02)]
+
+    messages = asyncio.run(main())
+    assert messages[0] == b": keep-alive\n\n"
+    assert messages[-1] == b"event: done\ndata: {}\n\n"
+
+
+def test_closing_the_stream_stops_the_events():
+    finished = []
+
+    async def events():
+        try:
+            yield "parse_cv", {}
+            await asyncio.sleep(10)
+            yield "roadmap_generation", {}
+        finally:
+            finished.append(True)
+
+    async def main():
+        messages = sse_messages(events(), heartbeat=0.01)
+        first = await messages.__anext__()
+        await messages.__anext__()
+        await messages.aclose()
+        return first
+
+    assert asyncio.run(asyncio.wait_for(main(), 2)) == b"event: parse_cv\ndata: {}\n\n"
+    assert finished == [True]
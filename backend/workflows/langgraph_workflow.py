@@ -11,14 +11,22 @@ The workflow orchestrates calls to Google's Gemini API to provide
 sophisticated AI-powered career guidance.
 """
 
-from typing import Dict, Any, List, TypedDict, Annotated, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, List, TypedDict, Annotated, Optional, Tuple
 import os
+import threading
 import dotenv
 from enum import Enum
 import google.generativeai as genai
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 from langgraph.graph import StateGraph, END
 
+from backend.core.cache_utils import get_cache_key
+from backend.core.single_flight import single_flight
+from backend.core.llm_clients import get_model, generate_content
+from backend.core.cv_prompt import compact_cv_text
+from backend.core.llm_json import extract_json
+from .node_cache import canonical_items, canonical_value, get_node_result, save_node_result
+
 # Configure Gemini API
 import dotenv
 dotenv.load_dotenv()
@@ -30,6 +38,20 @@ else:
     genai.configure(api_key=GEMINI_API_KEY)
     print("✅ Gemini API configured successfully")
 
+# Default workflow mode: generate career recommendations in parallel with the skills
+# analysis instead of after it. Requests can choose either mode explicitly.
+WORKFLOW_FAN_OUT = os.getenv("WORKFLOW_FAN_OUT", "false").lower() in ("1", "true", "yes")
+
+
+def latest_value(current: Any, new: Any) -> Any:
+    """Reducer keeping the most recent write, so parallel branches may both set a field."""
+    return new
+
+
+def first_error(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Reducer keeping the first error reported by any branch."""
+    return current or new
+
 
 # Define workflow states
 class WorkflowState(TypedDict):
@@ -46,9 +68,18 @@ class WorkflowState(TypedDict):
     # Final output
     roadmap: Optional[Dict[str, Any]]
     
-    # Metadata and flow control
-    error: Optional[str]
-    current_step: str
+    # Metadata and flow control (written by both branches in fan-out mode)
+    error: Annotated[Optional[str], first_error]
+    current_step: Annotated[str, latest_value]
+
+
+# State field produced by each node, in workflow order
+NODE_OUTPUTS = {
+    "parse_cv": "parsed_profile",
+    "analyze_skills": "skills_analysis",
+    "recommend_careers": "career_recommendations",
+    "roadmap_generation": "roadmap",
+}
 
 
 # Define the nodes for the graph
@@ -61,8 +92,17 @@ async def parse_cv_node(state: WorkflowState) -> Dict:
                 "parsed_profile": state.get("user_input", {})
             }
         
+        # Reuse the parsed profile of an identical CV
+        node_inputs = {"raw_cv": state['raw_cv']}
+        parsed_profile = get_node_result("parse_cv", node_inputs)
+        if parsed_profile is not None:
+            return {
+                "parsed_profile": parsed_profile,
+                "current_step": "skills_analysis"
+            }
+        
         # If we have a raw CV, parse it with Gemini
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         prompt = f"""
         Extract structured information from the following CV.
         Return ONLY a valid JSON object with these fields:
@@ -76,29 +116,14 @@ async def parse_cv_node(state: WorkflowState) -> Dict:
         - interests: Array of personal interests/hobbies
 
         CV TEXT:
-        {state['raw_cv']}
+        {compact_cv_text(state['raw_cv'], 'parse_cv_node')}
         """
 
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         try:
-            # Try to extract JSON from the response
-            import json
-            import re
-            
-            text = response.text
-            # Find JSON pattern in response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-                
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
-            
-            parsed_profile = json.loads(json_str)
+            parsed_profile = extract_json(response.text, dict)
+            save_node_result("parse_cv", node_inputs, parsed_profile)
             
             # Return the updated state
             return {
@@ -109,7 +134,7 @@ async def parse_cv_node(state: WorkflowState) -> Dict:
         except Exception as e:
             print(f"Failed to parse JSON from Gemini response: {e}")
             # Fallback to basic parsing
-            from core.ai_helpers import parse_cv_text
+            from backend.core.ai_helpers import parse_cv_text
             parsed_profile = await parse_cv_text(state['raw_cv'])
             return {
                 "parsed_profile": parsed_profile,
@@ -138,8 +163,17 @@ async def skills_analysis_node(state: WorkflowState) -> Dict:
         career_goal = profile.get("career_goal", "")
         current_skills = profile.get("skills", [])
         
+        # Reuse the analysis of an equivalent skill set and goal
+        node_inputs = {"current_skills": canonical_items(current_skills), "career_goal": canonical_value(career_goal)}
+        skills_analysis = get_node_result("skills_analysis", node_inputs)
+        if skills_analysis is not None:
+            return {
+                "skills_analysis": skills_analysis,
+                "current_step": "career_recommendations"
+            }
+        
         # Use Gemini to analyze skills and gaps
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         prompt = f"""
         Analyze the skills of a professional with the following profile:
         
@@ -156,26 +190,11 @@ async def skills_analysis_node(state: WorkflowState) -> Dict:
         Return ONLY valid JSON.
         """
 
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         try:
-            # Try to extract JSON from the response
-            import json
-            import re
-            
-            text = response.text
-            # Find JSON pattern in response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-                
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
-            
-            skills_analysis = json.loads(json_str)
+            skills_analysis = extract_json(response.text, dict)
+            save_node_result("skills_analysis", node_inputs, skills_analysis)
             
             # Return the updated state
             return {
@@ -211,7 +230,8 @@ async def career_recommendations_node(state: WorkflowState) -> Dict:
     """Generate career path recommendations based on profile and skills analysis."""
     try:
         profile = state.get("parsed_profile", {})
-        skills_analysis = state.get("skills_analysis", {})
+        # Empty in fan-out mode, where the skills analysis runs at the same time
+        skills_analysis = state.get("skills_analysis") or {}
         
         if not profile:
             return {
@@ -225,16 +245,42 @@ async def career_recommendations_node(state: WorkflowState) -> Dict:
         gaps = skills_analysis.get("gaps", [])
         current_level = skills_analysis.get("current_skill_level", "Not determined")
         
-        # Use Gemini to generate career recommendations
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""
-        Based on the following profile, recommend 3-5 potential career paths:
+        # Reuse the recommendations for an equivalent skills profile
+        node_inputs = {
+            "current_skills": canonical_items(current_skills),
+            "strengths": canonical_items(strengths),
+            "gaps": canonical_items(gaps),
+            "current_level": canonical_value(current_level)
+        }
+        if not skills_analysis:
+            # Without the analysis, the prompt describes the profile itself
+            node_inputs["work_experience"] = profile.get("work_experience", [])
+            node_inputs["education"] = profile.get("education", [])
+        career_recommendations = get_node_result("career_recommendations", node_inputs)
+        if career_recommendations is not None:
+            return {
+                "career_recommendations": career_recommendations,
+                "current_step": "roadmap_generation"
+            }
         
+        # Use Gemini to generate career recommendations
+        model = get_model()
+        if skills_analysis:
+            profile_summary = f"""
         Current Skills: {current_skills}
         Strengths: {strengths}
         Skill Gaps: {gaps}
         Current Level: {current_level}
-        
+        """
+        else:
+            profile_summary = f"""
+        Current Skills: {current_skills}
+        Work Experience: {profile.get("work_experience", [])}
+        Education: {profile.get("education", [])}
+        """
+        prompt = f"""
+        Based on the following profile, recommend 3-5 potential career paths:
+        {profile_summary}
         For each career path, provide:
         - title: The career path title
         - description: Short description of this career path
@@ -248,30 +294,14 @@ async def career_recommendations_node(state: WorkflowState) -> Dict:
         Return the recommendations as a JSON array. ONLY return valid JSON.
         """
 
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         try:
-            # Try to extract JSON from the response
-            import json
-            import re
-            
-            text = response.text
-            # Find JSON pattern in response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-                
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
-            
-            # Make sure it's wrapped in square brackets if not already
-            if not json_str.strip().startswith('['):
-                json_str = f"[{json_str}]"
-            
-            career_recommendations = json.loads(json_str)
+            career_recommendations = extract_json(response.text)
+            # Make sure it's a list if a single recommendation came back
+            if isinstance(career_recommendations, dict):
+                career_recommendations = [career_recommendations]
+            save_node_result("career_recommendations", node_inputs, career_recommendations)
             
             # Return the updated state
             return {
@@ -298,9 +328,50 @@ async def career_recommendations_node(state: WorkflowState) -> Dict:
         }
 
 
+def complete_roadmap(roadmap: Dict, top_career_path: Dict, career_recommendations: List[Dict],
+                     skills_analysis: Dict) -> Dict:
+    """Add the career path, the analysis it builds on and the tracking sections to the roadmap Gemini generated."""
+    # Add target career path to the roadmap
+    roadmap["target_career_path"] = top_career_path
+    
+    # Add all career recommendations
+    roadmap["career_recommendations"] = career_recommendations
+    
+    # Add skills analysis
+    roadmap["skills_analysis"] = skills_analysis
+    
+    # Add some gamification elements
+    roadmap["gamification"] = {
+        "xp_points": 0,
+        "level": 1,
+        "badges": [],
+        "streak": 0,
+        "achievements": []
+    }
+    
+    # Add kanban board structure
+    roadmap["kanban"] = {
+        "backlog": [m["title"] for m in roadmap.get("milestones", [])[:3]],
+        "in_progress": [],
+        "done": []
+    }
+    
+    # Add progress tracking
+    roadmap["progress"] = {
+        "percentage": 0,
+        "milestones_completed": 0,
+        "total_milestones": len(roadmap.get("milestones", []))
+    }
+    return roadmap
+
+
 async def roadmap_generation_node(state: WorkflowState) -> Dict:
     """Generate a detailed career roadmap with learning plan."""
     try:
+        # In fan-out mode both branches join here, even when one of them failed
+        if state.get("error"):
+            return {"current_step": "end"}
+        
         profile = state.get("parsed_profile", {})
         skills_analysis = state.get("skills_analysis", {})
         career_recommendations = state.get("career_recommendations", [])
@@ -314,8 +385,22 @@ async def roadmap_generation_node(state: WorkflowState) -> Dict:
         # Select the top career path (first in the list)
         top_career_path = career_recommendations[0] if career_recommendations else {}
         
+        # The roadmap Gemini returns depends only on these inputs; the rest is added below
+        node_inputs = {
+            "skills": canonical_items(profile.get('skills', [])),
+            "strengths": canonical_items(skills_analysis.get('strengths', [])),
+            "gaps": canonical_items(skills_analysis.get('gaps', [])),
+            "target_career_path": canonical_value(top_career_path.get('title', 'Not specified'))
+        }
+        roadmap = get_node_result("roadmap_generation", node_inputs)
+        if roadmap is not None:
+            return {
+                "roadmap": complete_roadmap(roadmap, top_career_path, career_recommendations, skills_analysis),
+                "current_step": "end"
+            }
+        
         # Use Gemini to generate a detailed roadmap
-        model = genai.GenerativeModel('gemini-pro')
+        model = get_model()
         prompt = f"""
         Create a detailed career development roadmap for a professional with the following profile:
         
@@ -349,58 +434,15 @@ async def roadmap_generation_node(state: WorkflowState) -> Dict:
         Return ONLY valid JSON with these sections. The JSON should be properly formatted.
         """
 
-        response = await model.generate_content_async(prompt)
+        response = await generate_content(model, prompt)
         
         try:
-            # Try to extract JSON from the response
-            import json
-            import re
-            
-            text = response.text
-            # Find JSON pattern in response
-            json_match = re.search(r'```json\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = text
-                
-            # Clean up any non-JSON text
-            json_str = re.sub(r'^[^{]*', '', json_str)
-            json_str = re.sub(r'[^}]*$', '', json_str)
+            roadmap = extract_json(response.text, dict)
+            generated_roadmap = dict(roadmap)
+            roadmap = complete_roadmap(roadmap, top_career_path, career_recommendations, skills_analysis)
             
-            roadmap = json.loads(json_str)
-            
-            # Add target career path to the roadmap
-            roadmap["target_career_path"] = top_career_path
-            
-            # Add all career recommendations
-            roadmap["career_recommendations"] = career_recommendations
-            
-            # Add skills analysis
-            roadmap["skills_analysis"] = skills_analysis
-            
-            # Add some gamification elements
-            roadmap["gamification"] = {
-                "xp_points": 0,
-                "level": 1,
-                "badges": [],
-                "streak": 0,
-                "achievements": []
-            }
-            
-            # Add kanban board structure
-            roadmap["kanban"] = {
-                "backlog": [m["title"] for m in roadmap.get("milestones", [])[:3]],
-                "in_progress": [],
-                "done": []
-            }
-            
-            # Add progress tracking
-            roadmap["progress"] = {
-                "percentage": 0,
-                "milestones_completed": 0,
-                "total_milestones": len(roadmap.get("milestones", []))
-            }
+            # Memoize Gemini's part of the roadmap once it has proven usable
+            save_node_result("roadmap_generation", node_inputs, generated_roadmap)
             
             # Return the updated state with the roadmap
             return {
@@ -478,39 +520,56 @@ async def roadmap_generation_node(state: WorkflowState) -> Dict:
 
 
 # Create the workflow graph
-def create_career_path_workflow() -> StateGraph:
-    """Create and return the LangGraph workflow for career path finding."""
+def create_career_path_workflow(fan_out: bool = False) -> StateGraph:
+    """
+    Create and return the LangGraph workflow for career path finding.
+    
+    Args:
+        fan_out: Generate career recommendations from the parsed profile in parallel
+            with the skills analysis, joining both before roadmap generation. This
+            saves one Gemini round-trip; otherwise the recommendations are generated
+            after, and informed by, the skills analysis.
+    """
     
     # Create a new graph
     workflow = StateGraph(WorkflowState)
     
-    # Add nodes to the graph
+    # Add nodes to the graph (node names must differ from the state keys they write)
     workflow.add_node("parse_cv", parse_cv_node)
-    workflow.add_node("skills_analysis", skills_analysis_node)
-    workflow.add_node("career_recommendations", career_recommendations_node)
+    workflow.add_node("analyze_skills", skills_analysis_node)
+    workflow.add_node("recommend_careers", career_recommendations_node)
     workflow.add_node("roadmap_generation", roadmap_generation_node)
     
-    # Define the edges - the flow between nodes
-    workflow.add_edge("parse_cv", "skills_analysis")
-    workflow.add_edge("skills_analysis", "career_recommendations")
-    workflow.add_edge("career_recommendations", "roadmap_generation")
-    workflow.add_edge("roadmap_generation", END)
-    
-    # Add conditional edges for error handling
-    workflow.add_conditional_edges(
-        "parse_cv",
-        lambda state: "end" if state.get("error") else "skills_analysis"
-    )
-    
-    workflow.add_conditional_edges(
-        "skills_analysis",
-        lambda state: "end" if state.get("error") else "career_recommendations"
-    )
+    # Define the edges - the flow between nodes, stopping early on errors
+    if fan_out:
+        workflow.add_conditional_edges(
+            "parse_cv",
+            lambda state: "end" if state.get("error") else ["analyze_skills", "recommend_careers"],
+            {"analyze_skills": "analyze_skills", "recommend_careers": "recommend_careers", "end": END}
+        )
+        
+        # Roadmap generation waits for both branches
+        workflow.add_edge(["analyze_skills", "recommend_careers"], "roadmap_generation")
+    else:
+        workflow.add_conditional_edges(
+            "parse_cv",
+            lambda state: "end" if state.get("error") else "analyze_skills",
+            {"analyze_skills": "analyze_skills", "end": END}
+        )
+        
+        workflow.add_conditional_edges(
+            "analyze_skills",
+            lambda state: "end" if state.get("error") else "recommend_careers",
+            {"recommend_careers": "recommend_careers", "end": END}
+        )
+        
+        workflow.add_conditional_edges(
+            "recommend_careers",
+            lambda state: "end" if state.get("error") else "roadmap_generation",
+            {"roadmap_generation": "roadmap_generation", "end": END}
+        )
     
-    workflow.add_conditional_edges(
-        "career_recommendations",
-        lambda state: "end" if state.get("error") else "roadmap_generation"
-    )
+    workflow.add_edge("roadmap_generation", END)
     
     # Set the entry point
     workflow.set_entry_point("parse_cv")
@@ -519,10 +578,41 @@ def create_career_path_workflow() -> StateGraph:
     return workflow.compile()
 
 
+# The compiled graphs hold no per-run state, so one instance per mode serves every request
+compiled_workflows = {}
+compiled_workflow_lock = threading.Lock()
+
+
+def get_career_path_workflow(fan_out: bool = False):
+    """Return the compiled workflow for the mode, compiling it on first use."""
+    workflow = compiled_workflows.get(fan_out)
+    if workflow is None:
+        with compiled_workflow_lock:
+            workflow = compiled_workflows.get(fan_out)
+            if workflow is None:
+                workflow = compiled_workflows[fan_out] = create_career_path_workflow(fan_out)
+    return workflow
+
+
+def resolve_fan_out(fan_out: Optional[bool]) -> bool:
+    """Return the workflow mode of a request, falling back to WORKFLOW_FAN_OUT."""
+    return WORKFLOW_FAN_OUT if fan_out is None else fan_out
+
+
 # Example usage
-async def run_workflow_with_cv(cv_text: str) -> Dict[str, Any]:
-    """Run the workflow with a CV text input."""
-    workflow = create_career_path_workflow()
+@single_flight(
+    "run_workflow_with_cv",
+    key=lambda cv_text, fan_out=None: f"{resolve_fan_out(fan_out)}-{get_cache_key(cv_text or '')}"
+)
+async def run_workflow_with_cv(cv_text: str, fan_out: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Run the workflow with a CV text input. Concurrent runs for the same text and mode are coalesced.
+    
+    Args:
+        cv_text: The CV text
+        fan_out: Run the fan-out workflow (see create_career_path_workflow); defaults to WORKFLOW_FAN_OUT
+    """
+    workflow = get_career_path_workflow(resolve_fan_out(fan_out))
     
     # Initialize the state
     initial_state = WorkflowState(
@@ -541,9 +631,9 @@ async def run_workflow_with_cv(cv_text: str) -> Dict[str, Any]:
     return result
 
 
-async def run_workflow_with_profile(profile_data: Dict[str, Any]) -> Dict[str, Any]:
+async def run_workflow_with_profile(profile_data: Dict[str, Any], fan_out: Optional[bool] = None) -> Dict[str, Any]:
     """Run the workflow with a manually entered profile."""
-    workflow = create_career_path_workflow()
+    workflow = get_career_path_workflow(resolve_fan_out(fan_out))
     
     # Initialize the state
     initial_state = WorkflowState(
@@ -559,4 +649,57 @@ async def run_workflow_with_profile(profile_data: Dict[str, Any]) -> Dict[str, A
     
     # Execute the workflow
     result = await workflow.ainvoke(initial_state)
-    return result
\ No newline at end of file
+    return result
+
+
+async def stream_workflow(initial_state: WorkflowState, fan_out: Optional[bool] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run the workflow, yielding (node name, state delta) as each node completes.
+    
+    In fan-out mode the two parallel nodes finish in the same step, so their
+    deltas arrive together once the slower of the two is done.
+    """
+    workflow = get_career_path_workflow(resolve_fan_out(fan_out))
+    async for update in workflow.astream(initial_state, stream_mode="updates"):
+        for node, delta in update.items():
+            yield node, delta or {}
+
+
+def stream_workflow_with_cv(cv_text: str, fan_out: Optional[bool] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Stream the workflow over a CV text input (see stream_workflow)."""
+    return stream_workflow(WorkflowState(
+        raw_cv=cv_text,
+        user_input=None,
+        parsed_profile=None,
+        skills_analysis=None,
+        career_recommendations=None,
+        roadmap=None,
+        error=None,
+        current_step="parse_cv"
+    ), fan_out)
+
+
+def stream_workflow_with_profile(profile_data: Dict[str, Any], fan_out: Optional[bool] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Stream the workflow over a manually entered profile (see stream_workflow)."""
+    return stream_workflow(WorkflowState(
+        raw_cv=None,
+        user_input=profile_data,
+        parsed_profile=None,
+        skills_analysis=None,
+        career_recommendations=None,
+        roadmap=None,
+        error=None,
+        current_step="parse_cv"
+    ), fan_out)
+
+
+def apply_workflow_update(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a streamed delta into the state, the same way the graph does."""
+    return {**state, **delta, "error": first_error(state.get("error"), delta.get("error"))}
+
+
+def replay_workflow_state(state: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield a finished (e.g. cached) state as the (node name, delta) pairs a fresh run streams."""
+    for node, field in NODE_OUTPUTS.items():
+        if state.get(field) is not None:
+            yield node, {field: state[field]}
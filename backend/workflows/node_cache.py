@@ -0,0 +1,83 @@
+"""
+Memoization of LangGraph node results.
+
+Each workflow node sends Gemini a prompt built from a few fields of the state
+(the CV text, the skill list, the career goal, ...). Many users share the same
+skill sets, so a node's parsed Gemini answer is cached under a canonical hash of
+exactly those fields and reused until NODE_CACHE_TTL expires. Only successfully
+parsed answers are stored; fallback results are always recomputed.
+"""
+
+import hashlib
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+
+from backend.core.cache_utils import get_from_cache, save_to_cache
+
+# Seconds a memoized node result stays valid
+NODE_CACHE_TTL = int(os.getenv("NODE_CACHE_TTL", str(24 * 3600)))
+# Bump when node prompts change so results of old prompts are not reused
+NODE_CACHE_VERSION = 1
+
+# Per-node counters
+node_cache_stats: Dict[str, Dict[str, int]] = {}
+
+
+def canonical_items(values: Optional[Iterable[Any]]) -> List[Any]:
+    """
+    Normalise a list of prompt inputs (e.g. skills) so equivalent lists hash the same.
+
+    Strings are lowercased with whitespace collapsed; duplicates are dropped and the
+    result is sorted.
+    """
+    if not values or isinstance(values, (str, dict)):
+        return [canonical_value(values)] if values else []
+    normalised = (canonical_value(value) for value in values)
+    items = {orjson.dumps(value, option=orjson.OPT_SORT_KEYS): value for value in normalised}
+    return [items[key] for key in sorted(items)]
+
+
+def canonical_value(value: Any) -> Any:
+    """Normalise a single prompt input (see canonical_items)."""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    return value
+
+
+def get_node_key(node: str, inputs: Dict[str, Any]) -> str:
+    """Generate the cache key of a node's result for the given prompt inputs."""
+    payload = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return f"node-v{NODE_CACHE_VERSION}-{node}-{hashlib.blake2b(payload, digest_size=20).hexdigest()}"
+
+
+def count(node: str, outcome: str):
+    stats = node_cache_stats.setdefault(node, {"hits": 0, "misses": 0, "stores": 0})
+    stats[outcome] += 1
+
+
+def get_node_result(node: str, inputs: Dict[str, Any]) -> Optional[Any]:
+    """Return the memoized result of node for these inputs, or None if there is none or it expired."""
+    entry = get_from_cache(get_node_key(node, inputs))
+    if not isinstance(entry, dict) or time.time() - entry.get("at", 0) > NODE_CACHE_TTL:
+        count(node, "misses")
+        return None
+    count(node, "hits")
+    print(f"Using memoized result for {node}")
+    return entry["value"]
+
+
+def save_node_result(node: str, inputs: Dict[str, Any], value: Any) -> bool:
+    """Memoize the result of node for these inputs."""
+    count(node, "stores")
+    return save_to_cache(get_node_key(node, inputs), {"at": time.time(), "value": value})
+
+
+def get_node_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return hit, miss and store counts and the hit rate of every node."""
+    return {
+        node: {**stats, "hit_rate": stats["hits"] / (stats["hits"] + stats["misses"]) if stats["hits"] + stats["misses"] else 0.0}
+        for node, stats in node_cache_stats.items()
+    }